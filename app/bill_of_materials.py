@@ -0,0 +1,141 @@
+from fractions import Fraction
+from typing import Iterable
+from app.crafting_graph import CraftingGraph
+
+
+class BillOfMaterials:
+    """ BillOfMaterials computes the base resources needed to craft items from the recipes of a crafting graph.
+    The base resources of one unit of every item are computed once and reused until the graph changes.
+
+    An item is a base resource if no recipe with ingredients produces it, e.g. ores that are only mined.
+    An item is crafted with the recipe returned by recipe_for(). A recipe that yields several units of the item divides
+    its ingredients between them; the other products of the recipe are not credited. An ingredient in the same strongly
+    connected component as the item it is used for is counted as a base resource, which cuts crafting cycles.
+    Amounts are exact, an int or a Fraction when a recipe yields several units."""
+    def __init__(self, graph: CraftingGraph, choose: callable=None):
+        """ BillOfMaterials computes the base resources needed to craft items from the recipes of a crafting graph.
+
+        Args:
+            graph (CraftingGraph): The crafting graph
+            choose (callable, optional): A function that returns the recipe node to craft an item with, given the item and the
+                nodes of the recipes with ingredients that produce it. Defaults to None, which uses the first recipe.
+        """
+        self.graph = graph
+        self.choose = choose
+        self._expansions: dict[int, dict[int, int or Fraction]] = {}
+        self._version = graph.version
+
+    def recipe_for(self, item: int) -> int or None:
+        """ Returns the recipe used to craft the given item.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            int or None: Node of the recipe, None if the item is a base resource
+        """
+        graph = self.graph
+        nodes = [node for node in graph.recipes_producing(item) if graph.inputs[node] and graph.outputs[node][item] > 0]
+        if not nodes:
+            return None
+        if self.choose is not None:
+            return self.choose(item, sorted(nodes))
+        return min(nodes)
+
+    def is_raw(self, item: int) -> bool:
+        """ Returns True if the given item is a base resource.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            bool: True if no recipe is used to craft the item
+        """
+        return self.recipe_for(item) is None
+
+    def expansion(self, item: int) -> dict[int, int or Fraction]:
+        """ Returns the base resources needed for one unit of the given item.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            dict[int, int or Fraction]: Amount of each base resource, must not be changed
+        """
+        if self._version != self.graph.version:
+            self._expansions.clear()
+            self._version = self.graph.version
+        expansions = self._expansions
+        if item in expansions:
+            return expansions[item]
+
+        graph = self.graph
+        pending = [item]
+        while pending:
+            current = pending[-1]
+            if current in expansions:
+                pending.pop()
+                continue
+            node = self.recipe_for(current)
+            if node is None:
+                expansions[current] = {current: 1}
+                pending.pop()
+                continue
+            component = graph.component(current)
+            inputs = [ingredient for ingredient in graph.inputs[node]
+                      if ingredient not in expansions and graph.component(ingredient) != component]
+            if inputs:
+                pending.extend(inputs)
+                continue
+            pending.pop()
+            total: dict[int, int or Fraction] = {}
+            produced = graph.outputs[node][current]
+            for ingredient, amount in graph.inputs[node].items():
+                if produced != 1:
+                    amount = Fraction(amount, produced)
+                if graph.component(ingredient) == component:
+                    parts = {ingredient: 1}
+                else:
+                    parts = expansions[ingredient]
+                for resource, part in parts.items():
+                    total[resource] = total.get(resource, 0) + part * amount
+            expansions[current] = total
+        return expansions[item]
+
+    def cost(self, item: int, amount: int or Fraction=1) -> dict[int, int or Fraction]:
+        """ Returns the base resources needed for the given amount of an item.
+
+        Args:
+            item (int): Id of the item
+            amount (int or Fraction, optional): Amount of the item. Defaults to 1.
+
+        Returns:
+            dict[int, int or Fraction]: Amount of each base resource
+        """
+        return {resource: part * amount for resource, part in self.expansion(item).items()}
+
+    def costs(self, targets: Iterable[tuple[int, int or Fraction]]) -> list[dict[int, int or Fraction]]:
+        """ Returns the base resources needed for each of the given targets.
+
+        Args:
+            targets (Iterable[tuple[int, int or Fraction]]): Pairs of item id and amount
+
+        Returns:
+            list[dict[int, int or Fraction]]: Amount of each base resource for each target, in the order of the targets
+        """
+        return [self.cost(item, amount) for item, amount in targets]
+
+    def total_cost(self, targets: Iterable[tuple[int, int or Fraction]]) -> dict[int, int or Fraction]:
+        """ Returns the base resources needed for all of the given targets together.
+
+        Args:
+            targets (Iterable[tuple[int, int or Fraction]]): Pairs of item id and amount
+
+        Returns:
+            dict[int, int or Fraction]: Amount of each base resource
+        """
+        total: dict[int, int or Fraction] = {}
+        for item, amount in targets:
+            for resource, part in self.expansion(item).items():
+                total[resource] = total.get(resource, 0) + part * amount
+        return total
@@ -0,0 +1,244 @@
+import mmap
+import struct
+import sys
+from collections.abc import Sequence
+from app.records import NO_INT, Ingredient, Lines, Recipe, number_or_none
+
+# File layout, all numbers little endian:
+#   header, followed since version 2 by (n_substitutions, substitution table offset)
+#   ingredient table: n_ingredients records of (id, name)
+#   recipe table: n_recipes records of (id, duration, name, first ingredient line, ingredient count, first product line,
+#       product count), followed since version 2 by (first substitution, substitution count)
+#   line table: n_lines records of (id, amount), the ingredient and product lines of every recipe
+#   substitution table (version 2): n_substitutions records of (original id, original amount, substitute id, substitute amount)
+#   string offsets: n_strings + 1 offsets into the string data
+#   string data: the UTF-8 encoded names
+MAGIC = b'CCAT'
+VERSION = 2
+HEADER = struct.Struct('<4sHHIIIIQQQQQ')
+SUBSTITUTIONS_HEADER = struct.Struct('<IQ')
+INGREDIENT = struct.Struct('<qI')
+RECIPE_V1 = struct.Struct('<qqIIIII')
+RECIPE = struct.Struct('<qqIIIIIII')
+LINE = struct.Struct('<qq')
+SUBSTITUTION = struct.Struct('<qqqq')
+OFFSET = struct.Struct('<Q')
+NO_STRING = 0xFFFFFFFF  # Stored for a name of None
+
+
+class BinaryCatalog:
+    """ BinaryCatalog is a catalog file opened with mmap, its records are only decoded when they are accessed."""
+    def __init__(self, file_path: str):
+        """ BinaryCatalog is a catalog file opened with mmap, its records are only decoded when they are accessed.
+
+        Args:
+            file_path (str): Path to the catalog file
+
+        Raises:
+            ValueError: If the file is not a catalog file of a supported version
+        """
+        self.file_path = file_path
+        with open(file_path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            self.buffer.close()
+            raise ValueError(f"{file_path} is not a catalog file")
+        (magic, version, _, self.n_ingredients, self.n_recipes, self.n_lines, self.n_strings,
+         self.ingredients_offset, self.recipes_offset, self.lines_offset,
+         self.string_offsets_offset, self.strings_offset) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            self.buffer.close()
+            raise ValueError(f"{file_path} is not a catalog file")
+        if version not in (1, VERSION):
+            self.buffer.close()
+            raise ValueError(f"{file_path} has unsupported catalog version {version}")
+        self.version = version
+        self.recipe_struct = RECIPE if version >= 2 else RECIPE_V1
+        self.n_substitutions, self.substitutions_offset = 0, 0
+        if version >= 2:
+            self.n_substitutions, self.substitutions_offset = SUBSTITUTIONS_HEADER.unpack_from(self.buffer, HEADER.size)
+        self.ingredients = CatalogRecords(self.n_ingredients, self.ingredient)
+        self.recipes = CatalogRecords(self.n_recipes, self.recipe)
+
+    def string(self, index: int) -> str or None:
+        """ Returns the string at the given index of the string table.
+
+        Args:
+            index (int): Index of the string
+
+        Returns:
+            str or None: The string, None for NO_STRING
+        """
+        if index == NO_STRING:
+            return None
+        start, end = struct.unpack_from('<QQ', self.buffer, self.string_offsets_offset + index * OFFSET.size)
+        return self.buffer[self.strings_offset + start:self.strings_offset + end].decode('utf-8')
+
+    def ingredient(self, index: int) -> Ingredient:
+        """ Decodes the ingredient at the given index.
+
+        Args:
+            index (int): Index of the ingredient
+
+        Returns:
+            Ingredient: The ingredient
+        """
+        item_id, name = INGREDIENT.unpack_from(self.buffer, self.ingredients_offset + index * INGREDIENT.size)
+        return Ingredient(number_or_none(item_id), self.string(name))
+
+    def recipe(self, index: int) -> Recipe:
+        """ Decodes the recipe at the given index.
+
+        Args:
+            index (int): Index of the recipe
+
+        Returns:
+            Recipe: The recipe
+        """
+        fields = self.recipe_struct.unpack_from(self.buffer, self.recipes_offset + index * self.recipe_struct.size)
+        item_id, duration, name, ingredients, n_ingredients, products, n_products = fields[:7]
+        recipe = Recipe(number_or_none(item_id), self.string(name), number_or_none(duration),
+                        self.lines(ingredients, n_ingredients), self.lines(products, n_products))
+        if len(fields) > 7 and fields[8]:
+            recipe['substitutions'] = self.substitutions(fields[7], fields[8])
+        return recipe
+
+    def lines(self, start: int, count: int) -> Lines:
+        """ Decodes ingredient or product lines, the line table is copied as it is into the packed lines.
+
+        Args:
+            start (int): Index of the first line
+            count (int): Number of lines
+
+        Returns:
+            Lines: The lines
+        """
+        offset = self.lines_offset + start * LINE.size
+        lines = Lines.from_bytes(self.buffer[offset:offset + count * LINE.size])
+        if sys.byteorder == 'big':
+            lines.byteswap()
+        return lines
+
+    def substitutions(self, start: int, count: int) -> list[dict[str, dict[str, int]]]:
+        """ Decodes substitutions.
+
+        Args:
+            start (int): Index of the first substitution
+            count (int): Number of substitutions
+
+        Returns:
+            list[dict[str, dict[str, int]]]: The substitutions
+        """
+        offset = self.substitutions_offset + start * SUBSTITUTION.size
+        return [{'original': {'amount': number_or_none(original_amount), 'id': number_or_none(original)},
+                 'substitute': {'amount': number_or_none(substitute_amount), 'id': number_or_none(substitute)}}
+                for original, original_amount, substitute, substitute_amount
+                in SUBSTITUTION.iter_unpack(self.buffer[offset:offset + count * SUBSTITUTION.size])]
+
+    def close(self):
+        """ Closes the mapping of the file, the records can no longer be accessed afterwards."""
+        self.buffer.close()
+
+
+class CatalogRecords(Sequence):
+    """ Read only sequence of the ingredients or recipes of a catalog, decoded on first access.
+    Decoded records are kept, so every access to an index returns the same record and records can be told apart by identity."""
+    def __init__(self, length: int, decode: callable):
+        self.length = length
+        self.decode = decode
+        self.decoded: dict[int, dict[str, str or int]] = {}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int or slice) -> dict[str, str or int] or list[dict[str, str or int]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("catalog index out of range")
+        record = self.decoded.get(index)
+        if record is None:
+            record = self.decoded.setdefault(index, self.decode(index))  # The first record decoded by any thread is kept
+        return record
+
+
+def write_catalog(file_path: str, ingredients: Sequence, recipes: Sequence):
+    """ Writes ingredients and recipes to a catalog file.
+    Only the id and name of the ingredients and the id, name, duration, ingredients, products and substitutions of the
+    recipes are stored.
+
+    Args:
+        file_path (str): Path to the file
+        ingredients (Sequence): Ingredient dictionaries or records
+        recipes (Sequence): Recipe dictionaries or records
+
+    Raises:
+        ValueError: If an id, duration or amount is not a whole number
+    """
+    strings: dict[str, int] = {}
+
+    def string(value: str or None) -> int:
+        if value is None:
+            return NO_STRING
+        return strings.setdefault(value, len(strings))
+
+    with open(file_path, "wb") as file:
+        file.write(bytes(HEADER.size + SUBSTITUTIONS_HEADER.size))
+        ingredients_offset = file.tell()
+        for ingredient in ingredients:
+            file.write(INGREDIENT.pack(_stored(ingredient.get('id')), string(ingredient.get('name'))))
+
+        recipes_offset = file.tell()
+        lines = []
+        substitutions = []
+        for recipe in recipes:
+            recipe_ingredients = recipe.get('ingredients') or []
+            recipe_products = recipe.get('products') or []
+            recipe_substitutions = recipe.get('substitutions') or []
+            file.write(RECIPE.pack(_stored(recipe.get('id')), _stored(recipe.get('duration')), string(recipe.get('name')),
+                                   len(lines), len(recipe_ingredients), len(lines) + len(recipe_ingredients), len(recipe_products),
+                                   len(substitutions), len(recipe_substitutions)))
+            lines.extend(recipe_ingredients)
+            lines.extend(recipe_products)
+            substitutions.extend(recipe_substitutions)
+
+        lines_offset = file.tell()
+        for line in lines:
+            file.write(LINE.pack(_stored(line.get('id')), _stored(line.get('amount'))))
+
+        substitutions_offset = file.tell()
+        for substitution in substitutions:
+            original = substitution.get('original') or {}
+            substitute = substitution.get('substitute') or {}
+            file.write(SUBSTITUTION.pack(_stored(original.get('id')), _stored(original.get('amount')),
+                                         _stored(substitute.get('id')), _stored(substitute.get('amount'))))
+
+        encoded = [value.encode('utf-8') for value in strings]
+        string_offsets_offset = file.tell()
+        position = 0
+        file.write(OFFSET.pack(position))
+        for value in encoded:
+            position += len(value)
+            file.write(OFFSET.pack(position))
+        strings_offset = file.tell()
+        file.writelines(encoded)
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(ingredients), len(recipes), len(lines), len(strings),
+                               ingredients_offset, recipes_offset, lines_offset, string_offsets_offset, strings_offset))
+        file.write(SUBSTITUTIONS_HEADER.pack(len(substitutions), substitutions_offset))
+
+
+def _stored(value: int or None) -> int:
+    """ Returns the number stored for an id, duration or amount.
+
+    Raises:
+        ValueError: If the value is not a whole number, the file only holds integers
+    """
+    if value is None:
+        return NO_INT
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"Catalog files only hold whole numbers, not {value}")
+    return int(value)
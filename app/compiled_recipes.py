@@ -0,0 +1,158 @@
+import mmap
+import struct
+from array import array
+from collections.abc import Sequence
+from app.crafting_graph import CraftingGraph, Substitution, substitute_inputs
+from app.records import NO_INT, number_or_none
+
+# File layout: a header of (magic, version, n_recipes, n_inputs, n_outputs, n_substitutions), followed by arrays of
+# 64-bit integers in the byte order of the machine, the file is only read by processes of the machine that wrote it:
+#   durations: n_recipes durations, whole numbers rounded down, NO_INT for a recipe without a numeric duration
+#   inputs: n_recipes + 1 offsets, then n_inputs item ids and n_inputs amounts, the inputs of recipe r are the entries
+#       offsets[r] to offsets[r + 1]
+#   outputs: the same for the outputs
+#   substitutions: n_recipes + 1 offsets, then n_substitutions records of (original id, original amount, substitute id,
+#       substitute amount)
+MAGIC = b'CREC'
+VERSION = 1
+HEADER = struct.Struct('=4sHHQQQQ')
+
+
+class CompiledRecipes:
+    """ CompiledRecipes are the inputs, outputs, substitutions and durations of the recipes of a crafting graph, compiled
+    into flat arrays of a file opened with mmap.
+    Processes that open the same file share its pages, and reading a recipe does not decode any record. The recipes are
+    numbered from 0 in the order they were compiled, and can be used in place of a CraftingGraph by the CraftingSimulator."""
+    def __init__(self, file_path: str):
+        """ CompiledRecipes are the inputs, outputs, substitutions and durations of the recipes of a crafting graph,
+        compiled into flat arrays of a file opened with mmap.
+
+        Args:
+            file_path (str): Path to a file written by write_compiled_recipes()
+
+        Raises:
+            ValueError: If the file is not a compiled recipes file of a supported version
+        """
+        self.file_path = file_path
+        with open(file_path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            self.buffer.close()
+            raise ValueError(f"{file_path} is not a compiled recipes file")
+        magic, version, _, self.n_recipes, n_inputs, n_outputs, n_substitutions = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.buffer.close()
+            raise ValueError(f"{file_path} is not a compiled recipes file of version {VERSION}")
+        self._views: list[memoryview] = [memoryview(self.buffer)[HEADER.size:].cast('q')]
+        self._position = 0
+        self.durations = self._take(self.n_recipes)
+        self.inputs = _Amounts(self._take(self.n_recipes + 1), self._take(n_inputs), self._take(n_inputs))
+        self.outputs = _Amounts(self._take(self.n_recipes + 1), self._take(n_outputs), self._take(n_outputs))
+        self.substitutions = _Substitutions(self._take(self.n_recipes + 1), self._take(4 * n_substitutions))
+
+    def _take(self, count: int) -> memoryview:
+        """ Returns a view of the next count numbers of the file."""
+        view = self._views[0][self._position:self._position + count]
+        self._views.append(view)
+        self._position += count
+        return view
+
+    def __len__(self) -> int:
+        return self.n_recipes
+
+    def duration(self, node: int) -> int or None:
+        """ Returns the duration of a recipe.
+
+        Args:
+            node (int): Number of the recipe
+
+        Returns:
+            int or None: The duration, None for a recipe without one
+        """
+        return number_or_none(self.durations[node])
+
+    def substituted_inputs(self, node: int, substitutions: list[Substitution]) -> dict[int, int]:
+        """ Returns the amount of each item one craft of a recipe consumes when the given substitutions are used.
+
+        Args:
+            node (int): Number of the recipe
+            substitutions (list[Substitution]): Substitutions of the recipe
+
+        Returns:
+            dict[int, int]: Amount of each item
+        """
+        return substitute_inputs(self.inputs[node], substitutions)
+
+    def close(self):
+        """ Closes the mapping of the file, the recipes can no longer be accessed afterwards."""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self.buffer.close()
+
+
+class _Amounts(Sequence):
+    """ Read only sequence of the amount of each item of the inputs or outputs of every recipe, by number of the recipe."""
+    def __init__(self, offsets: memoryview, items: memoryview, amounts: memoryview):
+        self.offsets = offsets
+        self.items = items
+        self.amounts = amounts
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, node: int) -> dict[int, int]:
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return dict(zip(self.items[start:end], self.amounts[start:end]))
+
+
+class _Substitutions(Sequence):
+    """ Read only sequence of the substitutions of every recipe, by number of the recipe."""
+    def __init__(self, offsets: memoryview, values: memoryview):
+        self.offsets = offsets
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, node: int) -> list[Substitution]:
+        start, end = self.offsets[node], self.offsets[node + 1]
+        values = self.values[4 * start:4 * end]
+        return [Substitution(*values[position:position + 4]) for position in range(0, len(values), 4)]
+
+
+def write_compiled_recipes(file_path: str, recipes: Sequence[dict]):
+    """ Compiles recipes into a file that CompiledRecipes opens, the recipes are numbered in the order given.
+    The inputs, outputs and substitutions are those of the recipes in a CraftingGraph.
+
+    Args:
+        file_path (str): Path to the file
+        recipes (Sequence[dict]): Recipe dictionaries or records
+    """
+    graph = CraftingGraph(recipes)
+    nodes = sorted(graph.recipes)  # The nodes of a new graph are numbered from 0 in the order of the recipes
+    durations = array('q', [int(duration) if isinstance(duration, (int, float)) else NO_INT
+                            for duration in map(graph.duration, nodes)])
+    tables = []
+    for adjacency in (graph.inputs, graph.outputs):
+        offsets, items, amounts = array('q', [0]), array('q'), array('q')
+        for node in nodes:
+            for item, amount in adjacency[node].items():
+                items.append(item)
+                amounts.append(amount)
+            offsets.append(len(items))
+        tables.append((offsets, items, amounts))
+    substitution_offsets, substitutions = array('q', [0]), array('q')
+    for node in nodes:
+        for substitution in graph.substitutions[node]:
+            substitutions.extend(substitution)
+        substitution_offsets.append(len(substitutions) // 4)
+
+    with open(file_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(nodes), len(tables[0][1]), len(tables[1][1]), len(substitutions) // 4))
+        durations.tofile(file)
+        for table in tables:
+            for numbers in table:
+                numbers.tofile(file)
+        substitution_offsets.tofile(file)
+        substitutions.tofile(file)
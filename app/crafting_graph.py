@@ -0,0 +1,522 @@
+from collections import Counter
+from typing import Iterable, NamedTuple, Sequence
+from app.protected_list import Change, PList
+from app.records import Lines
+
+
+class Substitution(NamedTuple):
+    """An alternative ingredient of a recipe: amount of the substitute item can replace original_amount of the original item.
+
+    Args:
+        original (int): Id of the replaced item.
+        original_amount (int): Amount of the replaced item.
+        substitute (int): Id of the substitute item.
+        substitute_amount (int): Amount of the substitute item.
+    """
+    original: int
+    original_amount: int
+    substitute: int
+    substitute_amount: int
+
+
+class CraftingGraph:
+    """ CraftingGraph is the bipartite graph of items and the recipes that consume and produce them.
+    Items are the ids used by the ingredients and by the lines of the recipes, recipes are numbered nodes. The substitute
+    items of a recipe's substitutions count as consumed by the recipe.
+    The strongly connected components and the topological order of the items are cached, an item comes after every item
+    it can be crafted from unless both are in the same component."""
+    def __init__(self, recipes: Sequence[dict]=(), ingredients: Sequence[dict]=()):
+        """ CraftingGraph is the bipartite graph of items and the recipes that consume and produce them.
+
+        Args:
+            recipes (Sequence[dict], optional): Recipe dictionaries. Defaults to ().
+            ingredients (Sequence[dict], optional): Ingredient dictionaries, their ids are items even when no recipe uses them. Defaults to ().
+        """
+        self.recipes: dict[int, dict] = {}
+        self.inputs: dict[int, dict[int, int]] = {}
+        self.outputs: dict[int, dict[int, int]] = {}
+        self.consumers: dict[int, set[int]] = {}
+        self.producers: dict[int, set[int]] = {}
+        self.substitutions: dict[int, list[Substitution]] = {}
+        self.version = 0
+        self._recipe_nodes: dict[int, int] = {}
+        self._next_node = 0
+        self._item_refs: Counter = Counter()
+        self._ingredients: dict[int, tuple[dict, int]] = {}
+        self._components: list[tuple[int]] = None
+        self._component: dict[int, int] = None
+        self._cyclic: list[bool] = None
+        self._order: list[int] = None
+        self._followed: tuple[PList, PList] = (None, None)
+        self.rebuild(recipes, ingredients)
+
+    def rebuild(self, recipes: Sequence[dict], ingredients: Sequence[dict]=()):
+        """ Replaces the graph with the graph of the given recipes and ingredients.
+
+        Args:
+            recipes (Sequence[dict]): Recipe dictionaries
+            ingredients (Sequence[dict], optional): Ingredient dictionaries. Defaults to ().
+        """
+        self.recipes.clear()
+        self.inputs.clear()
+        self.outputs.clear()
+        self.consumers.clear()
+        self.producers.clear()
+        self.substitutions.clear()
+        self._recipe_nodes.clear()
+        self._item_refs.clear()
+        self._ingredients.clear()
+        for ingredient in ingredients:
+            self._add_ingredient(ingredient)
+        for recipe in recipes:
+            self._add_recipe(recipe)
+        self._invalidate()
+
+    def follow(self, recipes: PList, ingredients: PList=None):
+        """ Rebuilds the graph from the original attributes of the given protected lists and keeps it up to date with their commits.
+
+        Args:
+            recipes (PList): Protected list of recipe dictionaries
+            ingredients (PList, optional): Protected list of ingredient dictionaries. Defaults to None.
+        """
+        self.unfollow()
+        self._followed = (recipes, ingredients)
+        recipes.subscribe_commits(self.on_recipes_commit)
+        if ingredients is not None:
+            ingredients.subscribe_commits(self.on_ingredients_commit)
+        self.rebuild(recipes.original, ingredients.original if ingredients is not None else ())
+
+    def unfollow(self):
+        """ Stops following the protected lists given to follow()."""
+        recipes, ingredients = self._followed
+        if recipes is not None:
+            recipes.unsubscribe_commits(self.on_recipes_commit)
+        if ingredients is not None:
+            ingredients.unsubscribe_commits(self.on_ingredients_commit)
+        self._followed = (None, None)
+
+    def on_recipes_commit(self, changes: list[Change] or None):
+        """ Updates the graph after recipes were committed.
+
+        Args:
+            changes (list[Change] or None): The committed changes, None when all recipes were replaced
+        """
+        if changes is None:
+            self._rebuild_followed()
+            return
+        for change in changes:
+            if change.op in ('set', 'delete') and change.old is not None:
+                self._remove_recipe(change.old)
+            if change.op in ('set', 'insert') and change.new is not None:
+                self._add_recipe(change.new)
+
+    def on_ingredients_commit(self, changes: list[Change] or None):
+        """ Updates the graph after ingredients were committed.
+
+        Args:
+            changes (list[Change] or None): The committed changes, None when all ingredients were replaced
+        """
+        if changes is None:
+            self._rebuild_followed()
+            return
+        for change in changes:
+            if change.op in ('set', 'delete') and change.old is not None:
+                self._remove_ingredient(change.old)
+            if change.op in ('set', 'insert') and change.new is not None:
+                self._add_ingredient(change.new)
+
+    def _rebuild_followed(self):
+        """ Rebuilds the graph from the followed protected lists."""
+        recipes, ingredients = self._followed
+        self.rebuild(recipes.original if recipes is not None else (), ingredients.original if ingredients is not None else ())
+
+    def __contains__(self, item: int) -> bool:
+        """ Returns True if the given item is in the graph.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            bool: True if an ingredient or a recipe uses the item
+        """
+        return item in self._item_refs
+
+    def items(self) -> list[int]:
+        """ Returns the items of the graph.
+
+        Returns:
+            list[int]: Ids of the items
+        """
+        return list(self._item_refs)
+
+    def recipe_node(self, recipe: dict) -> int or None:
+        """ Returns the node of the given recipe dictionary.
+
+        Args:
+            recipe (dict): A recipe dictionary of the graph
+
+        Returns:
+            int or None: The node of the recipe, None if the recipe is not in the graph
+        """
+        return self._recipe_nodes.get(id(recipe))
+
+    def recipes_producing(self, item: int) -> set[int]:
+        """ Returns the recipes that produce the given item.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            set[int]: Nodes of the recipes, must not be changed
+        """
+        return self.producers.get(item, _EMPTY)
+
+    def recipes_consuming(self, item: int) -> set[int]:
+        """ Returns the recipes that consume the given item, directly or as a substitute.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            set[int]: Nodes of the recipes, must not be changed
+        """
+        return self.consumers.get(item, _EMPTY)
+
+    def substituted_inputs(self, node: int, substitutions: list[Substitution]) -> dict[int, int]:
+        """ Returns the amount of each item one craft of a recipe consumes when the given substitutions are used.
+
+        Args:
+            node (int): Node of the recipe
+            substitutions (list[Substitution]): Substitutions of the recipe
+
+        Returns:
+            dict[int, int]: Amount of each item
+        """
+        return substitute_inputs(self.inputs[node], substitutions)
+
+    def duration(self, node: int) -> any:
+        """ Returns the duration of a recipe as it is given, e.g. None or 0 for a recipe without one.
+
+        Args:
+            node (int): Node of the recipe
+
+        Returns:
+            any: The duration
+        """
+        return self.recipes[node].get('duration')
+
+    def components(self) -> list[tuple[int]]:
+        """ Returns the strongly connected components of the items in topological order.
+
+        Returns:
+            list[tuple[int]]: The items of each component, the components that can be crafted from others come later
+        """
+        self._analyze()
+        return self._components
+
+    def component(self, item: int) -> int:
+        """ Returns the position of the component of the given item in components().
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            int: Position of the component
+        """
+        self._analyze()
+        return self._component[item]
+
+    def is_cyclic(self, item: int) -> bool:
+        """ Returns True if the given item can be crafted from itself.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            bool: True if the item is part of a cycle
+        """
+        self._analyze()
+        return self._cyclic[self._component[item]]
+
+    def topological_order(self) -> list[int]:
+        """ Returns the items in topological order, an item comes after the items it can be crafted from unless both are in the same component.
+
+        Returns:
+            list[int]: Ids of the items, must not be changed
+        """
+        self._analyze()
+        return self._order
+
+    def successors(self, item: int) -> Iterable[int]:
+        """ Yields the items produced by the recipes that consume the given item.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            Iterable[int]: Ids of the items, an item may be yielded more than once
+        """
+        outputs = self.outputs
+        for node in self.consumers.get(item, _EMPTY):
+            yield from outputs[node]
+
+    def _analyze(self):
+        """ Computes the components and the topological order of the items if the graph changed since they were computed."""
+        if self._components is not None:
+            return
+        items = list(self._item_refs)
+        numbers = {item: number for number, item in enumerate(items)}
+        consumers, outputs = self.consumers, self.outputs
+        successors = [[numbers[product] for node in consumers.get(item, _EMPTY) for product in outputs[node]] for item in items]
+        components = strongly_connected_components(successors)
+        components.reverse()
+        self._components = [tuple(items[number] for number in component) for component in components]
+        self._component = {item: position for position, component in enumerate(self._components) for item in component}
+        self._cyclic = [len(component) > 1 or component[0] in successors[component[0]] for component in components]
+        self._order = [item for component in self._components for item in component]
+
+    def _invalidate(self):
+        """ Drops the cached components and topological order."""
+        self._components = None
+        self._component = None
+        self._cyclic = None
+        self._order = None
+        self.version += 1
+
+    def _keeps_components(self, inputs: dict[int, int], outputs: dict[int, int], added: bool) -> bool:
+        """ Returns True if adding or removing the edges from inputs to outputs leaves the cached components and order valid.
+        An added edge must go forward in the order or stay inside a cyclic component, a removed edge must join two components.
+
+        Args:
+            inputs (dict[int, int]): Items consumed by the recipe
+            outputs (dict[int, int]): Items produced by the recipe
+            added (bool): True if the edges are added, False if they are removed
+
+        Returns:
+            bool: True if the cache is still valid
+        """
+        if self._components is None:
+            return False
+        component = self._component
+        for item in inputs:
+            source = component.get(item)
+            if source is None:
+                return False
+            for product in outputs:
+                target = component.get(product)
+                if target is None:
+                    return False
+                if added and not (source < target or (source == target and self._cyclic[source])):
+                    return False
+                if not added and source == target:
+                    return False
+        return True
+
+    def _add_item(self, item: int) -> bool:
+        """ Adds a reference to an item, returns True if the item is new."""
+        self._item_refs[item] += 1
+        return self._item_refs[item] == 1
+
+    def _remove_item(self, item: int) -> bool:
+        """ Removes a reference to an item, returns True if the item is gone."""
+        self._item_refs[item] -= 1
+        if self._item_refs[item] <= 0:
+            del self._item_refs[item]
+            return True
+        return False
+
+    def _add_ingredient(self, ingredient: dict):
+        """ Adds the item of an ingredient dictionary."""
+        item = ingredient.get('id')
+        if item is not None:
+            self._ingredients[id(ingredient)] = (ingredient, item)
+            if self._add_item(item):
+                self._invalidate()
+
+    def _remove_ingredient(self, ingredient: dict):
+        """ Removes the item of an ingredient dictionary."""
+        _, item = self._ingredients.pop(id(ingredient), (None, None))
+        if item is not None and self._remove_item(item):
+            self._invalidate()
+
+    def _add_recipe(self, recipe: dict):
+        """ Adds a recipe dictionary and the edges to and from its items."""
+        node = self._next_node
+        self._next_node += 1
+        inputs = _amounts(recipe.get('ingredients'))
+        outputs = _amounts(recipe.get('products'))
+        substitutions = _substitutions(recipe.get('substitutions'))
+        self.recipes[node] = recipe
+        self._recipe_nodes[id(recipe)] = node
+        self.inputs[node] = inputs
+        self.outputs[node] = outputs
+        self.substitutions[node] = substitutions
+        sources = self._sources(node)
+        new_item = False
+        for item in sources:
+            self.consumers.setdefault(item, set()).add(node)
+            new_item = self._add_item(item) or new_item
+        for item in outputs:
+            self.producers.setdefault(item, set()).add(node)
+            new_item = self._add_item(item) or new_item
+        if new_item or not self._keeps_components(sources, outputs, True):
+            self._invalidate()
+        else:
+            self.version += 1
+
+    def _remove_recipe(self, recipe: dict):
+        """ Removes a recipe dictionary and the edges to and from its items."""
+        node = self._recipe_nodes.pop(id(recipe), None)
+        if node is None:
+            return
+        sources = self._sources(node)
+        del self.recipes[node]
+        del self.inputs[node]
+        outputs = self.outputs.pop(node)
+        del self.substitutions[node]
+        keeps = self._keeps_components(sources, outputs, False)
+        gone_item = False
+        for item in sources:
+            self._discard(self.consumers, item, node)
+            gone_item = self._remove_item(item) or gone_item
+        for item in outputs:
+            self._discard(self.producers, item, node)
+            gone_item = self._remove_item(item) or gone_item
+        if gone_item or not keeps:
+            self._invalidate()
+        else:
+            self.version += 1
+
+    def _sources(self, node: int) -> dict[int, None]:
+        """ Returns the items a recipe consumes or can consume through a substitution."""
+        sources = dict.fromkeys(self.inputs[node])
+        for substitution in self.substitutions[node]:
+            sources[substitution.substitute] = None
+        return sources
+
+    @staticmethod
+    def _discard(adjacency: dict[int, set[int]], item: int, node: int):
+        """ Removes a recipe node from the adjacency set of an item."""
+        nodes = adjacency[item]
+        nodes.discard(node)
+        if not nodes:
+            del adjacency[item]
+
+
+_EMPTY: frozenset = frozenset()
+
+
+def substitute_inputs(inputs: dict[int, int], substitutions: list[Substitution]) -> dict[int, int]:
+    """ Returns the amount of each item one craft consumes when the given substitutions are made to its inputs.
+
+    Args:
+        inputs (dict[int, int]): Amount of each item without substitutions
+        substitutions (list[Substitution]): The substitutions
+
+    Returns:
+        dict[int, int]: Amount of each item
+    """
+    inputs = dict(inputs)
+    for substitution in substitutions:
+        inputs[substitution.original] = inputs.get(substitution.original, 0) - substitution.original_amount
+        if inputs[substitution.original] <= 0:
+            del inputs[substitution.original]
+        inputs[substitution.substitute] = inputs.get(substitution.substitute, 0) + substitution.substitute_amount
+    return inputs
+
+
+def _substitutions(substitutions: list[dict] or None) -> list[Substitution]:
+    """ Returns the substitutions of a recipe, substitutions without an original or substitute item are skipped.
+
+    Args:
+        substitutions (list[dict] or None): The 'substitutions' of a recipe dictionary
+
+    Returns:
+        list[Substitution]: The substitutions
+    """
+    result = []
+    for substitution in substitutions or ():
+        original = substitution.get('original') or {}
+        substitute = substitution.get('substitute') or {}
+        if original.get('id') is not None and substitute.get('id') is not None:
+            result.append(Substitution(original['id'], original.get('amount') or 0, substitute['id'], substitute.get('amount') or 0))
+    return result
+
+
+def _amounts(lines: list[dict] or None) -> dict[int, int]:
+    """ Returns the total amount of each item of ingredient or product lines, lines without an item are skipped.
+
+    Args:
+        lines (list[dict] or None): Ingredient or product lines
+
+    Returns:
+        dict[int, int]: Amount of each item
+    """
+    amounts: dict[int, int] = {}
+    # Packed lines give their ids and amounts without a record per line
+    pairs = lines.pairs() if isinstance(lines, Lines) else ((line.get('id'), line.get('amount')) for line in lines or ())
+    for item, amount in pairs:
+        if item is not None:
+            amounts[item] = amounts.get(item, 0) + (amount or 0)
+    return amounts
+
+
+def strongly_connected_components(successors: list[list[int]]) -> list[list[int]]:
+    """ Returns the strongly connected components of a graph with Tarjan's algorithm, without recursion.
+
+    Args:
+        successors (list[list[int]]): The successors of each node, the nodes are numbered from 0
+
+    Returns:
+        list[list[int]]: The components in reverse topological order, a component comes before the components that reach it
+    """
+    count = len(successors)
+    index = [-1] * count
+    low = [0] * count
+    on_stack = bytearray(count)
+    stack: list[int] = []
+    components: list[list[int]] = []
+    counter = 0
+    for root in range(count):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work_nodes = [root]
+        work_positions = [0]
+        while work_nodes:
+            node = work_nodes[-1]
+            children = successors[node]
+            position = work_positions[-1]
+            while position < len(children):
+                child = children[position]
+                position += 1
+                if index[child] < 0:
+                    break
+                if on_stack[child] and index[child] < low[node]:
+                    low[node] = index[child]
+            else:
+                work_nodes.pop()
+                work_positions.pop()
+                if work_nodes and low[node] < low[work_nodes[-1]]:
+                    low[work_nodes[-1]] = low[node]
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                continue
+            work_positions[-1] = position
+            index[child] = low[child] = counter
+            counter += 1
+            stack.append(child)
+            on_stack[child] = 1
+            work_nodes.append(child)
+            work_positions.append(0)
+    return components
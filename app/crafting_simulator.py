@@ -0,0 +1,183 @@
+import heapq
+from array import array
+from typing import NamedTuple
+from app.compiled_recipes import CompiledRecipes
+from app.crafting_graph import CraftingGraph, Substitution
+
+
+class SimulationResult(NamedTuple):
+    """What a factory did from the start of a simulation until its current time.
+
+    Args:
+        time (int): Ticks simulated.
+        crafts (dict[int, int]): Crafts completed by each recipe node.
+        produced (dict[int, int]): Amount of each item produced.
+        consumed (dict[int, int]): Amount of each item consumed.
+        inventory (dict[int, int]): Amount of each item in the inventory.
+        throughput (dict[int, float]): Amount of each item produced per tick.
+        starved (dict[int, int]): Crafter ticks spent idle waiting for each item, the bottlenecks have the most.
+        utilization (dict[int, float]): Share of the crafter ticks of each recipe node spent crafting.
+    """
+    time: int
+    crafts: dict
+    produced: dict
+    consumed: dict
+    inventory: dict
+    throughput: dict
+    starved: dict
+    utilization: dict
+
+
+class CraftingSimulator:
+    """ CraftingSimulator runs a factory of crafters over the recipes of a crafting graph in discrete time.
+
+    A crafter takes the ingredients of its recipe from the shared inventory, crafts for the duration of the recipe in ticks,
+    at least one, and puts the products into the inventory. Finishing crafts are events in a priority queue, so time jumps
+    from one event to the next, and the crafters of a recipe that start together finish as one event. A crafter that lacks
+    an ingredient waits on that item and is only woken when the item is produced. The inventory and the statistics are
+    arrays indexed by item."""
+    def __init__(self, graph: CraftingGraph or CompiledRecipes, crafters: dict[int, int], inventory: dict[int, int]=None,
+                 substitutions: dict[int, list[Substitution]]=None):
+        """ CraftingSimulator runs a factory of crafters over the recipes of a crafting graph in discrete time.
+
+        Args:
+            graph (CraftingGraph): The crafting graph, or the CompiledRecipes of one
+            crafters (dict[int, int]): Number of crafters of each recipe node
+            inventory (dict[int, int], optional): Amount of each item in the inventory at the start. Defaults to None.
+            substitutions (dict[int, list[Substitution]], optional): Substitutions the crafters of each recipe node use. Defaults to None.
+        """
+        self.graph = graph
+        self.recipes: list[int] = [node for node, count in crafters.items() if count > 0]
+        substitutions = substitutions or {}
+        consumed = [graph.substituted_inputs(node, substitutions.get(node, ())) for node in self.recipes]
+        items = set(inventory or ())
+        for node, inputs in zip(self.recipes, consumed):
+            items.update(inputs)
+            items.update(graph.outputs[node])
+        self.items: list[int] = sorted(items, key=lambda item: (type(item).__name__, item))
+        self.item_index: dict[int, int] = {item: index for index, item in enumerate(self.items)}
+
+        item_index = self.item_index
+        self.inputs = [tuple((item_index[item], amount) for item, amount in inputs.items() if amount > 0)
+                       for inputs in consumed]
+        self.outputs = [tuple((item_index[item], amount) for item, amount in graph.outputs[node].items() if amount > 0)
+                        for node in self.recipes]
+        self.durations = array('q', [self._duration(node) for node in self.recipes])
+        self.crafters = array('q', [crafters[node] for node in self.recipes])
+        self.idle = array('q', self.crafters)
+        self.crafts = array('q', bytes(8 * len(self.recipes)))
+        self.busy = array('q', bytes(8 * len(self.recipes)))
+
+        self.inventory = array('q', bytes(8 * len(self.items)))
+        for item, amount in (inventory or {}).items():
+            self.inventory[item_index[item]] = amount
+        self.produced = array('q', bytes(8 * len(self.items)))
+        self.consumed = array('q', bytes(8 * len(self.items)))
+        self.starved = array('q', bytes(8 * len(self.items)))
+
+        self.time = 0
+        self.events: list[tuple[int, int, int, int]] = []
+        self._sequence = 0
+        self.waiters: list[set[int]] = [set() for _ in self.items]
+        self.waiting_on = [-1] * len(self.recipes)
+        self.waiting_since = [0] * len(self.recipes)
+        for recipe in range(len(self.recipes)):
+            self._start(recipe)
+
+    def run(self, until: int) -> SimulationResult:
+        """ Runs the factory until the given time, crafters that cannot craft stay idle.
+
+        Args:
+            until (int): Tick to stop at, crafts finishing later are left running
+
+        Returns:
+            SimulationResult: What the factory did since the start of the simulation
+        """
+        events = self.events
+        outputs = self.outputs
+        inventory = self.inventory
+        produced = self.produced
+        waiters = self.waiters
+        while events and events[0][0] <= until:
+            self.time, _, recipe, count = heapq.heappop(events)
+            self.crafts[recipe] += count
+            self._settle(recipe)  # The finished crafters were not waiting
+            self.idle[recipe] += count
+            woken = {recipe}
+            for item, amount in outputs[recipe]:
+                inventory[item] += amount * count
+                produced[item] += amount * count
+                if waiters[item]:
+                    woken.update(waiters[item])
+                    waiters[item].clear()
+            for waiter in sorted(woken):
+                self._start(waiter)
+        self.time = max(self.time, until)
+        return self.result()
+
+    def result(self) -> SimulationResult:
+        """ Returns what the factory did since the start of the simulation.
+
+        Returns:
+            SimulationResult: The statistics until the current time
+        """
+        time = self.time
+        starved = array('q', self.starved)
+        for recipe, item in enumerate(self.waiting_on):
+            if item >= 0:
+                starved[item] += self.idle[recipe] * (time - self.waiting_since[recipe])
+        busy = array('q', self.busy)
+        for finish, _, recipe, count in self.events:
+            busy[recipe] -= count * (finish - time)  # The part of running crafts that lies ahead
+        items = self.items
+        return SimulationResult(
+            time,
+            {node: self.crafts[recipe] for recipe, node in enumerate(self.recipes)},
+            {item: self.produced[index] for index, item in enumerate(items) if self.produced[index]},
+            {item: self.consumed[index] for index, item in enumerate(items) if self.consumed[index]},
+            {item: self.inventory[index] for index, item in enumerate(items)},
+            {item: self.produced[index] / time for index, item in enumerate(items) if self.produced[index]} if time else {},
+            {item: starved[index] for index, item in enumerate(items) if starved[index]},
+            {node: busy[recipe] / (self.crafters[recipe] * time) if time else 0.0 for recipe, node in enumerate(self.recipes)},
+        )
+
+    def _start(self, recipe: int):
+        """ Starts as many idle crafters of a recipe as the inventory allows, the others wait on the item they lack."""
+        now = self.time
+        self._settle(recipe)
+        idle = self.idle[recipe]
+        if not idle:
+            return
+        inventory = self.inventory
+        count = idle
+        lacking = -1
+        for item, amount in self.inputs[recipe]:
+            available = inventory[item] // amount
+            if available < count:
+                count = available
+                lacking = item
+        if count:
+            for item, amount in self.inputs[recipe]:
+                inventory[item] -= amount * count
+                self.consumed[item] += amount * count
+            self.idle[recipe] -= count
+            duration = self.durations[recipe]
+            self.busy[recipe] += count * duration
+            self._sequence += 1
+            heapq.heappush(self.events, (now + duration, self._sequence, recipe, count))
+        if lacking >= 0:
+            self.waiting_on[recipe] = lacking
+            self.waiting_since[recipe] = now
+            self.waiters[lacking].add(recipe)
+
+    def _settle(self, recipe: int):
+        """ Counts the ticks the idle crafters of a recipe waited until now as starved on the item they wait on."""
+        waiting_on = self.waiting_on[recipe]
+        if waiting_on >= 0:
+            self.starved[waiting_on] += self.idle[recipe] * (self.time - self.waiting_since[recipe])
+            self.waiting_on[recipe] = -1
+
+    def _duration(self, node: int) -> int:
+        """ Returns the ticks per craft of a recipe."""
+        duration = self.graph.duration(node)
+        return max(1, int(duration)) if isinstance(duration, (int, float)) else 1
@@ -1,6 +1,21 @@
 import json
+import os
+from typing import Iterator, NamedTuple
 import yaml
+from app.binary_catalog import BinaryCatalog, write_catalog
+from app.records import SECTIONS, Lines, Record, as_record, plain
+from app.sharded_catalog import ShardedCatalog, write_manifest
 
+# Use the libyaml bindings when PyYAML was built with them, they parse and emit many times faster
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class Dumper(getattr(yaml, 'CSafeDumper', yaml.SafeDumper)):
+    """ Dumper writes ingredient and recipe records and their lines as the mappings and lists they were read from."""
+
+
+Dumper.add_multi_representer(Record, lambda dumper, record: dumper.represent_dict(plain(record)))
+Dumper.add_representer(Lines, lambda dumper, lines: dumper.represent_list(plain(lines)))
 
 class DataModel:
     """"DataModel is a class that represents the data model for the recipe editor tool."""
@@ -8,33 +23,463 @@ class DataModel:
         """" DataModel is a class that represents the data model for the recipe editor tool."""
         self.ingredients = []
         self.recipes = []
+        self.catalog: BinaryCatalog or ShardedCatalog = None
+        self.saved_lines: SavedLines = None
 
-    def load_data(self, file_path: str):
+    def load_data(self, file_path: str, streaming: bool=False):
         """ Loads data from a file.
-        
+        Ingredients and recipes are read as Ingredient and Recipe records, see app.records.
+        A .ccat catalog file is opened with mmap, its ingredients and recipes are read only sequences that decode a record when it is accessed.
+        Of a .manifest file only the list of shards is read, its ingredients and recipes are read only sequences that read
+        a shard when one of its records is first accessed.
+
+        Args:
+            file_path (str): Path to the file
+            streaming (bool, optional): Read the records one at a time instead of parsing the whole document first. Defaults to False.
+        """
+        self.saved_lines = None
+        if file_path.endswith(".ccat") or file_path.endswith(".manifest"):
+            catalog = BinaryCatalog(file_path) if file_path.endswith(".ccat") else ShardedCatalog(file_path)
+            self.close()
+            self.catalog = catalog
+            self.ingredients = catalog.ingredients
+            self.recipes = catalog.recipes
+            return
+        if streaming or file_path.endswith(".jsonl"):
+            ingredients, recipes = [], []
+            sections = {'ingredients': ingredients, 'recipes': recipes}
+            for section, record in self.iter_records(file_path):
+                sections[section].append(record)
+            self.ingredients = ingredients
+            self.recipes = recipes
+            return
+        data = read_document(file_path)
+        self.ingredients = [as_record('ingredients', record) for record in data.get('ingredients', [])]
+        self.recipes = [as_record('recipes', record) for record in data.get('recipes', [])]
+
+    def iter_records(self, file_path: str) -> Iterator[tuple[str, dict[str, str or int]]]:
+        """ Reads the ingredients and recipes of a file one record at a time, other top level keys are skipped.
+        The records of a .ccat catalog file are decoded one at a time and the file is closed when they are all read.
+        The shards of a .manifest file are read one at a time.
+
         Args:
             file_path (str): Path to the file
+
+        Returns:
+            Iterator[tuple[str, dict[str, str or int]]]: Pairs of section name ('ingredients' or 'recipes') and record
         """
+        if file_path.endswith(".ccat"):
+            catalog = BinaryCatalog(file_path)
+            try:
+                for section in SECTIONS:
+                    for record in getattr(catalog, section):
+                        yield section, record
+            finally:
+                catalog.close()
+            return
+        if file_path.endswith(".manifest"):
+            catalog = ShardedCatalog(file_path)
+            try:
+                yield from catalog.iter_records()
+            finally:
+                catalog.close()
+            return
         with open(file_path, "r", encoding="utf-8") as file:
             if file_path.endswith(".json"):
-                data = json.load(file)
+                records = iter_json_records(file)
             elif file_path.endswith(".yaml"):
-                data = yaml.safe_load(file)
-            self.ingredients = data.get('ingredients', [])
-            self.recipes = data.get('recipes', [])
+                records = iter_yaml_records(file)
+            elif file_path.endswith(".jsonl"):
+                records = iter_json_lines(file)
+            else:
+                return
+            for section, record in records:
+                yield section, as_record(section, record)
 
     def save_data(self, file_path: str):
         """ Saves the data to a file.
-        
+        The file is written next to the target and moved over it, so a failed save leaves the previous file intact.
+        A .jsonl file saved by this data model before is only appended to when records were only added since.
+
         Args:
             file_path (str): Path to the file
         """
+        if file_path.endswith(".ccat"):
+            self.save_catalog(file_path)
+            return
+        if file_path.endswith(".manifest"):
+            self.save_manifest(file_path)
+            return
+        if file_path.endswith(".jsonl"):
+            self.save_lines(file_path)
+            return
         data = {
-            'ingredients': self.ingredients,
-            'recipes': self.recipes
+            'ingredients': list(self.ingredients),
+            'recipes': list(self.recipes)
         }
-        with open(file_path, "w", encoding="utf-8") as file:
+
+        def write(file):
             if file_path.endswith(".json"):
-                json.dump(data, file, indent=4)
+                json.dump(data, file, indent=4, default=plain)
             elif file_path.endswith(".yaml"):
-                yaml.dump(data, file, default_flow_style=False)
+                yaml.dump(data, file, Dumper=Dumper, default_flow_style=False)
+
+        write_atomically(file_path, write)
+
+    def save_lines(self, file_path: str):
+        """ Saves the data to a JSON lines file, one ["ingredients" or "recipes", record] array per line.
+        The records of the last save are compared by identity, which a protected list keeps for every entry it did not
+        change. If the file was not changed since and the saved records are still at the start of both sections, only the
+        new records are appended. Otherwise the file is rewritten atomically, and only the records that changed are encoded again.
+
+        Args:
+            file_path (str): Path to the file
+        """
+        sections = {section: list(getattr(self, section)) for section in SECTIONS}
+        saved = self.saved_lines
+        if saved is not None and saved.file_path == file_path and saved.stat == file_stat(file_path) and all(
+                len(sections[section]) >= len(saved.records[section])
+                and all(new is old for new, old in zip(sections[section], saved.records[section])) for section in SECTIONS):
+            lines = saved.lines
+            added = [_encoded_line(lines, section, record)
+                     for section in SECTIONS for record in sections[section][len(saved.records[section]):]]
+            with open(file_path, "a", encoding="utf-8") as file:
+                file.writelines(added)
+                file.flush()
+                os.fsync(file.fileno())
+        else:
+            old_lines = saved.lines if saved is not None else {}
+            lines = {}
+            for section in SECTIONS:
+                for record in sections[section]:
+                    key = (section, id(record))
+                    if key in old_lines and old_lines[key][0] is record:
+                        lines[key] = old_lines[key]
+            write_atomically(file_path, lambda file: file.writelines(
+                _encoded_line(lines, section, record) for section in SECTIONS for record in sections[section]))
+        self.saved_lines = SavedLines(file_path, file_stat(file_path), sections, lines)
+
+    def save_catalog(self, file_path: str):
+        """ Saves the data to a catalog file.
+        The file is written next to the target and moved over it, so an open catalog can be saved to its own path.
+
+        Args:
+            file_path (str): Path to the file
+
+        Raises:
+            ValueError: If an id, duration or amount is not a whole number
+        """
+        temp_path = file_path + ".tmp"
+        try:
+            write_catalog(temp_path, self.ingredients, self.recipes)
+            with open(temp_path, "rb") as file:
+                os.fsync(file.fileno())
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        mapped = self.catalog is not None and os.path.exists(file_path) and os.path.samefile(self.catalog.file_path, file_path)
+        lazy = self.catalog is not None and (self.ingredients is self.catalog.ingredients or self.recipes is self.catalog.recipes)
+        if mapped:
+            self.close()
+        os.replace(temp_path, file_path)
+        if mapped and lazy:
+            self.load_data(file_path)
+
+    def save_manifest(self, file_path: str, shard_size: int=10000):
+        """ Saves the data to JSON shard files next to a manifest listing them.
+        When the manifest the data was loaded from is saved, the shards whose records did not change are kept as they are,
+        and sections that were never materialised stay lazy.
+
+        Args:
+            file_path (str): Path to the manifest
+            shard_size (int, optional): Maximum number of records of a shard. Defaults to 10000.
+        """
+        previous = self.catalog if isinstance(self.catalog, ShardedCatalog) and os.path.exists(file_path) \
+            and os.path.samefile(self.catalog.file_path, file_path) else None
+        catalog = write_manifest(file_path, self.ingredients, self.recipes, shard_size, previous)
+        if previous is None:
+            return
+        # The previous catalog may list shards that were just removed, the written one reads the same records
+        if self.ingredients is previous.ingredients:
+            self.ingredients = catalog.ingredients
+        if self.recipes is previous.recipes:
+            self.recipes = catalog.recipes
+        self.catalog = catalog
+
+    def close(self):
+        """ Closes the catalog file the data was loaded from, if any."""
+        if self.catalog is not None:
+            self.catalog.close()
+            self.catalog = None
+
+
+class SavedLines(NamedTuple):
+    """What DataModel.save_lines() wrote last, to append to the file next time.
+
+    Args:
+        file_path (str): Path to the file.
+        stat (tuple[int, int, int]): Inode, size and modification time of the file after the save, see file_stat().
+        records (dict[str, list[dict]]): The records saved in each section, in order.
+        lines (dict[tuple[str, int], tuple[dict, str]]): The record and encoded line of each section and record identity.
+    """
+    file_path: str
+    stat: tuple
+    records: dict
+    lines: dict
+
+
+def write_atomically(file_path: str, write: callable):
+    """ Writes a text file next to the target, flushes it to disk and moves it over the target.
+
+    Args:
+        file_path (str): Path to the file
+        write (callable): A function that writes the content to the open file
+    """
+    temp_path = file_path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _encoded_line(lines: dict[tuple[str, int], tuple[dict, str]], section: str, record: dict) -> str:
+    """ Returns the JSON line of a record, encoded once per record identity."""
+    key = (section, id(record))
+    entry = lines.get(key)
+    if entry is None or entry[0] is not record:
+        entry = lines[key] = (record, json.dumps([section, record], separators=(',', ':'), default=plain) + "\n")
+    return entry[1]
+
+
+def file_stat(file_path: str) -> tuple[int, int, int] or None:
+    """ Returns the inode, size and modification time of a file, which change whenever it is saved, None if it does not exist.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        tuple[int, int, int] or None: The inode, size and modification time in nanoseconds
+    """
+    try:
+        result = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return result.st_ino, result.st_size, result.st_mtime_ns
+
+
+def read_document(file_path: str) -> any:
+    """ Parses a whole .json or .yaml file.
+
+    Args:
+        file_path (str): Path to the file
+
+    Raises:
+        ValueError: If the file type is not supported
+
+    Returns:
+        any: The document
+    """
+    if not (file_path.endswith(".json") or file_path.endswith(".yaml")):
+        raise ValueError(f"Unknown file type: {file_path}")
+    with open(file_path, "r", encoding="utf-8") as file:
+        if file_path.endswith(".json"):
+            return json.load(file)
+        return yaml.load(file, Loader=Loader)
+
+
+def iter_json_lines(file) -> Iterator[tuple[str, any]]:
+    """ Reads the records of a JSON lines file written by DataModel.save_lines() one line at a time.
+    A last line without a line break is skipped if it cannot be decoded, it is the rest of an interrupted append.
+
+    Args:
+        file: Open text file
+
+    Returns:
+        Iterator[tuple[str, any]]: Pairs of section name and item
+    """
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            section, record = json.loads(line)
+        except json.JSONDecodeError:
+            if line.endswith("\n"):
+                raise
+            return
+        if section in SECTIONS:
+            yield section, record
+
+
+def iter_yaml_records(file) -> Iterator[tuple[str, any]]:
+    """ Reads the items of the top level 'ingredients' and 'recipes' sequences of a YAML document one at a time.
+    Only the nodes of one item are held at once, the events are read with the fastest available loader.
+
+    Args:
+        file: Open text file
+
+    Returns:
+        Iterator[tuple[str, any]]: Pairs of section name and item
+    """
+    loader = Loader(file)
+    anchors = {}
+    try:
+        loader.get_event()  # StreamStartEvent
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStartEvent
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise ValueError("The document is not a mapping")
+        loader.get_event()
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = loader.construct_document(_compose_node(loader, anchors))
+            if key in SECTIONS and loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    yield key, loader.construct_document(_compose_node(loader, anchors))
+                loader.get_event()
+            else:
+                _compose_node(loader, anchors)
+    finally:
+        loader.dispose()
+
+
+def _compose_node(loader: yaml.Loader, anchors: dict[str, yaml.Node]) -> yaml.Node:
+    """ Builds the node starting at the next event of the loader.
+    The C loader does not expose its composer, so nodes are built from the events the same way yaml.composer does.
+
+    Args:
+        loader (yaml.Loader): The loader reading the document
+        anchors (dict[str, yaml.Node]): The anchored nodes of the document
+
+    Returns:
+        yaml.Node: The node
+    """
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(None, None, f"found undefined alias {event.anchor}", event.start_mark)
+        return anchors[event.anchor]
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose_node(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    else:
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _compose_node(loader, anchors)
+            node.value.append((key, _compose_node(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    return node
+
+
+def iter_json_records(file, chunk_size: int=1 << 16) -> Iterator[tuple[str, any]]:
+    """ Reads the items of the top level 'ingredients' and 'recipes' arrays of a JSON document one at a time.
+    The file is read in chunks and only the text of the items not yet decoded is held.
+
+    Args:
+        file: Open text file
+        chunk_size (int, optional): Number of characters read at once. Defaults to 65536.
+
+    Returns:
+        Iterator[tuple[str, any]]: Pairs of section name and item
+    """
+    reader = _JsonReader(file, chunk_size)
+    reader.expect('{')
+    if not reader.accept('}'):
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key in SECTIONS and reader.accept('['):
+                if not reader.accept(']'):
+                    while True:
+                        yield key, reader.value()
+                        if reader.accept(']'):
+                            break
+                        reader.expect(',')
+            else:
+                reader.value()
+            if reader.accept('}'):
+                break
+            reader.expect(',')
+
+
+class _JsonReader:
+    """ Buffered reader of the tokens of a JSON document."""
+    decoder = json.JSONDecoder()
+
+    def __init__(self, file, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self, size: int) -> bool:
+        """ Reads at least size more characters unless the file ended, returns False at the end of the file."""
+        if self.eof:
+            return False
+        chunk = self.file.read(max(size, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """ Returns the next character that is not whitespace, or an empty string at the end of the file."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in ' \t\r\n':
+                self.position += 1
+            if self.position < len(self.buffer) or not self.fill(self.chunk_size):
+                return self.buffer[self.position:self.position + 1]
+
+    def accept(self, token: str) -> bool:
+        """ Consumes the next character if it is the given token."""
+        if self.peek() == token:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, token: str):
+        """ Consumes the next character, which must be the given token."""
+        if not self.accept(token):
+            raise json.JSONDecodeError(f"Expecting '{token}'", self.buffer, self.position)
+
+    def value(self) -> any:
+        """ Decodes the next value, reading more of the file until the value is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # The value may continue past the buffer, read as much again as is held and retry
+                if not self.fill(len(self.buffer) - self.position):
+                    raise
+                continue
+            if end < len(self.buffer) or self.eof:
+                self.position = end
+                return value
+            # A number at the end of the buffer may continue in the next chunk
+            self.fill(self.chunk_size)
@@ -0,0 +1,42 @@
+import tkinter as tk
+
+
+class EditBatcher:
+    """ EditBatcher gathers the fields edited through the widgets of a tab and applies them together once per idle cycle."""
+    def __init__(self, widget: tk.Widget, apply: callable):
+        """ EditBatcher gathers the fields edited through the widgets of a tab and applies them together once per idle cycle.
+
+        Args:
+            widget (tk.Widget): Widget used to schedule the idle callback
+            apply (callable): Function called with the set of edited fields
+        """
+        self.widget = widget
+        self.apply = apply
+        self.fields: set = set()
+        self.scheduled = None
+
+    def mark(self, field: any):
+        """ Records that a field was edited and schedules the edits to be applied.
+
+        Args:
+            field (any): The edited field, e.g. 'name' or ('ingredients', row)
+        """
+        self.fields.add(field)
+        if self.scheduled is None:
+            self.scheduled = self.widget.after_idle(self.flush)
+
+    def flush(self):
+        """ Applies the edited fields now."""
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        if self.fields:
+            fields, self.fields = self.fields, set()
+            self.apply(fields)
+
+    def discard(self):
+        """ Drops the edited fields without applying them."""
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        self.fields = set()
@@ -1,39 +1,75 @@
 import tkinter as tk
+from tkinter import ttk
+from app.ingredient_chooser import IngredientChooser
 
 
 class EntryRow:
-    """ EntryRow is a class that represents a row of items in the recipe editor tool's ingredients tab."""
-    def __init__(self, parent_frame: tk.Widget, selected: str, options: list[str], amount: int, remove_function: callable, row: int):
+    """ EntryRow is a class that represents a row of items in the recipe editor tool's ingredients tab.
+    Rows are meant to be reused: rebind() shows a hidden row again with new values instead of building new widgets."""
+    def __init__(self, parent_frame: tk.Widget, selected: str, chooser: IngredientChooser, amount: int, remove_function: callable, row: int):
         """ EntryRow is a class that represents a row in the recipe editor tool's ingredients tab.
 
         Args:
             parent_frame (tk.Widget): Parent widget for the row
             selected (str): Name of the selected option
-            options (list[str]): List of options for the dropdown
+            chooser (IngredientChooser): Shared provider of the options for the dropdown, asked when the dropdown is opened
             amount (int): Amount of item represented by the row
             remove_function (callable): Function to call when the remove button is pressed
             row (int): Row number of the row
         """
         self.parent_frame = parent_frame
+        self.chooser = chooser
         self.dropdown_var = tk.StringVar(self.parent_frame)
-        self.dropdown_var.set(selected)
-        self.dropdown = tk.OptionMenu(self.parent_frame, self.dropdown_var, selected, *options)
-        self.dropdown.grid(row=row, column=1, padx=(0, 5), pady=5, sticky="e")
+        self.dropdown = ttk.Combobox(self.parent_frame, textvariable=self.dropdown_var, postcommand=self.fill_options)
         self.amount_label = tk.Label(self.parent_frame, text="Amount:")
-        self.amount_label.grid(row=row, column=2, padx=(5, 0), pady=5, sticky="w")
         self.amount_entry = tk.Entry(self.parent_frame, width=10)
-        self.amount_entry.insert(tk.END, amount)
-        self.amount_entry.grid(row=row, column=3, padx=(0, 5), pady=5, sticky="e")
         self.remove_function = remove_function
         self.remove_button = tk.Button(self.parent_frame, text="Remove", command=self.remove_button_callback)
-        self.remove_button.grid(row=row, column=4, padx=(5, 0), pady=5, sticky="w")
+        self.rebind(selected, amount, row)
+
+    def rebind(self, selected: str, amount: int, row: int):
+        """ Shows the row at the given row number with new values.
+
+        Args:
+            selected (str): Name of the selected option
+            amount (int): Amount of item represented by the row
+            row (int): Row number of the row
+        """
+        self.dropdown_var.set(selected if selected is not None else "")
+        self.amount_entry.delete(0, tk.END)
+        self.amount_entry.insert(tk.END, amount)
+        self.move(row)
+
+    def move(self, row: int):
+        """ Shows the row at the given row number.
+
+        Args:
+            row (int): Row number of the row
+        """
         self.row = row
+        self.dropdown.grid(row=row, column=1, padx=(0, 5), pady=5, sticky="e")
+        self.amount_label.grid(row=row, column=2, padx=(5, 0), pady=5, sticky="w")
+        self.amount_entry.grid(row=row, column=3, padx=(0, 5), pady=5, sticky="e")
+        self.remove_button.grid(row=row, column=4, padx=(5, 0), pady=5, sticky="w")
+
+    def fill_options(self):
+        """ Fills the dropdown with the options matching its text, called when the dropdown is opened.
+        """
+        self.dropdown['values'] = self.chooser.options(self.dropdown_var.get())
 
     def remove_button_callback(self):
         """ Callback function for the remove button.
         """
         self.remove_function(self.row)
 
+    def hide(self):
+        """ Hides the row so that it can be rebound later.
+        """
+        self.dropdown.grid_remove()
+        self.amount_label.grid_remove()
+        self.amount_entry.grid_remove()
+        self.remove_button.grid_remove()
+
     def destroy(self):
         """ Destroys the row.
         """
@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+import tkinter as tk
+from os import path
+from app.data_model import DataModel
+
+
+class FileWorker:
+    """ FileWorker reads and writes data files in a background thread, so the Tk event loop keeps running meanwhile.
+    The thread puts what it has done into a queue that is polled with after(), so every callback runs on the Tk thread.
+    Records are handed over in batches as they are read, and a poll stops handling messages once its time slice is used
+    up, leaving the rest for the next poll."""
+    def __init__(self, widget: tk.Widget, poll_interval: int=50, batch_size: int=1000, time_slice: float=0.02):
+        """ FileWorker reads and writes data files in a background thread, so the Tk event loop keeps running meanwhile.
+
+        Args:
+            widget (tk.Widget): Widget used to schedule the polls
+            poll_interval (int, optional): Milliseconds between polls of the queue. Defaults to 50.
+            batch_size (int, optional): Maximum number of records handed over at once. Defaults to 1000.
+            time_slice (float, optional): Seconds a poll may spend handling messages. Defaults to 0.02.
+        """
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.time_slice = time_slice
+        self.messages: queue.Queue = queue.Queue()
+        self.thread: threading.Thread = None
+        self.cancelled = threading.Event()
+        self.on_records: callable = None
+        self.on_progress: callable = None
+        self.on_done: callable = None
+
+    @property
+    def busy(self) -> bool:
+        """ Returns True while a file is being read or written.
+
+        Returns:
+            bool: True while a file is being read or written
+        """
+        return self.thread is not None
+
+    def load(self, file_path: str, on_records: callable, on_done: callable, on_progress: callable=None):
+        """ Reads the records of a file in the background.
+
+        Args:
+            file_path (str): Path to the file
+            on_records (callable): Called with a section name ('ingredients' or 'recipes') and a list of its next records
+            on_done (callable): Called with the exception that stopped the reading, or None, and whether it was cancelled
+            on_progress (callable, optional): Called with a message describing the progress. Defaults to None.
+
+        Raises:
+            RuntimeError: If a file is already being read or written
+        """
+        self._start(self._read, (file_path,), on_records, on_done, on_progress)
+
+    def save(self, file_path: str, data_model: DataModel, on_done: callable, on_progress: callable=None):
+        """ Writes the data of a data model to a file in the background.
+        The data model and its entries are shared with the thread and must not be changed until it is done; the protected
+        lists replace entries rather than changing them in place, so copies of their original attributes can be given.
+
+        Args:
+            file_path (str): Path to the file
+            data_model (DataModel): The data model, which keeps what it needs to save the same file incrementally next time
+            on_done (callable): Called with the exception that stopped the writing, or None, and whether it was cancelled
+            on_progress (callable, optional): Called with a message describing the progress. Defaults to None.
+
+        Raises:
+            RuntimeError: If a file is already being read or written
+        """
+        self._start(self._write, (file_path, data_model), None, on_done, on_progress)
+
+    def cancel(self):
+        """ Asks the thread to stop reading, on_done() is called once it has stopped. Writing is not interrupted."""
+        if self.busy:
+            self.cancelled.set()
+
+    def _start(self, target: callable, args: tuple, on_records: callable, on_done: callable, on_progress: callable):
+        """ Starts a thread running the target and polls its messages."""
+        if self.busy:
+            raise RuntimeError("A file is already being read or written")
+        self.cancelled.clear()
+        self.on_records = on_records
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.thread = threading.Thread(target=self._run, args=(target, args), daemon=True)
+        self.thread.start()
+        self.widget.after(self.poll_interval, self._poll)
+
+    def _run(self, target: callable, args: tuple):
+        """ Runs in the thread: runs the target and reports how it ended."""
+        try:
+            cancelled = target(*args)
+        except Exception as error:  # Handed to on_done on the Tk thread
+            self.messages.put(('done', error, False))
+        else:
+            self.messages.put(('done', None, cancelled))
+
+    def _read(self, file_path: str) -> bool:
+        """ Runs in the thread: reads the records of a file in batches, returns True if it was cancelled."""
+        name = path.basename(file_path)
+        count = 0
+        section, batch = None, []
+        for record_section, record in DataModel().iter_records(file_path):
+            if self.cancelled.is_set():
+                return True
+            if record_section != section or len(batch) >= self.batch_size:
+                if batch:
+                    count += len(batch)
+                    self.messages.put(('records', section, batch))
+                    self.messages.put(('progress', f"Loading {name}: {count} records"))
+                section, batch = record_section, []
+            batch.append(record)
+        if batch:
+            count += len(batch)
+            self.messages.put(('records', section, batch))
+        self.messages.put(('progress', f"Loaded {count} records from {name}"))
+        return False
+
+    def _write(self, file_path: str, data_model: DataModel) -> bool:
+        """ Runs in the thread: writes the data of a data model, returns False as writing is not cancelled."""
+        self.messages.put(('progress', f"Saving {path.basename(file_path)}"))
+        data_model.save_data(file_path)
+        return False
+
+    def _poll(self):
+        """ Hands the messages of the thread to the callbacks until the time slice is used up, then polls again later."""
+        deadline = time.monotonic() + self.time_slice
+        while time.monotonic() < deadline:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'records':
+                if not self.cancelled.is_set():
+                    self.on_records(message[1], message[2])
+            elif kind == 'progress':
+                if self.on_progress is not None:
+                    self.on_progress(message[1])
+            else:
+                # Records read after cancel() was called were dropped, so a load that finished meanwhile is cancelled too
+                cancelled = message[2] or (self.on_records is not None and self.cancelled.is_set())
+                self.thread.join()
+                self.thread = None
+                on_done = self.on_done
+                self.on_records = self.on_progress = self.on_done = None
+                on_done(message[1], cancelled)
+                return
+        self.widget.after(self.poll_interval, self._poll)
@@ -0,0 +1,73 @@
+from bisect import bisect_left
+from app.protected_list import Change, PList
+
+
+class IngredientChooser:
+    """ IngredientChooser provides the ingredient names offered by the ingredient and product dropdowns of the recipes tab.
+    The names are shared by every dropdown and only filtered when a dropdown is opened."""
+    def __init__(self, ingredients: PList=None, limit: int=200):
+        """ IngredientChooser provides the ingredient names offered by the ingredient and product dropdowns of the recipes tab.
+
+        Args:
+            ingredients (PList, optional): Protected list of ingredient dictionaries. Defaults to None.
+            limit (int, optional): Maximum number of names offered at once. Defaults to 200.
+        """
+        self.ingredients: PList = None
+        self.limit = limit
+        self._names: list[str] = None
+        self._sorted: list[tuple[str, str]] = None
+        self.set_ingredients(ingredients)
+
+    def set_ingredients(self, ingredients: PList):
+        """ Offers the names of the given ingredients and follows their changes.
+
+        Args:
+            ingredients (PList): Protected list of ingredient dictionaries
+        """
+        if self.ingredients is not None:
+            self.ingredients.unsubscribe(self.invalidate)
+        self.ingredients = ingredients
+        if self.ingredients is not None:
+            self.ingredients.subscribe(self.invalidate)
+        self.invalidate()
+
+    def invalidate(self, change: Change or None=None):
+        """ Drops the cached names after the ingredients changed.
+
+        Args:
+            change (Change or None, optional): The change made to the ingredients. Defaults to None.
+        """
+        self._names = None
+        self._sorted = None
+
+    def names(self) -> list[str]:
+        """ Returns the names of all ingredients in list order.
+
+        Returns:
+            list[str]: List of ingredient names
+        """
+        if self._names is None:
+            self._names = [item.get('name') for item in self.ingredients or ()]
+        return self._names
+
+    def options(self, text: str) -> list[str]:
+        """ Returns the names to offer for the given dropdown text.
+        An empty text or the name of an ingredient offers the first names, any other text offers the names starting with it.
+
+        Args:
+            text (str): The text typed into the dropdown
+
+        Returns:
+            list[str]: At most limit ingredient names
+        """
+        if not text or (self.ingredients is not None and text in self.ingredients.key_index('name', complete=True)):
+            return self.names()[:self.limit]
+        if self._sorted is None:
+            self._sorted = sorted((name.lower(), name) for name in self.names() if name is not None)
+        prefix = text.lower()
+        options = []
+        for key, name in self._sorted[bisect_left(self._sorted, (prefix, '')):]:
+            if not key.startswith(prefix) or len(options) >= self.limit:
+                break
+            options.append(name)
+        return options
@@ -2,5 +2,7 @@ from app.tab import Tab
 
 
 class IngredientsTab(Tab):
+    index_keys: tuple[str] = ('id', 'name')
+
     def __init__(self, parent_frame, data_list):
         super().__init__(parent_frame, "Ingredients", data_list)
@@ -0,0 +1,220 @@
+from collections import Counter
+from typing import Any, Sequence
+from app.protected_list import Change, PList
+
+
+class IntegrityChecker:
+    """ IntegrityChecker finds the item ids that recipes refer to in their ingredients, products and substitutions but no
+    ingredient defines.
+    The ids of the ingredients are counted in a multiset and every recipe is checked against it once. The recipes that refer
+    to each id are indexed, so when ingredients are added or removed only the recipes referring to their ids are checked
+    again, and an edited recipe is checked on its own.
+    Recipes and ingredients are told apart by identity, as the changes committed to a protected list hold the replaced
+    records themselves. The given sequences must therefore return the same record every time an index is read, as
+    lists, protected lists, CatalogRecords and ShardedRecords do; a sequence that builds a new record on every access
+    would leave the removed records unmatched.
+    Of a protected list read lazily, see PList, only the recipes read so far are checked, each recipe as it is read.
+    The ingredients are read when the first recipe is checked."""
+    def __init__(self, recipes: Sequence[dict]=(), ingredients: Sequence[dict]=()):
+        """ IntegrityChecker finds the item ids that recipes refer to but no ingredient defines.
+
+        Args:
+            recipes (Sequence[dict], optional): Recipe dictionaries, with a stable identity. Defaults to ().
+            ingredients (Sequence[dict], optional): Ingredient dictionaries, with a stable identity. Defaults to ().
+        """
+        self.ingredient_ids: Counter = Counter()
+        self.recipes: dict[int, dict] = {}
+        self.unresolved: dict[int, list[int]] = {}
+        self._referrers: dict[int, dict[int, None]] = {}
+        self._references: dict[int, tuple[int]] = {}
+        self._ingredients: dict[int, Any] = {}
+        self._unread_ingredients: Sequence[dict] = None
+        self._followed: tuple[PList, PList] = (None, None)
+        self.rebuild(recipes, ingredients)
+
+    def rebuild(self, recipes: Sequence[dict], ingredients: Sequence[dict]=()):
+        """ Checks the given recipes against the given ingredients from scratch.
+
+        Args:
+            recipes (Sequence[dict]): Recipe dictionaries
+            ingredients (Sequence[dict], optional): Ingredient dictionaries. Defaults to ().
+        """
+        self.ingredient_ids.clear()
+        self.recipes.clear()
+        self.unresolved.clear()
+        self._referrers.clear()
+        self._references.clear()
+        self._ingredients.clear()
+        self._unread_ingredients = ingredients
+        for recipe in recipes:
+            self._add_recipe(recipe)
+
+    def follow(self, recipes: PList, ingredients: PList):
+        """ Checks the original attributes of the given protected lists and keeps the result up to date with their commits.
+        The recipes of a lazily read list are checked as they are read.
+
+        Args:
+            recipes (PList): Protected list of recipe dictionaries
+            ingredients (PList): Protected list of ingredient dictionaries
+        """
+        self.unfollow()
+        self._followed = (recipes, ingredients)
+        recipes.subscribe_commits(self.on_recipes_commit)
+        recipes.subscribe_reads(self.on_recipe_read)
+        ingredients.subscribe_commits(self.on_ingredients_commit)
+        self.rebuild(recipes.read_entries(), ingredients.original)
+
+    def unfollow(self):
+        """ Stops following the protected lists given to follow()."""
+        recipes, ingredients = self._followed
+        if recipes is not None:
+            recipes.unsubscribe_commits(self.on_recipes_commit)
+            recipes.unsubscribe_reads(self.on_recipe_read)
+        if ingredients is not None:
+            ingredients.unsubscribe_commits(self.on_ingredients_commit)
+        self._followed = (None, None)
+
+    def on_recipes_commit(self, changes: list[Change] or None):
+        """ Checks the recipes that were committed.
+
+        Args:
+            changes (list[Change] or None): The committed changes, None when all recipes were replaced
+        """
+        if changes is None:
+            self._rebuild_followed()
+            return
+        for change in changes:
+            if change.op in ('set', 'delete') and change.old is not None:
+                self._remove_recipe(change.old)
+            if change.op in ('set', 'insert') and change.new is not None:
+                self._add_recipe(change.new)
+
+    def on_recipe_read(self, recipe: dict):
+        """ Checks a recipe of a lazily read list as it is read.
+
+        Args:
+            recipe (dict): Recipe dictionary
+        """
+        if id(recipe) not in self.recipes:
+            self._add_recipe(recipe)
+
+    def on_ingredients_commit(self, changes: list[Change] or None):
+        """ Checks the recipes referring to the ids of the ingredients that were committed.
+
+        Args:
+            changes (list[Change] or None): The committed changes, None when all ingredients were replaced
+        """
+        if changes is None:
+            self._rebuild_followed()
+            return
+        if self._unread_ingredients is not None:
+            return  # The followed ingredients are read with the commits once a recipe is checked
+        for change in changes:
+            if change.op in ('set', 'delete') and change.old is not None:
+                self._remove_ingredient(change.old)
+            if change.op in ('set', 'insert') and change.new is not None:
+                self._add_ingredient(change.new)
+
+    def problems(self) -> list[tuple[dict, list[int]]]:
+        """ Returns the recipes that refer to ids no ingredient defines.
+
+        Returns:
+            list[tuple[dict, list[int]]]: Pairs of recipe dictionary and the ids it refers to that are not defined, in the order the recipes were checked
+        """
+        return [(self.recipes[key], list(items)) for key, items in self.unresolved.items()]
+
+    def messages(self) -> list[str]:
+        """ Returns a message for each id a recipe refers to that no ingredient defines.
+
+        Returns:
+            list[str]: The messages
+        """
+        return [f"Unknown ingredient: [{item}] used by recipe [{recipe.get('id')}] {recipe.get('name')}"
+                for recipe, items in self.problems() for item in items]
+
+    def _rebuild_followed(self):
+        """ Checks the followed protected lists from scratch."""
+        recipes, ingredients = self._followed
+        self.rebuild(recipes.read_entries() if recipes is not None else (),
+                     ingredients.original if ingredients is not None else ())
+
+    def _add_ingredient(self, ingredient: dict):
+        """ Adds the id of an ingredient dictionary, the recipes referring to a new id are checked again."""
+        item = ingredient.get('id')
+        self._ingredients[id(ingredient)] = item
+        self.ingredient_ids[item] += 1
+        if self.ingredient_ids[item] == 1:
+            self._recheck(item)
+
+    def _remove_ingredient(self, ingredient: dict):
+        """ Removes the id of an ingredient dictionary, the recipes referring to an id that is gone are checked again."""
+        if id(ingredient) not in self._ingredients:
+            return
+        item = self._ingredients.pop(id(ingredient))
+        self.ingredient_ids[item] -= 1
+        if self.ingredient_ids[item] <= 0:
+            del self.ingredient_ids[item]
+            self._recheck(item)
+
+    def _read_ingredients(self):
+        """ Adds the ids of the ingredients given to rebuild(), once a recipe is to be checked against them."""
+        ingredients, self._unread_ingredients = self._unread_ingredients, None
+        for ingredient in ingredients or ():
+            self._add_ingredient(ingredient)
+
+    def _add_recipe(self, recipe: dict):
+        """ Adds a recipe dictionary, indexes the ids it refers to and checks them."""
+        self._read_ingredients()
+        key = id(recipe)
+        references = recipe_references(recipe)
+        self.recipes[key] = recipe
+        self._references[key] = references
+        for item in references:
+            self._referrers.setdefault(item, {})[key] = None
+        self._check(key)
+
+    def _remove_recipe(self, recipe: dict):
+        """ Removes a recipe dictionary and its problems."""
+        key = id(recipe)
+        if key not in self.recipes:
+            return
+        del self.recipes[key]
+        self.unresolved.pop(key, None)
+        for item in self._references.pop(key):
+            referrers = self._referrers[item]
+            del referrers[key]
+            if not referrers:
+                del self._referrers[item]
+
+    def _recheck(self, item: int):
+        """ Checks the recipes that refer to an item again."""
+        for key in self._referrers.get(item, ()):
+            self._check(key)
+
+    def _check(self, key: int):
+        """ Checks the ids a recipe refers to against the ids of the ingredients."""
+        ingredient_ids = self.ingredient_ids
+        missing = [item for item in self._references[key] if item not in ingredient_ids]
+        if missing:
+            self.unresolved[key] = missing
+        else:
+            self.unresolved.pop(key, None)
+
+
+def recipe_references(recipe: dict) -> tuple[int]:
+    """ Returns the distinct item ids of the ingredients, products and substitutions of a recipe, in the order they appear.
+
+    Args:
+        recipe (dict): Recipe dictionary
+
+    Returns:
+        tuple[int]: The item ids
+    """
+    items = {}
+    for key in ('ingredients', 'products'):
+        for line in recipe.get(key) or ():
+            items[line.get('id')] = None
+    for substitution in recipe.get('substitutions') or ():
+        for key in ('original', 'substitute'):
+            items[(substitution.get(key) or {}).get('id')] = None
+    return tuple(items)
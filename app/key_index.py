@@ -0,0 +1,118 @@
+class KeyIndex:
+    """ KeyIndex is a multimap from the value of one key of the entries in a list to the entries holding that value.
+    It is kept up to date one change at a time, so looking up entries or duplicates never scans the list."""
+    def __init__(self, key: str, entries: iter=()):
+        """ KeyIndex is a multimap from the value of one key of the entries in a list to the entries holding that value.
+
+        Args:
+            key (str): The key of the entries to index, e.g. 'id'
+            entries (iter, optional): The entries to index. Defaults to ().
+        """
+        self.key = key
+        self._buckets: dict[any, list[dict]] = {}
+        self._duplicates: set = set()
+        self.rebuild(entries)
+
+    def __contains__(self, value: any) -> bool:
+        """ Returns True if an entry holds the given value.
+
+        Args:
+            value (any): The value to look for
+
+        Returns:
+            bool: True if an entry holds the given value
+        """
+        return value in self._buckets
+
+    def __len__(self) -> int:
+        """ Returns the number of distinct values.
+
+        Returns:
+            int: Number of distinct values
+        """
+        return len(self._buckets)
+
+    def get(self, value: any) -> list[dict]:
+        """ Returns the entries holding the given value.
+
+        Args:
+            value (any): The value to look for
+
+        Returns:
+            list[dict]: The entries holding the given value, in the order they were indexed
+        """
+        return list(self._buckets.get(value, ()))
+
+    def first(self, value: any, default: any=None) -> dict or None:
+        """ Returns the first entry holding the given value.
+
+        Args:
+            value (any): The value to look for
+            default (any, optional): Returned when no entry holds the value. Defaults to None.
+
+        Returns:
+            dict or None: The first entry holding the given value
+        """
+        bucket = self._buckets.get(value)
+        return bucket[0] if bucket else default
+
+    def duplicates(self) -> dict[any, list[dict]]:
+        """ Returns the values held by more than one entry.
+
+        Returns:
+            dict[any, list[dict]]: The entries of every value held by more than one entry
+        """
+        return {value: list(self._buckets[value]) for value in self._duplicates}
+
+    def add(self, entry: dict):
+        """ Adds an entry to the index.
+
+        Args:
+            entry (dict): The entry to add
+        """
+        value = entry.get(self.key)
+        bucket = self._buckets.setdefault(value, [])
+        bucket.append(entry)
+        if len(bucket) > 1:
+            self._duplicates.add(value)
+
+    def discard(self, entry: dict):
+        """ Removes an entry from the index if it is there.
+
+        Args:
+            entry (dict): The entry to remove
+        """
+        value = entry.get(self.key)
+        bucket = self._buckets.get(value)
+        if not bucket:
+            return
+        for position, indexed in enumerate(bucket):
+            if indexed is entry:
+                del bucket[position]
+                break
+        if not bucket:
+            del self._buckets[value]
+        if len(bucket) < 2:
+            self._duplicates.discard(value)
+
+    def apply(self, change: tuple):
+        """ Updates the index for a change made to the indexed list.
+
+        Args:
+            change (Change): The change made to the list
+        """
+        if change.old is not None and change.op in ('set', 'delete'):
+            self.discard(change.old)
+        if change.new is not None and change.op in ('set', 'insert'):
+            self.add(change.new)
+
+    def rebuild(self, entries: iter):
+        """ Replaces the contents of the index with the given entries.
+
+        Args:
+            entries (iter): The entries to index
+        """
+        self._buckets.clear()
+        self._duplicates.clear()
+        for entry in entries:
+            self.add(entry)
@@ -0,0 +1,160 @@
+from array import array
+from collections.abc import MutableSequence, Sequence
+from typing import Iterator
+
+
+class LazyList(MutableSequence):
+    """ LazyList is a mutable list over a read only sequence, e.g. the records of a catalog, that reads an entry of the
+    sequence only when it is accessed.
+    The list keeps the position in the source of every entry that was not replaced, in an array of integers, and the
+    entries that were set or inserted. Changes, copies and reversing never read the source; reading an entry reads the
+    source every time, so the source must return the same record for an index every time, as CatalogRecords and
+    ShardedRecords do.
+    A list can follow its reads: on_read is called with every entry of the source the first time it is read. The copies
+    made with follow_reads=True share what was read, so an entry read through any of them is reported once."""
+    def __init__(self, source: Sequence, on_read: callable=None):
+        """ LazyList is a mutable list over a read only sequence that reads an entry of the sequence only when it is accessed.
+
+        Args:
+            source (Sequence): The sequence to read the entries from
+            on_read (callable, optional): Called with every entry of the source the first time it is read. Defaults to None.
+        """
+        self.source = source
+        self._positions = array('q', range(len(source)))
+        self._items: list = [None] * len(source)
+        self._seen: bytearray = None
+        self.on_read: callable = None
+        if on_read is not None:
+            self.follow_reads(on_read)
+
+    def follow_reads(self, on_read: callable):
+        """ Calls on_read with every entry of the source the first time it is read from now on, the entries read before
+        are forgotten.
+
+        Args:
+            on_read (callable): Called with the entry
+        """
+        self._seen = bytearray(len(self.source))
+        self.on_read = on_read
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index: int or slice) -> any or list:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self._items)))]
+        position = self._positions[index]
+        if position < 0:
+            return self._items[index]
+        return self._read(position)
+
+    def __setitem__(self, index: int or slice, value: any):
+        if not isinstance(index, slice):
+            self._positions[index] = -1
+            self._items[index] = value
+            return
+        if index == slice(None) and isinstance(value, LazyList) and value.source is self.source:
+            self._positions = array('q', value._positions)
+            self._items = list(value._items)
+            return
+        values = list(value)
+        start, stop, step = index.indices(len(self._items))
+        if step != 1:
+            indices = range(start, stop, step)
+            if len(values) != len(indices):
+                raise ValueError(f"attempt to assign sequence of size {len(values)} to extended slice of size {len(indices)}")
+            for position, item in zip(indices, values):
+                self[position] = item
+            return
+        stop = max(start, stop)
+        self._positions[start:stop] = array('q', [-1]) * len(values)
+        self._items[start:stop] = values
+
+    def __delitem__(self, index: int or slice):
+        del self._positions[index]
+        del self._items[index]
+
+    def __iter__(self) -> Iterator:
+        for index in range(len(self._items)):
+            yield self[index]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"LazyList({len(self._items)} entries of {self.source!r})"
+
+    def insert(self, index: int, value: any):
+        self._positions.insert(index, -1)
+        self._items.insert(index, value)
+
+    def reverse(self):
+        self._positions.reverse()
+        self._items.reverse()
+
+    def copy(self, follow_reads: bool=False) -> "LazyList":
+        """ Returns a shallow copy of the list over the same source, no entry is read.
+
+        Args:
+            follow_reads (bool, optional): True to share what was read and on_read with this list. Defaults to False.
+
+        Returns:
+            LazyList: The copy
+        """
+        copied = LazyList.__new__(LazyList)
+        copied.source = self.source
+        copied._positions = array('q', self._positions)
+        copied._items = list(self._items)
+        copied._seen = self._seen if follow_reads else None
+        copied.on_read = self.on_read if follow_reads else None
+        return copied
+
+    def read_all(self):
+        """ Reads the entries that were not read yet, on_read is called for each of them."""
+        if self._seen is None:
+            return
+        seen = self._seen
+        for position in self._positions:
+            if position >= 0 and not seen[position]:
+                self._read(position)
+
+    def read_items(self) -> list:
+        """ Returns the entries that were set or inserted and, when the list follows its reads, the entries of the source
+        that were read, in list order. No entry is read.
+
+        Returns:
+            list: The entries
+        """
+        seen = self._seen
+        return [item if position < 0 else self.source[position]
+                for position, item in zip(self._positions, self._items)
+                if position < 0 or (seen is not None and seen[position])]
+
+    def source_run(self, start: int, stop: int) -> int or None:
+        """ Returns the position in the source of the entry at start if the entries from start to stop are consecutive
+        entries of the source, None otherwise. No entry is read.
+
+        Args:
+            start (int): Index of the first entry
+            stop (int): Index after the last entry
+
+        Returns:
+            int or None: Position in the source of the first entry
+        """
+        if not 0 <= start < stop <= len(self._items):
+            return None
+        first = self._positions[start]
+        if first < 0 or self._positions[start:stop] != array('q', range(first, first + stop - start)):
+            return None
+        return first
+
+    def _read(self, position: int) -> any:
+        """ Reads an entry of the source and reports it to on_read if it was not read before."""
+        item = self.source[position]
+        seen = self._seen
+        if seen is not None and not seen[position]:
+            seen[position] = 1
+            self.on_read(item)
+        return item
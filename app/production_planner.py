@@ -0,0 +1,215 @@
+from fractions import Fraction
+from typing import NamedTuple
+from app.crafting_graph import CraftingGraph, Substitution
+
+
+class Plan(NamedTuple):
+    """The cheapest way found to produce an amount of an item.
+
+    Args:
+        cost (int or Fraction or float): Total cost of the plan by the objective of the planner.
+        crafts (dict[int, int or Fraction]): Number of crafts of each recipe node.
+        raw (dict[int, int or Fraction]): Amount of each item that is not crafted.
+        duration (int or Fraction): Total duration of the crafts.
+        substitutions (dict[int, list[Substitution]]): The substitutions used by each recipe node.
+    """
+    cost: any
+    crafts: dict
+    raw: dict
+    duration: any
+    substitutions: dict
+
+
+class ProductionPlanner:
+    """ ProductionPlanner finds the cheapest plan to produce an item, choosing among the recipes that produce each item and
+    the substitutions of each recipe.
+
+    The cost of one unit of every item is computed once per graph version by dynamic programming over the topological order
+    of the crafting graph: an item costs the cheapest of its recipes, and a recipe costs the sum of its ingredients, each taken
+    as the original or as the cheapest substitution. Choices are independent per ingredient, so the work grows with the
+    number of substitutions rather than with their combinations.
+
+    With the 'raw' objective an item is crafted with the recipes that have ingredients and costs its price otherwise, like a
+    base resource of BillOfMaterials. With the 'duration' objective every recipe adds its duration, including recipes
+    without ingredients, and items no recipe produces cost nothing. An ingredient in the same strongly connected component
+    as the item it is used for is not crafted, which cuts crafting cycles."""
+    def __init__(self, graph: CraftingGraph, objective: str='raw', prices: dict[int, int or float]=None):
+        """ ProductionPlanner finds the cheapest plan to produce an item.
+
+        Args:
+            graph (CraftingGraph): The crafting graph
+            objective (str, optional): 'raw' to minimize the cost of the base resources, 'duration' to minimize the total duration. Defaults to 'raw'.
+            prices (dict[int, int or float], optional): Price of a unit of each base resource for the 'raw' objective, 1 for missing items. Defaults to None.
+
+        Raises:
+            ValueError: If the objective is unknown
+        """
+        if objective not in ('raw', 'duration'):
+            raise ValueError(f"Unknown objective: {objective}")
+        self.graph = graph
+        self.objective = objective
+        self.prices = prices or {}
+        self._costs: dict[int, any] = {}
+        self._choices: dict[int, tuple[int, list[Substitution]] or None] = {}
+        self._version = None
+
+    def unit_cost(self, item: int) -> int or Fraction or float:
+        """ Returns the cost of one unit of the given item.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            int or Fraction or float: The cost
+        """
+        self._solve()
+        if item not in self._costs:
+            return self._base_cost(item)
+        return self._costs[item]
+
+    def choice(self, item: int) -> tuple[int, list[Substitution]] or None:
+        """ Returns the recipe and the substitutions chosen to craft the given item.
+
+        Args:
+            item (int): Id of the item
+
+        Returns:
+            tuple[int, list[Substitution]] or None: Recipe node and substitutions, None if the item is not crafted
+        """
+        self._solve()
+        return self._choices.get(item)
+
+    def plan(self, item: int, amount: int or Fraction=1) -> Plan:
+        """ Returns the cheapest plan to produce the given amount of an item.
+        Crafts are fractional when a recipe yields several units.
+
+        Args:
+            item (int): Id of the item
+            amount (int or Fraction, optional): Amount of the item. Defaults to 1.
+
+        Returns:
+            Plan: The plan
+        """
+        self._solve()
+        graph = self.graph
+        needed = {item: amount}
+        crafts: dict[int, any] = {}
+        raw: dict[int, any] = {}
+        used: dict[int, list[Substitution]] = {}
+        duration = 0
+        # Every consumer of an item comes later in the topological order, so its need is complete when it is reached
+        pending = sorted(self._reachable(item), key=self._position, reverse=True)
+        for current in pending:
+            need = needed.pop(current, 0)
+            choice = self._choices.get(current)
+            if not need:
+                continue
+            if choice is None:
+                raw[current] = raw.get(current, 0) + need
+                continue
+            node, substitutions = choice
+            count = _divide(need, graph.outputs[node][current])
+            crafts[node] = crafts.get(node, 0) + count
+            duration += count * self._duration(node)
+            if substitutions:
+                used[node] = substitutions
+            component = graph.component(current)
+            for ingredient, quantity in graph.substituted_inputs(node, substitutions).items():
+                target = raw if graph.component(ingredient) == component else needed
+                target[ingredient] = target.get(ingredient, 0) + quantity * count
+        return Plan(self.unit_cost(item) * amount, crafts, raw, duration, used)
+
+    def _solve(self):
+        """ Computes the cost and choice of every item if the graph changed since they were computed."""
+        graph = self.graph
+        if self._version == graph.version:
+            return
+        self._costs.clear()
+        self._choices.clear()
+        costs = self._costs
+        for component in graph.components():
+            position = graph.component(component[0])
+            for item in component:
+                best = None
+                for node in graph.recipes_producing(item):
+                    if not self._usable(node, item):
+                        continue
+                    total, substitutions = self._recipe_cost(node, position)
+                    total = _divide(total, graph.outputs[node][item])
+                    if best is None or total < best[0]:
+                        best = (total, node, substitutions)
+                if best is None:
+                    costs[item] = self._base_cost(item)
+                else:
+                    costs[item] = best[0]
+                    self._choices[item] = (best[1], best[2])
+        self._version = graph.version
+
+    def _usable(self, node: int, item: int) -> bool:
+        """ Returns True if the recipe can be chosen to craft the item."""
+        if self.graph.outputs[node][item] <= 0:
+            return False
+        return self.objective == 'duration' or bool(self.graph.inputs[node])
+
+    def _recipe_cost(self, node: int, position: int) -> tuple[any, list[Substitution]]:
+        """ Returns the cost of one craft of a recipe used for an item of the component at the given position and the
+        substitutions that make it cheapest."""
+        graph = self.graph
+        total = self._duration(node) if self.objective == 'duration' else 0
+        chosen = []
+        for ingredient, amount in graph.inputs[node].items():
+            best = amount * self._ingredient_cost(ingredient, position)
+            best_substitution = None
+            for substitution in graph.substitutions[node]:
+                if substitution.original != ingredient or substitution.original_amount > amount:
+                    continue
+                cost = ((amount - substitution.original_amount) * self._ingredient_cost(ingredient, position)
+                        + substitution.substitute_amount * self._ingredient_cost(substitution.substitute, position))
+                if cost < best:
+                    best, best_substitution = cost, substitution
+            total += best
+            if best_substitution is not None:
+                chosen.append(best_substitution)
+        return total, chosen
+
+    def _ingredient_cost(self, ingredient: int, position: int) -> any:
+        """ Returns the cost of a unit of an ingredient used for an item of the component at the given position."""
+        if self.graph.component(ingredient) == position:
+            return self._base_cost(ingredient)
+        return self._costs[ingredient]
+
+    def _base_cost(self, item: int) -> any:
+        """ Returns the cost of a unit of an item that is not crafted."""
+        return self.prices.get(item, 1) if self.objective == 'raw' else 0
+
+    def _duration(self, node: int) -> int:
+        """ Returns the duration of one craft of a recipe."""
+        duration = self.graph.recipes[node].get('duration')
+        return duration if isinstance(duration, (int, float)) and duration > 0 else 0
+
+    def _reachable(self, item: int) -> set[int]:
+        """ Returns the items the plan for an item may need, following the chosen recipes and substitutions."""
+        reachable = {item}
+        stack = [item]
+        while stack:
+            choice = self._choices.get(stack.pop())
+            if choice is None:
+                continue
+            for ingredient in self.graph.substituted_inputs(*choice):
+                if ingredient not in reachable:
+                    reachable.add(ingredient)
+                    stack.append(ingredient)
+        return reachable
+
+    def _position(self, item: int) -> int:
+        """ Returns the position of the component of an item in the topological order, -1 for items not in the graph."""
+        return self.graph.component(item) if item in self.graph else -1
+
+
+def _divide(amount: any, produced: int) -> any:
+    """ Divides an amount by the yield of a recipe, exactly when both are integers."""
+    if produced == 1:
+        return amount
+    if isinstance(amount, float):
+        return amount / produced
+    return Fraction(amount, produced) if isinstance(amount, int) else amount / produced
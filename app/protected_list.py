@@ -1,22 +1,231 @@
 import copy
-from typing import Generic, TypeVar
+import sys
+from collections import deque
+from collections.abc import Mapping, Sequence
+from typing import Generic, NamedTuple, TypeVar
+from app.key_index import KeyIndex
+from app.lazy_list import LazyList
+
+
+class Change(NamedTuple):
+    """A single change made to the current attribute of a PList.
+
+    Args:
+        op (str): The kind of change, one of 'set', 'insert', 'delete', 'reverse' or 'reorder'.
+        index (int): The index the change applies to, None for 'reverse' and 'reorder'.
+        old (any): The item before the change, None for 'insert', 'reverse' and 'reorder'.
+        new (any): The item after the change, None for 'delete' and 'reverse'. For 'reorder' the list of previous indices in their new order.
+    """
+    op: str
+    index: int
+    old: any
+    new: any
+
+
+def apply_change(items: list, change: Change):
+    """Applies the given change to the given list in place.
+
+    Args:
+        items (list): The list to change.
+        change (Change): The change to apply.
+    """
+    if change.op == 'set':
+        items[change.index] = change.new
+    elif change.op == 'insert':
+        items.insert(change.index, change.new)
+    elif change.op == 'delete':
+        del items[change.index]
+    elif change.op == 'reverse':
+        items.reverse()
+    elif change.op == 'reorder':
+        items[:] = [items[index] for index in change.new]
+    else:
+        raise ValueError(f"Unknown change: {change.op}")
+
+
+def invert_change(change: Change) -> Change:
+    """Returns the change that undoes the given change.
+
+    Args:
+        change (Change): The change to invert.
+
+    Returns:
+        Change: The inverse of the given change.
+    """
+    if change.op == 'set':
+        return Change('set', change.index, change.new, change.old)
+    if change.op == 'insert':
+        return Change('delete', change.index, change.new, None)
+    if change.op == 'delete':
+        return Change('insert', change.index, None, change.old)
+    if change.op == 'reorder':
+        order = [0] * len(change.new)
+        for position, index in enumerate(change.new):
+            order[index] = position
+        return Change('reorder', None, None, order)
+    return change
+
+
+def change_size(change: Change) -> int:
+    """Returns the approximate number of bytes the given change keeps alive in the undo history.
+    The change itself, its items and the values of items that are mappings are counted, deeper objects and objects shared
+    with the lists are not told apart.
+
+    Args:
+        change (Change): The change to measure.
+
+    Returns:
+        int: Approximate size of the change in bytes.
+    """
+    size = sys.getsizeof(change)
+    for item in (change.old, change.new):
+        if item is None:
+            continue
+        size += sys.getsizeof(item)
+        if isinstance(item, Mapping):
+            size += sum(sys.getsizeof(value) for value in item.values())
+        elif isinstance(item, list):
+            size += sum(sys.getsizeof(value) for value in item)
+    return size
+
+
+class ListView(Sequence):
+    """A read-only view of a list, it follows the changes of the list without copying it.
+
+    Args:
+        Sequence: See https://docs.python.org/3/library/collections.abc.html#collections.abc.Sequence
+    """
+    __slots__ = ('_items',)
+
+    def __init__(self, items: list):
+        """A read-only view of a list, it follows the changes of the list without copying it.
+
+        Args:
+            items (list): The list to view.
+        """
+        self._items = items
+
+    def __getitem__(self, index: int or slice) -> any:
+        """Returns the item at the given index of the list, or a new list for a slice.
+
+        Args:
+            index (int or slice): The index or slice to get.
+
+        Returns:
+            any: The item at the given index, or a list of the items in the slice.
+        """
+        return self._items[index]
+
+    def __len__(self) -> int:
+        """Returns the length of the list.
+
+        Returns:
+            int: Length of the list.
+        """
+        return len(self._items)
+
+    def __iter__(self) -> iter:
+        """Returns an iterator of the list.
+
+        Returns:
+            iter: Iterator of the list.
+        """
+        return iter(self._items)
+
+    def __reversed__(self) -> iter:
+        """Returns a reversed iterator of the list.
+
+        Returns:
+            iter: Reversed iterator of the list.
+        """
+        return reversed(self._items)
+
+    def __contains__(self, item: any) -> bool:
+        """Returns True if the list contains the given item.
+
+        Args:
+            item (any): The item to search for.
+
+        Returns:
+            bool: True if the list contains the given item.
+        """
+        return item in self._items
+
+    def __eq__(self, other) -> bool:
+        """Returns True if the list is equal to the given list or view.
+
+        Args:
+            other (_type_): The list or view to compare to.
+
+        Returns:
+            bool: True if the list is equal to the given list or view.
+        """
+        if isinstance(other, ListView):
+            other = other._items
+        return self._items == other
+
+    def __repr__(self) -> str:
+        """Returns a string representation of the list.
+
+        Returns:
+            str: String representation of the list.
+        """
+        return repr(self._items)
+
+    def copy(self) -> list or LazyList:
+        """Returns a shallow copy of the list, a snapshot that no longer follows its changes.
+        The copy of a LazyList is a LazyList over the same source, so no entry is read.
+
+        Returns:
+            list or LazyList: Shallow copy of the list.
+        """
+        return self._items.copy()
+
 
 class PList(Generic[TypeVar('T')]):
     """A protected list class that allows for the original list to be updated to match the current list.
 
+    The current attribute is copy-on-write: it shares its entries with the original attribute and an entry is only
+    copied when it is changed through edit(). Entries returned by indexing or iteration are shared with the
+    original attribute and must be replaced through item assignment or edit() rather than mutated in place.
+    The original and current properties are read-only views rather than copies, call copy() on them for a snapshot.
+
+    The undo history is bounded by memory rather than by a number of changes: the approximate size of every change is
+    measured with change_size() and the oldest changes are dropped once the history holds more than undo_budget bytes.
+    The most recent change is always kept, however large it is.
+
+    A sequence that is not a list, e.g. the records of a catalog, is held in a LazyList and its entries are only read when
+    they are accessed. The indexes then cover the entries read so far: every entry is added as it is first read, and
+    key_index() reads the rest when a complete index is asked for. subscribe_reads() follows these reads.
+
     Args:
         Generic (TypeVar('T')): See https://docs.python.org/3/library/typing.html#typing.Generic
     """
-    def __init__(self, initial_list: list=None):
+    def __init__(self, initial_list: Sequence=None, undo_budget: int=32 * 1024 * 1024, index_keys: tuple[str]=()):
         """A protected list class that allows for the original list to be updated to match the current list.
 
         Args:
-            initial_list (list, optional): The initial list to set the original and current attributes to. Defaults to None.
+            initial_list (Sequence, optional): The initial list to set the original and current attributes to, another
+                sequence is read lazily. Defaults to None.
+            undo_budget (int, optional): The approximate number of bytes the changes kept for undo() may hold, the oldest are dropped first. Defaults to 32 MiB.
+            index_keys (tuple[str], optional): Keys of the items to keep a KeyIndex of for the current attribute. Defaults to ().
         """
         if initial_list is None:
             initial_list: list = []
-        self._original: list = initial_list
-        self._current: list = copy.deepcopy(self._original)
+        self._read_listeners: list[callable] = []
+        self._original: list or LazyList = initial_list if isinstance(initial_list, list) else self._lazy(initial_list)
+        self._current: list or LazyList = self._copy_original()
+        self._changes: list[Change] = []
+        self._undo: deque[Change] = deque()
+        self._undo_sizes: deque[int] = deque()
+        self._undo_size: int = 0
+        self._undo_budget: int = undo_budget
+        self._redo: list[Change] = []
+        self._uncommitted: int = 0
+        self._undone: list[Change] = []
+        self._indexes: dict[str, KeyIndex] = {key: KeyIndex(key, self._read_current()) for key in index_keys}
+        self._listeners: list[callable] = []
+        self._commit_listeners: list[callable] = []
 
     def __getitem__(self, index: int) -> any:
         """Returns the item at the given index in the current attribute.
@@ -36,7 +245,22 @@ class PList(Generic[TypeVar('T')]):
             index (int): The index to set the item at.
             value (any): The value to set the item to.
         """
-        self._current[index] = value
+        if not isinstance(index, slice):
+            index = self._normalize(index)
+            self._apply(Change('set', index, self._current[index], value))
+            return
+        values = list(value)
+        indices = range(*index.indices(len(self._current)))
+        if index.step not in (None, 1):
+            if len(values) != len(indices):
+                raise ValueError(f"attempt to assign sequence of size {len(values)} to extended slice of size {len(indices)}")
+            for position, item in zip(indices, values):
+                self._apply(Change('set', position, self._current[position], item))
+            return
+        for position in reversed(indices):
+            self._apply(Change('delete', position, self._current[position], None))
+        for offset, item in enumerate(values):
+            self._apply(Change('insert', indices.start + offset, None, item))
 
     def __len__(self) -> int:
         """Returns the length of the current attribute.
@@ -90,7 +314,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             list: The current attribute plus the given iterable.
         """
-        return self._current + other
+        return list(self._current) + other
     
     def __radd__(self, other: iter) -> list:
         """Adds the current attribute to the given iterable.
@@ -101,7 +325,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             list: The current attribute plus the given iterable.
         """
-        return other + self._current
+        return other + list(self._current)
     
     def __iadd__(self, other: iter) -> list:
         """Adds the given iterable to the current attribute.
@@ -112,8 +336,8 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             list: The current attribute plus the given iterable.
         """
-        self._current += other
-        return self._current
+        self.extend(other)
+        return self
     
     def __mul__(self, other: iter) -> list:
         """Multiplies the current attribute by the given iterable.
@@ -124,7 +348,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             list: The current attribute multiplied by the given iterable.
         """
-        return self._current * other
+        return list(self._current) * other
     
     def __rmul__(self, other: iter) -> list:
         """Multiplies the given iterable by the current attribute.
@@ -135,7 +359,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             list: The current attribute multiplied by the given iterable.
         """
-        return other * self._current
+        return other * list(self._current)
     
     def __imul__(self, other: iter) -> list:
         """Multiplies the current attribute by the given iterable.
@@ -146,8 +370,11 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             list: The current attribute multiplied by the given iterable.
         """
-        self._current *= other
-        return self._current
+        if other <= 0:
+            self.clear()
+        else:
+            self.extend(list(self._current) * (other - 1))
+        return self
     
     def __delitem__(self, index: int):
         """Deletes the item at the given index from the current attribute.
@@ -155,7 +382,12 @@ class PList(Generic[TypeVar('T')]):
         Args:
             index (int): The index to delete the item from.
         """
-        self._current.__delitem__(index)
+        if isinstance(index, slice):
+            indices = sorted(range(*index.indices(len(self._current))), reverse=True)
+        else:
+            indices = [self._normalize(index)]
+        for position in indices:
+            self._apply(Change('delete', position, self._current[position], None))
 
     def __reversed__(self) -> iter:
         """Returns a reversed iterator of the current attribute.
@@ -196,7 +428,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             bool: True if the current attribute is less than the given attribute.
         """
-        return self._current < other
+        return list(self._current) < other
     
     def __le__(self, other) -> bool:
         """Returns True if the current attribute is less than or equal to the given attribute.
@@ -204,7 +436,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             bool: True if the current attribute is less than or equal to the given attribute.
         """
-        return self._current <= other
+        return list(self._current) <= other
     
     def __gt__(self, other) -> bool:
         """Returns True if the current attribute is greater than the given attribute.
@@ -215,7 +447,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             bool: True if the current attribute is greater than the given attribute.
         """
-        return self._current > other
+        return list(self._current) > other
     
     def __ge__(self, other) -> bool:
         """Returns True if the current attribute is greater than or equal to the given attribute.
@@ -226,7 +458,7 @@ class PList(Generic[TypeVar('T')]):
         Returns:
             bool: True if the current attribute is greater than or equal to the given attribute.
         """
-        return self._current >= other
+        return list(self._current) >= other
     
     def append(self, value):
         """Appends the given value to the current attribute.
@@ -234,7 +466,7 @@ class PList(Generic[TypeVar('T')]):
         Args:
             value (_type_): The value to append.
         """
-        self._current.append(value)
+        self._apply(Change('insert', len(self._current), None, value))
 
     def extend(self, iterable: iter):
         """Extends the current attribute with the given iterable.
@@ -242,15 +474,22 @@ class PList(Generic[TypeVar('T')]):
         Args:
             iterable (iter): The iterable to extend the current attribute with.
         """
-        self._current.extend(iterable)
+        for value in list(iterable):
+            self.append(value)
 
     def pop(self, index=-1):
         """Removes and returns the item at the given index from the current attribute.
 
         Args:
             index (int, optional): The index to remove the item from. Defaults to -1.
+
+        Returns:
+            _type_: The removed item.
         """
-        self._current.pop(index)
+        index = self._normalize(index)
+        value = self._current[index]
+        self._apply(Change('delete', index, value, None))
+        return value
 
     def remove(self, value):
         """Removes the first occurrence of the given value from the current attribute.
@@ -258,7 +497,7 @@ class PList(Generic[TypeVar('T')]):
         Args:
             value (_type_): The value to remove.
         """
-        self._current.remove(value)
+        del self[self._current.index(value)]
 
     def insert(self, index: int, value):
         """Inserts the given value at the given index in the current attribute.
@@ -267,12 +506,15 @@ class PList(Generic[TypeVar('T')]):
             index (int): The index to insert the value at.
             value (_type_): The value to insert.
         """
-        self._current.insert(index, value)
+        length = len(self._current)
+        if index < 0:
+            index = max(0, length + index)
+        self._apply(Change('insert', min(index, length), None, value))
 
     def clear(self):
         """Clears the current attribute.
         """
-        self._current.clear()
+        del self[:]
 
     def copy(self) -> list:
         """Returns a shallow copy of the current attribute.
@@ -309,7 +551,7 @@ class PList(Generic[TypeVar('T')]):
     def reverse(self):
         """Reverses the current attribute in place.
         """
-        self._current.reverse()
+        self._apply(Change('reverse', None, None, None))
 
     def sort(self, key=None, reverse=False):
         """Sorts the current attribute in place.
@@ -318,75 +560,386 @@ class PList(Generic[TypeVar('T')]):
             key (_type_, optional): If specified, the key function is called on each list item before comparison. Defaults to None.
             reverse (bool, optional): If True, the list is sorted in reverse order. Defaults to False.
         """
-        self._current.sort(key, reverse)
+        items = self._current
+        if key is None:
+            order = sorted(range(len(items)), key=items.__getitem__, reverse=reverse)
+        else:
+            order = sorted(range(len(items)), key=lambda position: key(items[position]), reverse=reverse)
+        self._apply(Change('reorder', None, None, order))
+
+    def edit(self, index: int, changes: dict=None) -> any:
+        """Returns a copy of the item at the given index in the current attribute, with the given changes made to it.
+        The copy replaces the item as one change, so undo() reverts all the given changes at once, and they never reach the
+        original attribute before update() is called. The indexes and the subscribed callbacks see the changed copy; changes
+        made to it in place afterwards are not seen by them, so fields used by the indexes must be given in changes.
+
+        Args:
+            index (int): The index of the item to edit.
+            changes (dict, optional): The values to set by key or attribute index. Defaults to None.
+
+        Returns:
+            any: A private copy of the item at the given index in the current attribute.
+        """
+        index = self._normalize(index)
+        item = self._current[index]
+        copied = copy.deepcopy(item)
+        for key, value in (changes or {}).items():
+            copied[key] = value
+        self._apply(Change('set', index, item, copied))
+        return copied
+
+    def changes(self) -> list[Change]:
+        """Returns the changes made to the current attribute since the last update or reset, oldest first.
+
+        Returns:
+            list[Change]: The pending changes. Replaying them on the original attribute with apply_change() gives the current attribute.
+        """
+        return list(self._changes)
+
+    def key_index(self, key: str, complete: bool=False) -> KeyIndex:
+        """Returns the index of the current attribute by the given key.
+        Of a lazily read list only the entries read so far are indexed, unless a complete index is asked for.
+
+        Args:
+            key (str): One of the index_keys the PList was created with.
+            complete (bool, optional): If True, the entries not read yet are read first. Defaults to False.
+
+        Returns:
+            KeyIndex: The index of the current attribute by the given key.
+        """
+        if complete and isinstance(self._current, LazyList):
+            self._current.read_all()
+        return self._indexes[key]
+
+    def read_entries(self) -> Sequence:
+        """Returns the entries of the original attribute that were read so far, all of them unless it is read lazily.
+
+        Returns:
+            Sequence: The entries, in order.
+        """
+        if isinstance(self._original, LazyList):
+            return self._original.read_items()
+        return self.original
+
+    def subscribe_reads(self, callback: callable):
+        """Calls the given callback with every entry of a lazily read list the first time it is read.
+        The entry is in the original attribute when it is read, changes only replace entries that were read.
+
+        Args:
+            callback (callable): The function to call.
+        """
+        self._read_listeners.append(callback)
+
+    def unsubscribe_reads(self, callback: callable):
+        """Stops calling the given callback when entries are read.
+
+        Args:
+            callback (callable): The function to stop calling.
+        """
+        self._read_listeners.remove(callback)
+
+    def subscribe(self, callback: callable):
+        """Calls the given callback after every change to the current attribute.
+        The callback receives the Change, or None when the whole current attribute was replaced.
+
+        Args:
+            callback (callable): The function to call.
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: callable):
+        """Stops calling the given callback after changes to the current attribute.
+
+        Args:
+            callback (callable): The function to stop calling.
+        """
+        self._listeners.remove(callback)
+
+    def subscribe_commits(self, callback: callable):
+        """Calls the given callback after every change to the original attribute.
+        The callback receives the list of committed changes, oldest first, or None when the whole original attribute was replaced.
+
+        Args:
+            callback (callable): The function to call.
+        """
+        self._commit_listeners.append(callback)
+
+    def unsubscribe_commits(self, callback: callable):
+        """Stops calling the given callback after changes to the original attribute.
+
+        Args:
+            callback (callable): The function to stop calling.
+        """
+        self._commit_listeners.remove(callback)
 
     def reset(self):
         """Resets the current attribute to match the original attribute.
+        Only the pending changes are undone, so the cost depends on the number of changes rather than the length of the list.
+        The undo history is restored to what it was at the last update and the redo history is cleared.
+        """
+        if len(self._changes) > len(self._original):
+            self._current = self._copy_original()
+            for index in self._indexes.values():
+                index.rebuild(self._read_current())
+            self._notify(None)
+        else:
+            for change in reversed(self._changes):
+                inverse = invert_change(change)
+                apply_change(self._current, inverse)
+                self._notify(inverse)
+        for _ in range(min(self._uncommitted, len(self._undo))):
+            self._pop_undo()
+        for change in reversed(self._undone):
+            self._push_undo(change)
+        self._redo.clear()
+        self._synced()
+
+    def undo(self) -> Change or None:
+        """Undoes the most recent change to the current attribute.
+
+        Returns:
+            Change or None: The change that was undone, or None if there is nothing to undo.
+        """
+        if not self._undo:
+            return None
+        change = self._pop_undo()
+        self._apply(invert_change(change), journal=False)
+        self._redo.append(change)
+        if self._uncommitted:
+            self._uncommitted -= 1
+        else:
+            self._undone.append(change)
+        return change
+
+    def redo(self) -> Change or None:
+        """Redoes the most recently undone change to the current attribute.
+
+        Returns:
+            Change or None: The change that was redone, or None if there is nothing to redo.
         """
-        self._current = copy.deepcopy(self._original)
+        if not self._redo:
+            return None
+        change = self._redo.pop()
+        self._apply(change, journal=False)
+        self._uncommitted += 1
+        self._push_undo(change)
+        return change
+
+    def _push_undo(self, change: Change):
+        """Adds the given change to the undo history and drops the oldest changes while the history is over its budget.
+
+        Args:
+            change (Change): The change to add.
+        """
+        size = change_size(change)
+        self._undo.append(change)
+        self._undo_sizes.append(size)
+        self._undo_size += size
+        while self._undo_size > self._undo_budget and len(self._undo) > 1:
+            self._undo.popleft()
+            self._undo_size -= self._undo_sizes.popleft()
+        self._uncommitted = min(self._uncommitted, len(self._undo))
+
+    def _pop_undo(self) -> Change:
+        """Removes and returns the most recent change of the undo history.
+
+        Returns:
+            Change: The most recent change.
+        """
+        self._undo_size -= self._undo_sizes.pop()
+        return self._undo.pop()
+
+    def _synced(self):
+        """Marks the current attribute as matching the original attribute.
+        """
+        self._changes.clear()
+        self._uncommitted = 0
+        self._undone.clear()
+
+    def _lazy(self, items: Sequence) -> LazyList:
+        """Returns a LazyList of the given items that reports its reads to _on_read().
+
+        Args:
+            items (Sequence): A LazyList, of which a copy is made, or another sequence.
+
+        Returns:
+            LazyList: The list.
+        """
+        lazy = items.copy() if isinstance(items, LazyList) else LazyList(items)
+        lazy.follow_reads(self._on_read)
+        return lazy
+
+    def _copy_original(self) -> list or LazyList:
+        """Returns a copy of the original attribute, which shares the reads of a LazyList.
+
+        Returns:
+            list or LazyList: The copy.
+        """
+        if isinstance(self._original, LazyList):
+            return self._original.copy(follow_reads=True)
+        return list(self._original)
+
+    def _read_current(self) -> Sequence:
+        """Returns the entries of the current attribute to index, those read so far of a LazyList.
+
+        Returns:
+            Sequence: The entries.
+        """
+        if isinstance(self._current, LazyList):
+            return self._current.read_items()
+        return self._current
+
+    def _on_read(self, item: any):
+        """Indexes an entry read for the first time and calls the subscribed callbacks.
+        An entry not read yet was never changed, so it is in the current attribute too.
+
+        Args:
+            item (any): The entry.
+        """
+        for index in self._indexes.values():
+            index.add(item)
+        for callback in self._read_listeners:
+            callback(item)
+
+    def _normalize(self, index: int) -> int:
+        """Returns the given index as a non-negative index into the current attribute.
+
+        Args:
+            index (int): The index to normalize.
+
+        Raises:
+            IndexError: If the index is out of range.
+
+        Returns:
+            int: The non-negative index.
+        """
+        length = len(self._current)
+        if not -length <= index < length:
+            raise IndexError("list index out of range")
+        return index % length
+
+    def _apply(self, change: Change, journal: bool=True):
+        """Applies the given change to the current attribute and records it as pending.
+        Consecutive changes to the same index are merged into one pending change.
+
+        Args:
+            change (Change): The change to apply.
+            journal (bool, optional): If True, the change is added to the undo history and the redo history is cleared. Defaults to True.
+        """
+        apply_change(self._current, change)
+        if journal:
+            self._uncommitted += 1
+            self._push_undo(change)
+            self._redo.clear()
+        last = self._changes[-1] if self._changes else None
+        if last is not None and change.op == 'set' and last.index == change.index and last.op in ('set', 'insert'):
+            self._changes[-1] = last._replace(new=change.new)
+        else:
+            self._changes.append(change)
+        self._notify(change)
+
+    def _notify(self, change: Change or None):
+        """Updates the indexes of the current attribute and calls the subscribed callbacks for a change.
+
+        Args:
+            change (Change or None): The change made to the current attribute, or None when it was replaced.
+        """
+        if change is not None:
+            for index in self._indexes.values():
+                index.apply(change)
+        for callback in self._listeners:
+            callback(change)
 
     def update(self):
         """Updates the original attribute to match the current attribute.
-        If the current attribute is longer than the original attribute, the original attribute is extended with the extra items.
-        If the current attribute is shorter than the original attribute, the original attribute is truncated to the length of the current attribute.
-        """
-        if len(self._current) < len(self._original):
-            for index, _ in enumerate(self._original):
-                if index >= len(self._current):
-                    for index in reversed(range(len(self._current), len(self._original))):
-                        del self._original[index]
-                else:
-                    self._original[index] = self._current[index]
-        elif len(self._current) > len(self._original):
-            for index, item in enumerate(self._current):
-                if index >= len(self._original):
-                    self._original.append(item)
-                else:
-                    self._original[index] = item
+        Only the pending changes are applied, so the cost depends on the number of changes rather than the length of the list.
+        """
+        if len(self._changes) > len(self._current):
+            self._original[:] = self._current
         else:
-            for index, item in enumerate(self._current):
-                self._original[index] = item
+            for change in self._changes:
+                apply_change(self._original, change)
+        committed = list(self._changes)
+        self._synced()
+        if committed:
+            for callback in self._commit_listeners:
+                callback(committed)
+
+    def load(self, items: Sequence):
+        """Replaces the original and current attributes with the given items and clears the undo history.
+        A sequence that is not a list is read lazily.
+
+        Args:
+            items (Sequence): The items to load.
+        """
+        if isinstance(items, list) and isinstance(self._original, list):
+            self._original[:] = items
+        else:
+            self._original = list(items) if isinstance(items, list) else self._lazy(items)
+        self._current = self._copy_original()
+        self._undo.clear()
+        self._undo_sizes.clear()
+        self._undo_size = 0
+        self._redo.clear()
+        self._synced()
+        for index in self._indexes.values():
+            index.rebuild(self._read_current())
+        self._notify(None)
+        for callback in self._commit_listeners:
+            callback(None)
+
+    def load_more(self, items: list):
+        """Appends the given items to the original and current attributes without recording them for undo().
+        Used to fill the list while a file is still being read; the subscribed and commit callbacks get an insert change per item.
+
+        Args:
+            items (list): The items to append.
+        """
+        start = len(self._current)
+        inserted = [Change('insert', len(self._original) + offset, None, item) for offset, item in enumerate(items)]
+        self._original.extend(items)
+        self._current.extend(items)
+        for offset, item in enumerate(items):
+            self._notify(Change('insert', start + offset, None, item))
+        if inserted:
+            for callback in self._commit_listeners:
+                callback(inserted)
 
     @property
-    def original(self) -> list:
-        """Returns a deep copy of the original attribute.
+    def original(self) -> ListView:
+        """Returns a read-only view of the original attribute. The items are shared and must not be changed in place.
 
         Returns:
-            list: Deep copy of the original attribute.
+            ListView: View of the original attribute, it follows later updates.
         """
-        return copy.deepcopy(self._original)
+        return ListView(self._original)
     
     @property
-    def current(self) -> list:
-        """Returns a copy of the current attribute.
+    def current(self) -> ListView:
+        """Returns a read-only view of the current attribute. The items are shared and must not be changed in place.
 
         Returns:
-            list: Deep copy of the current attribute.
+            ListView: View of the current attribute, it follows later changes.
         """
-        return copy.deepcopy(self._current)
+        return ListView(self._current)
     
     @current.setter
     def current(self, other: list):
         """Sets the current attribute to the given list.
-        If the given list is longer than the current attribute, the current attribute is extended with the extra items.
-        If the given list is shorter than the current attribute, the current attribute is truncated to the length of the given list.
+        Only the items that differ are replaced. If the given list is longer than the current attribute, the current attribute
+        is extended with the extra items. If the given list is shorter than the current attribute, the current attribute is
+        truncated to the length of the given list.
 
         Args:
             other (list): A list to set the current attribute to.
         """
-        if len(other) > len(self._current):
-            for index, item in enumerate(other):
-                if index >= len(self._current):
-                    self._current.append(item)
-                else:
-                    self._current[index] = item
-        elif len(other) < len(self._current):
-            for index, _ in enumerate(self._current):
-                if index >= len(other):
-                    for index in reversed(range(len(other), len(self._current))):
-                        del self._current[index]
-                else:
-                    self._current[index] = other[index]
-        else:
-            for index, item in enumerate(other):
-                self._current[index] = item
\ No newline at end of file
+        common = min(len(other), len(self._current))
+        for index in range(common):
+            item = other[index]
+            existing = self._current[index]
+            if item is not existing and item != existing:
+                self[index] = item
+        for index in reversed(range(common, len(self._current))):
+            del self[index]
+        for item in other[common:]:
+            self.append(item)
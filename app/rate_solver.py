@@ -0,0 +1,218 @@
+from typing import NamedTuple
+from app.crafting_graph import CraftingGraph, strongly_connected_components
+
+EPSILON = 1e-9
+
+
+class RateSolution(NamedTuple):
+    """The steady state of a factory that delivers target rates of items, all rates are per second.
+
+    Args:
+        rates (dict[int, float]): Crafts per second of each recipe node that runs.
+        crafters (dict[int, float]): Parallel crafters needed by each recipe node that runs.
+        production (dict[int, float]): Rate each item is produced at.
+        consumption (dict[int, float]): Rate each item is consumed at, not counting the targets.
+        supply (dict[int, float]): Rate each item must be supplied at from outside the factory.
+        surplus (dict[int, float]): Rate each item is left over at, e.g. by-products nothing consumes.
+    """
+    rates: dict
+    crafters: dict
+    production: dict
+    consumption: dict
+    supply: dict
+    surplus: dict
+
+
+class RateSolver:
+    """ RateSolver sizes a factory in steady state from the recipes of a crafting graph and their durations.
+
+    Every item the targets need is supplied by one recipe that yields it, the first one unless choose picks another. A
+    recipe may supply several items, it then runs at the rate the neediest of them sets and the others are left with a
+    surplus: the balance is solved for one governing item per recipe, and a recipe whose other items fall short is governed
+    by the item short the most until none is. Items without a supplying recipe are supplied from outside. The recipe rates
+    solve the linear balance of the governing items, in which by-products count towards the items they are: the system is split
+    into the strongly connected blocks of its dependencies, which are solved in order, so only the cycles of recipes need
+    Gaussian elimination. A recipe that would run backwards because by-products already cover its item is stopped and the
+    item is left with a surplus."""
+    def __init__(self, graph: CraftingGraph, default_duration: float=1.0, choose: callable=None):
+        """ RateSolver sizes a factory in steady state from the recipes of a crafting graph and their durations.
+
+        Args:
+            graph (CraftingGraph): The crafting graph
+            default_duration (float, optional): Seconds per craft of the recipes without a positive duration. Defaults to 1.0.
+            choose (callable, optional): A function that returns the recipe node to supply an item with, or None to supply
+                it from outside, given the item and the recipe nodes that yield it. Defaults to None, which uses the first.
+        """
+        self.graph = graph
+        self.default_duration = default_duration
+        self.choose = choose
+
+    def solve(self, targets: dict[int, float]) -> RateSolution:
+        """ Returns the steady state that delivers the given rates of items.
+
+        Args:
+            targets (dict[int, float]): Items per second to deliver, by item id
+
+        Raises:
+            ValueError: If the recipes of a cycle cannot be balanced, e.g. when they consume as much as they yield
+
+        Returns:
+            RateSolution: The recipe rates, crafters and item flows
+        """
+        suppliers = self._suppliers(targets)
+        governing: dict[int, int] = {}
+        for item, node in sorted(suppliers.items(), key=lambda entry: str(entry[0])):
+            governing.setdefault(node, item)
+        stopped: set[int] = set()
+        tried: set[frozenset] = set()
+        while True:
+            running = {item: node for node, item in governing.items() if item not in stopped}
+            rates = self._solve_balance(running, targets)
+            backwards = [item for item, node in running.items() if rates[node] < -EPSILON]
+            if backwards:
+                stopped.update(backwards)
+                continue
+            tried.add(frozenset(governing.items()))
+            short = self._short_items(suppliers, governing, rates, targets)
+            if not short or frozenset({**governing, **short}.items()) in tried:
+                break  # Whatever is still short is supplied from outside
+            governing.update(short)
+
+        graph = self.graph
+        rates = {node: rate for node, rate in rates.items() if rate > EPSILON}
+        production: dict[int, float] = {}
+        consumption: dict[int, float] = {}
+        for node, rate in rates.items():
+            for item, amount in graph.outputs[node].items():
+                production[item] = production.get(item, 0.0) + amount * rate
+            for item, amount in graph.inputs[node].items():
+                consumption[item] = consumption.get(item, 0.0) + amount * rate
+        supply = {}
+        surplus = {}
+        for item in set(production) | set(consumption) | set(targets):
+            balance = production.get(item, 0.0) - consumption.get(item, 0.0) - targets.get(item, 0.0)
+            if balance < -EPSILON:
+                supply[item] = -balance
+            elif balance > EPSILON:
+                surplus[item] = balance
+        crafters = {node: rate * self._duration(node) for node, rate in rates.items()}
+        return RateSolution(rates, crafters, production, consumption, supply, surplus)
+
+    def _suppliers(self, targets: dict[int, float]) -> dict[int, int]:
+        """ Returns the recipe that supplies each item the targets need, starting from the targets and following ingredients.
+        The recipe of an item does not depend on the other items, so neither does the result on the order of the targets."""
+        graph = self.graph
+        suppliers: dict[int, int] = {}
+        seen = set(targets)
+        pending = list(targets)
+        while pending:
+            item = pending.pop()
+            candidates = sorted(node for node in graph.recipes_producing(item) if graph.outputs[node][item] > 0)
+            if not candidates:
+                continue
+            node = self.choose(item, candidates) if self.choose is not None else candidates[0]
+            if node is None:
+                continue
+            suppliers[item] = node
+            for ingredient in graph.inputs[node]:
+                if ingredient not in seen:
+                    seen.add(ingredient)
+                    pending.append(ingredient)
+        return suppliers
+
+    def _short_items(self, suppliers: dict[int, int], governing: dict[int, int], rates: dict[int, float],
+                     targets: dict[int, float]) -> dict[int, int]:
+        """ Returns the supplied item that falls short the most, relative to its yield, of each recipe it does not govern."""
+        graph = self.graph
+        short: dict[int, tuple[float, int]] = {}
+        for item, node in suppliers.items():
+            if governing[node] == item:
+                continue
+            balance = -targets.get(item, 0.0)
+            for producer in graph.recipes_producing(item):
+                balance += graph.outputs[producer][item] * rates.get(producer, 0.0)
+            for consumer in graph.recipes_consuming(item):
+                balance -= graph.inputs[consumer][item] * rates.get(consumer, 0.0)
+            if balance < -EPSILON:
+                missing = -balance / graph.outputs[node][item]
+                if node not in short or missing > short[node][0]:
+                    short[node] = (missing, item)
+        return {node: item for node, (_, item) in short.items()}
+
+    def _solve_balance(self, suppliers: dict[int, int], targets: dict[int, float]) -> dict[int, float]:
+        """ Returns the rate of each supplying recipe for which every supplied item is produced exactly as fast as it is
+        consumed and delivered, every recipe supplying one item."""
+        graph = self.graph
+        items = list(suppliers)
+        numbers = {item: number for number, item in enumerate(items)}
+        # rows[i][j] is what one craft per second of the supplier of item j adds to the balance of item i
+        rows: list[dict[int, float]] = [{} for _ in items]
+        for column, item in enumerate(items):
+            node = suppliers[item]
+            for product, amount in graph.outputs[node].items():
+                if product in numbers:
+                    row = rows[numbers[product]]
+                    row[column] = row.get(column, 0.0) + amount
+            for ingredient, amount in graph.inputs[node].items():
+                if ingredient in numbers:
+                    row = rows[numbers[ingredient]]
+                    row[column] = row.get(column, 0.0) - amount
+        demand = [float(targets.get(item, 0.0)) for item in items]
+
+        rates = [0.0] * len(items)
+        dependencies = [[column for column in row if column != number] for number, row in enumerate(rows)]
+        for block in strongly_connected_components(dependencies):
+            # The blocks come in dependency order, every rate outside the block that a row uses is known
+            members = set(block)
+            rhs = [demand[number] - sum(coefficient * rates[column] for column, coefficient in rows[number].items()
+                                        if column not in members) for number in block]
+            if len(block) == 1:
+                diagonal = rows[block[0]].get(block[0], 0.0)
+                if abs(diagonal) < EPSILON:
+                    raise ValueError(f"The recipe supplying item {items[block[0]]} does not yield it on balance")
+                rates[block[0]] = rhs[0] / diagonal
+            else:
+                matrix = [[rows[number].get(column, 0.0) for column in block] for number in block]
+                for position, value in zip(block, _gaussian_elimination(matrix, rhs, [items[number] for number in block])):
+                    rates[position] = value
+        return {suppliers[item]: rates[number] for number, item in enumerate(items)}
+
+    def _duration(self, node: int) -> float:
+        """ Returns the seconds per craft of a recipe."""
+        duration = self.graph.recipes[node].get('duration')
+        return duration if isinstance(duration, (int, float)) and duration > 0 else self.default_duration
+
+
+def _gaussian_elimination(matrix: list[list[float]], rhs: list[float], items: list[int]) -> list[float]:
+    """ Solves a dense linear system with partial pivoting, in place.
+
+    Args:
+        matrix (list[list[float]]): The square coefficient matrix
+        rhs (list[float]): The right-hand side
+        items (list[int]): The items of the rows, used in the error message
+
+    Raises:
+        ValueError: If the matrix is singular
+
+    Returns:
+        list[float]: The solution
+    """
+    size = len(matrix)
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(matrix[row][column]))
+        if abs(matrix[pivot][column]) < EPSILON:
+            raise ValueError(f"The recipes supplying items {sorted(items, key=str)} cannot be balanced")
+        matrix[column], matrix[pivot] = matrix[pivot], matrix[column]
+        rhs[column], rhs[pivot] = rhs[pivot], rhs[column]
+        pivot_row = matrix[column]
+        for row in range(column + 1, size):
+            factor = matrix[row][column] / pivot_row[column]
+            if factor:
+                target = matrix[row]
+                for k in range(column, size):
+                    target[k] -= factor * pivot_row[k]
+                rhs[row] -= factor * rhs[column]
+    solution = [0.0] * size
+    for row in range(size - 1, -1, -1):
+        solution[row] = (rhs[row] - sum(matrix[row][k] * solution[k] for k in range(row + 1, size))) / matrix[row][row]
+    return solution
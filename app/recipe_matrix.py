@@ -0,0 +1,303 @@
+from app.crafting_graph import CraftingGraph, strongly_connected_components
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the vectorized engine needs it
+    np = None
+
+
+class RecipeMatrix:
+    """ RecipeMatrix is a compiled, vectorized view of the recipes of a crafting graph.
+    Column r of the sparse item x recipe matrices holds what one craft of recipe r consumes and produces, rows are items.
+    Vectors over recipes follow the order of recipes, vectors over items the order of items. A vector may also be a 2D
+    array with one vector per row, to answer many questions at once.
+
+    The matrix is a snapshot of the graph, call compile() again after the graph changed."""
+    def __init__(self, graph: CraftingGraph, default_duration: float=1.0):
+        """ RecipeMatrix is a compiled, vectorized view of the recipes of a crafting graph.
+
+        Args:
+            graph (CraftingGraph): The crafting graph
+            default_duration (float, optional): Seconds per craft of the recipes without a positive duration. Defaults to 1.0.
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        if np is None:
+            raise ImportError("RecipeMatrix requires numpy")
+        self.graph = graph
+        self.default_duration = default_duration
+        self.compile()
+
+    def compile(self):
+        """ Builds the matrices and the duration vector from the current recipes of the graph."""
+        graph = self.graph
+        self.version = graph.version
+        self.recipes: list[int] = sorted(graph.recipes)
+        self.items: list[int] = sorted(graph.items(), key=_sort_key)
+        self.recipe_index: dict[int, int] = {node: index for index, node in enumerate(self.recipes)}
+        self.item_index: dict[int, int] = {item: index for index, item in enumerate(self.items)}
+
+        durations = [graph.recipes[node].get('duration') for node in self.recipes]
+        self.durations = np.array([duration if isinstance(duration, (int, float)) and duration > 0 else self.default_duration
+                                   for duration in durations], dtype=float)
+
+        item_index = self.item_index
+        inputs = [(item_index[item], column, amount)
+                  for column, node in enumerate(self.recipes) for item, amount in graph.inputs[node].items()]
+        outputs = [(item_index[item], column, amount)
+                   for column, node in enumerate(self.recipes) for item, amount in graph.outputs[node].items()]
+        self.consumed = _CsrMatrix(len(self.items), inputs)
+        self.produced = _CsrMatrix(len(self.items), outputs)
+        net: dict[tuple[int, int], float] = {}
+        for row, column, amount in outputs:
+            net[row, column] = net.get((row, column), 0) + amount
+        for row, column, amount in inputs:
+            net[row, column] = net.get((row, column), 0) - amount
+        self.net = _CsrMatrix(len(self.items), [(row, column, amount) for (row, column), amount in net.items() if amount])
+
+        # The recipe that supplies each item when rates are planned: the first recipe with a positive yield of it. A recipe
+        # may supply several items, it then runs at the highest rate any of them needs.
+        supplier = {}
+        for row, column, amount in sorted(outputs, key=lambda entry: entry[1]):
+            if amount > 0 and row not in supplier:
+                supplier[row] = (column, amount)
+        self.supplied_items = np.array(sorted(supplier), dtype=np.int64)
+        self.supplier_recipes = np.array([supplier[row][0] for row in sorted(supplier)], dtype=np.int64)
+        self.supplier_yields = np.array([supplier[row][1] for row in sorted(supplier)], dtype=float)
+        self.raw = np.ones(len(self.items), dtype=bool)
+        self.raw[self.supplied_items] = False
+        self._levels = self._compile_levels(inputs)
+
+    def _compile_levels(self, inputs: list[tuple[int, int, float]]) -> list[tuple[tuple, list['_CyclicBlock']]]:
+        """ Returns the steps in which required_rates() finds the rates of the supplying recipes.
+        The rate of a recipe depends on the rates of the recipes consuming the items it supplies. The strongly connected
+        blocks of these dependencies are grouped into levels, a block only depends on the blocks of earlier levels. Each
+        level holds the positions of the supplied items of its acyclic blocks, with their consumption matrix, and its
+        cyclic blocks."""
+        supplied = self.supplied_items.tolist()
+        position_of = {row: position for position, row in enumerate(supplied)}
+        suppliers = self.supplier_recipes.tolist()
+        consumers_of: dict[int, list[tuple[int, float]]] = {}
+        for row, column, amount in inputs:
+            consumers_of.setdefault(row, []).append((column, amount))
+        supplies: list[list[int]] = [[] for _ in self.recipes]
+        for position, column in enumerate(suppliers):
+            supplies[column].append(position)
+        needs: list[list[int]] = [[] for _ in self.recipes]
+        for row, entries in consumers_of.items():
+            position = position_of.get(row)
+            if position is not None:
+                needs[suppliers[position]].extend(column for column, _ in entries)
+
+        block_of = [0] * len(self.recipes)
+        level_of: list[int] = []
+        levels: list[tuple[list[int], list[list[int]]]] = []
+        for number, block in enumerate(strongly_connected_components(needs)):  # Dependencies come first
+            for column in block:
+                block_of[column] = number
+            members = set(block)
+            level = 1 + max((level_of[block_of[needed]] for column in block for needed in needs[column]
+                             if needed not in members), default=-1)
+            level_of.append(level)
+            if level == len(levels):
+                levels.append(([], []))
+            positions = [position for column in block for position in supplies[column]]
+            if not positions:
+                continue
+            if len(block) == 1 and block[0] not in needs[block[0]]:
+                levels[level][0].extend(positions)
+            else:
+                levels[level][1].append(block)
+
+        def consumption(positions: list[int]) -> '_CsrMatrix':
+            return _CsrMatrix(len(positions), [(local, column, amount) for local, position in enumerate(positions)
+                                               for column, amount in consumers_of.get(supplied[position], ())])
+
+        compiled = []
+        for acyclic, cyclic in levels:
+            positions = np.array(acyclic, dtype=np.int64)
+            blocks = []
+            for block in cyclic:
+                members = {column: local for local, column in enumerate(block)}
+                block_positions = [position for column in block for position in supplies[column]]
+                internal = np.zeros((len(block_positions), len(block)))
+                for local, position in enumerate(block_positions):
+                    for column, amount in consumers_of.get(supplied[position], ()):
+                        if column in members:
+                            internal[local, members[column]] += amount
+                blocks.append(_CyclicBlock(self.supplied_items[block_positions], np.array(block, dtype=np.int64),
+                                           np.array([members[suppliers[position]] for position in block_positions], dtype=np.int64),
+                                           self.supplier_yields[block_positions], consumption(block_positions), internal))
+            compiled.append(((positions, consumption(acyclic)) if acyclic else None, blocks))
+        return compiled
+
+    def is_stale(self) -> bool:
+        """ Returns True if the graph changed since the matrix was compiled.
+
+        Returns:
+            bool: True if compile() should be called again
+        """
+        return self.version != self.graph.version
+
+    def item_vector(self, values: dict[int, float]) -> "np.ndarray":
+        """ Returns a vector over the items.
+
+        Args:
+            values (dict[int, float]): Value of some items by id, the other items are 0
+
+        Returns:
+            np.ndarray: The vector
+        """
+        vector = np.zeros(len(self.items))
+        for item, value in values.items():
+            vector[self.item_index[item]] = value
+        return vector
+
+    def recipe_vector(self, values: dict[int, float]) -> "np.ndarray":
+        """ Returns a vector over the recipes.
+
+        Args:
+            values (dict[int, float]): Value of some recipes by node, the other recipes are 0
+
+        Returns:
+            np.ndarray: The vector
+        """
+        vector = np.zeros(len(self.recipes))
+        for node, value in values.items():
+            vector[self.recipe_index[node]] = value
+        return vector
+
+    def crafts_per_second(self, machines: "np.ndarray") -> "np.ndarray":
+        """ Returns the crafts per second of each recipe for the given number of machines running it.
+
+        Args:
+            machines (np.ndarray): Machines per recipe
+
+        Returns:
+            np.ndarray: Crafts per second per recipe
+        """
+        return np.asarray(machines, dtype=float) / self.durations
+
+    def item_rates(self, machines: "np.ndarray") -> "np.ndarray":
+        """ Returns the net items per second produced by the given numbers of machines, negative for items consumed.
+
+        Args:
+            machines (np.ndarray): Machines per recipe
+
+        Returns:
+            np.ndarray: Items per second per item
+        """
+        return self.net.dot(self.crafts_per_second(machines))
+
+    def machines(self, recipe_rates: "np.ndarray") -> "np.ndarray":
+        """ Returns the number of machines needed to run the recipes at the given rates.
+
+        Args:
+            recipe_rates (np.ndarray): Crafts per second per recipe
+
+        Returns:
+            np.ndarray: Machines per recipe
+        """
+        return np.asarray(recipe_rates, dtype=float) * self.durations
+
+    def required_rates(self, demand: "np.ndarray", tolerance: float=1e-9) -> tuple["np.ndarray", "np.ndarray"]:
+        """ Returns the crafts per second needed to deliver the given items per second.
+        Every item is supplied by its first recipe with a positive yield; items without one are raw and must be supplied
+        from outside. A recipe supplying several items runs at the highest rate any of them needs, the others are then
+        made in surplus. Byproducts are not credited against the demand of the items they are not the supplier of, but
+        demand that no recipe meets is reported as raw. The rates are found one level of the recipe dependencies at a
+        time, one sparse product per level for the recipes outside cycles; a cycle of recipes is solved as a linear system
+        for the item that governs each of its recipes, until no other item of a recipe needs more.
+
+        Args:
+            demand (np.ndarray): Items per second per item
+            tolerance (float, optional): Relative shortfall of an item below which its recipe is not governed by it. Defaults to 1e-9.
+
+        Raises:
+            ValueError: If the rates do not settle, which happens when a cycle of recipes consumes as much as it yields or more
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Crafts per second per recipe and raw items per second per item
+        """
+        demand = np.asarray(demand, dtype=float)
+        rates = np.zeros(demand.shape[:-1] + (len(self.recipes),))
+        for acyclic, cyclic in self._levels:
+            if acyclic is not None:
+                positions, consumed = acyclic
+                required = demand[..., self.supplied_items[positions]] + consumed.dot(rates)
+                # The transposed view puts the recipes first, so maximum.at() combines the items of a recipe in any shape
+                np.maximum.at(rates.T, self.supplier_recipes[positions], (required / self.supplier_yields[positions]).T)
+            for block in cyclic:
+                block.solve(demand, rates, tolerance)
+        unmet = demand + self.consumed.dot(rates) - self.produced.dot(rates)
+        return rates, np.where(unmet > tolerance * np.maximum(np.abs(demand), 1.0), unmet, 0.0)
+
+
+class _CyclicBlock:
+    """ Recipes whose rates depend on each other through the items they supply, only what required_rates() needs."""
+    def __init__(self, items: "np.ndarray", columns: "np.ndarray", suppliers: "np.ndarray", yields: "np.ndarray",
+                 consumed: "_CsrMatrix", internal: "np.ndarray"):
+        self.items = items  # Rows of the items supplied by the block
+        self.columns = columns  # Columns of the recipes of the block
+        self.suppliers = suppliers  # Position in columns of the recipe supplying each item
+        self.yields = yields  # Yield of each item by its recipe
+        self.consumed = consumed  # Consumption of each item by every recipe
+        self.internal = internal  # Consumption of each item by the recipes of the block, dense
+
+    def solve(self, demand: "np.ndarray", rates: "np.ndarray", tolerance: float):
+        """ Sets the rates of the recipes of the block, the rates of the recipes it depends on must be set and its own 0."""
+        needed = demand[..., self.items] + self.consumed.dot(rates)
+        for row_rates, row_needed in zip(rates.reshape(-1, rates.shape[-1]), needed.reshape(-1, len(self.items))):
+            row_rates[self.columns] = self._solve(row_needed, tolerance)
+
+    def _solve(self, needed: "np.ndarray", tolerance: float) -> "np.ndarray":
+        """ Returns the rates of the recipes of the block for the given need of its items from outside the block."""
+        size = len(self.columns)
+        governing = np.full(size, -1, dtype=np.int64)  # Every recipe of a block supplies an item
+        ratios = needed / self.yields
+        for position, recipe in enumerate(self.suppliers):
+            if governing[recipe] < 0 or ratios[position] > ratios[governing[recipe]]:
+                governing[recipe] = position
+        seen = set()
+        while True:
+            seen.add(governing.tobytes())
+            # rate = (need + consumption by the block) / yield of the governing item of each recipe
+            matrix = self.internal[governing] / self.yields[governing, None]
+            if np.abs(np.linalg.eigvals(matrix)).max() >= 1 - tolerance:
+                raise ValueError("The recipe rates do not settle, a cycle of recipes consumes as much as it yields or more")
+            solution = np.linalg.solve(np.eye(size) - matrix, needed[governing] / self.yields[governing])
+            ratios = (needed + self.internal @ solution) / self.yields
+            improved = governing.copy()
+            for position, recipe in enumerate(self.suppliers):
+                if ratios[position] > ratios[improved[recipe]]:
+                    improved[recipe] = position
+            short = ratios[improved] > solution + tolerance * np.maximum(np.abs(solution), 1.0)
+            governing = np.where(short, improved, governing)
+            if not short.any() or governing.tobytes() in seen:  # Each choice needs more than the last, none comes back
+                return np.maximum(solution, 0.0)
+
+
+class _CsrMatrix:
+    """ Sparse matrix in compressed sparse row format, only what the recipe matrix needs."""
+    def __init__(self, rows: int, entries: list[tuple[int, int, float]]):
+        entries = sorted(entries)
+        self.rows = rows
+        self.columns = np.array([column for _, column, _ in entries], dtype=np.int64)
+        self.values = np.array([value for _, _, value in entries], dtype=float)
+        counts = np.bincount(np.array([row for row, _, _ in entries], dtype=np.int64), minlength=rows)
+        self.indptr = np.concatenate(([0], np.cumsum(counts)))
+        self.starts = self.indptr[:-1][counts > 0]
+        self.filled = counts > 0
+
+    def dot(self, vector: "np.ndarray") -> "np.ndarray":
+        """ Returns the product of the matrix and a vector, or of the matrix and each row of a 2D array."""
+        result = np.zeros(vector.shape[:-1] + (self.rows,))
+        if len(self.values):
+            result[..., self.filled] = np.add.reduceat(vector[..., self.columns] * self.values, self.starts, axis=-1)
+        return result
+
+
+def _sort_key(item: any) -> tuple[str, any]:
+    """ Orders item ids of mixed types."""
+    return (type(item).__name__, item)
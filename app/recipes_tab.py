@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import simpledialog
+from app.edit_batcher import EditBatcher
 from app.entry_row import EntryRow
+from app.ingredient_chooser import IngredientChooser
 from app.protected_list import PList
+from app.records import Recipe
 from app.tab import Tab
 from app.value_box import ValueBox
 
@@ -10,6 +13,8 @@ from app.value_box import ValueBox
 class RecipesTab(Tab):
     """RecipesTab class for handling the Recipes tab in the editor tool's main window.
     """
+    record_type: type = Recipe
+
     def __init__(self, parent_frame: tk.Frame, data_list: list[dict[str, str or int]], ingredients_data: PList[list[str, str or int]]):
         """Initialize the RecipesTab class.
 
@@ -20,12 +25,18 @@ class RecipesTab(Tab):
         """
         self.parent_frame = parent_frame
         self.tab_name = "Recipes"
-        self.data_list: PList[list[str, str or int]] = PList(data_list)
-        self.ingredients_data = ingredients_data
+        self.data_list: PList[list[str, str or int]] = PList(data_list, index_keys=self.index_keys)
+        self.ingredients_data: PList[list[str, str or int]] = None
+        self.ingredient_chooser = IngredientChooser()
+        self.set_ingredients_data(ingredients_data)
         self.selected_index = None
-        # Create lists to hold the widgets for ingredients and products
+        self.showing_entry = False
+        self.edits = EditBatcher(self.parent_frame, self.apply_edits)
+        # Create lists to hold the widgets for ingredients and products, and the hidden rows kept for reuse
         self.ingredient_rows: list[EntryRow] = []
         self.product_rows: list[EntryRow] = []
+        self.ingredient_row_pool: list[EntryRow] = []
+        self.product_row_pool: list[EntryRow] = []
 
         self.init_left_frame()
         self.init_right_frame()
@@ -35,10 +46,9 @@ class RecipesTab(Tab):
         """Initialize the right frame with the recipe attributes
         """
         super().init_right_frame()
-        self.id_value_box.var.trace("w", self.update_data_list)
-        self.name_value_box.var.trace("w", self.update_data_list)
 
-        self.duration_value_box = ValueBox(self.attributes_frame, "Duration", self.update_data_list, 2, 0, 'int')
+        self.duration_value_box = ValueBox(self.attributes_frame, "Duration", lambda *args: self.mark_edit('duration'), 2, 0, 'int')
+        self.value_boxes['duration'] = self.duration_value_box
 
         self.ingredients_label = tk.Label(self.attributes_frame, text="Ingredients:")
         self.ingredients_label.grid(row=3, column=0, columnspan=2, pady=(10, 0))
@@ -66,10 +76,39 @@ class RecipesTab(Tab):
             ingredients_data (list[dict[str, str or int]]): List of ingredient dictionaries to use for the ingredient dropdowns
         """
         super().load_data(data)
-        for entry in self.data_list:
-            if entry.get('duration') is None:
-                entry['duration'] = 0
+        self.set_ingredients_data(ingredients_data)
+
+    def load_more(self, data: list[dict[str, str or int]]):
+        """Append recipes to the tab while a file is being loaded.
+
+        Args:
+            data (list[dict[str, str or int]]): List of recipe dictionaries to append
+        """
+        super().load_more(data)
+
+    def set_ingredients_data(self, ingredients_data: PList[list[str, str or int]]):
+        """Use the given ingredients for the ingredient dropdowns and the name and ID lookups.
+
+        Args:
+            ingredients_data (PList[list[str, str or int]]): Protected list of ingredient dictionaries, indexed by 'id' and 'name'
+        """
+        if ingredients_data is self.ingredients_data:
+            return
+        if not isinstance(ingredients_data, PList):
+            ingredients_data = PList(ingredients_data, index_keys=('id', 'name'))
         self.ingredients_data = ingredients_data
+        self.ingredient_chooser.set_ingredients(self.ingredients_data)
+
+    def get_ingredient(self, ingredient_id: int) -> dict[str, str or int] or None:
+        """Get the ingredient with the given ID.
+
+        Args:
+            ingredient_id (int): ID of the ingredient
+
+        Returns:
+            dict[str, str or int] or None: The first ingredient with the given ID, None if there is none
+        """
+        return self.ingredients_data.key_index('id', complete=True).first(ingredient_id)
 
     def add_entry(self):
         """ Add a new entry to the tab.
@@ -78,27 +117,22 @@ class RecipesTab(Tab):
         if name:
             new_id = len(self.data_list) + 1
             new_entry = {'id': new_id, 'name': name, 'duration':0, 'ingredients': [], 'products': []}
-            self.data_list.append(new_entry)
-            self.listbox.insert(tk.END, name)
+            self.data_list.append(self.record_type.from_dict(new_entry))
             self.clear_attributes()
 
-    def show_selected_entry_details(self, event=None):
-        """Show the details of the selected entry.
+    def fill_attributes(self, selected_entry: dict[str, str or int]):
+        """Fill the attribute widgets and the ingredient and product rows with the given entry.
+
+        Args:
+            selected_entry (dict[str, str or int]): The recipe to show
         """
-        self.data_list.reset()  # Reset the data_list to the original state
-        selected_index = self.listbox.curselection()
-        if selected_index:
-            self.selected_index = selected_index[0]
-        elif not self.selected_index:
-            return
         # Clear the ingredient and product listboxes and their widgets
         self.clear_ingredient_entries()
         self.clear_product_entries()
 
-        selected_entry = self.data_list[self.selected_index]
         self.id_value_box.set(selected_entry['id'])  # Update ID entry
         self.name_value_box.set(selected_entry['name'])  # Update Name entry
-        self.duration_value_box.set(selected_entry['duration'])  # Update Duration entry
+        self.duration_value_box.set(selected_entry.get('duration') or 0)  # Dictionaries that do not fit a Recipe may have none
 
         # Fill the ingredient listbox with dropdown and amount textbox for each ingredient
         for row, ingredient in enumerate(selected_entry.get('ingredients', [])):
@@ -119,19 +153,50 @@ class RecipesTab(Tab):
         return super().clear_attributes()
 
     def clear_ingredient_entries(self):
-        """Clear the ingredient widgets and their references.
+        """Hide the ingredient widgets and keep them for reuse.
         """
         for ingredient_row in self.ingredient_rows:
-            ingredient_row.destroy()
+            ingredient_row.hide()
+        self.ingredient_row_pool.extend(self.ingredient_rows)
         self.ingredient_rows = []
 
     def clear_product_entries(self):
-        """Clear the product widgets and their references.
+        """Hide the product widgets and keep them for reuse.
         """
         for product_row in self.product_rows:
-            product_row.destroy()
+            product_row.hide()
+        self.product_row_pool.extend(self.product_rows)
         self.product_rows = []
 
+    def acquire_row(self, kind: str, pool: list[EntryRow], pane: tk.Widget, selected: str, amount: int, remove_function: callable, row: int) -> EntryRow:
+        """Rebind a hidden row from the given pool, or create a new row when the pool is empty.
+
+        Args:
+            kind (str): 'ingredients' or 'products', the list of the recipe the row edits
+            pool (list[EntryRow]): Hidden rows kept for reuse
+            pane (tk.Widget): Parent widget for a new row
+            selected (str): Name of the selected ingredient
+            amount (int): Amount of the selected ingredient
+            remove_function (callable): Function to call when the remove button of a new row is pressed
+            row (int): Row of the entry
+
+        Returns:
+            EntryRow: The shown row
+        """
+        showing_entry = self.showing_entry
+        self.showing_entry = True  # Rebinding the row is not an edit
+        try:
+            if pool:
+                entry_row = pool.pop()
+                entry_row.rebind(selected, amount, row)
+                return entry_row
+            entry_row = EntryRow(pane, selected, self.ingredient_chooser, amount, remove_function, row)
+            entry_row.dropdown_var.trace("w", lambda *args: self.mark_edit((kind, entry_row)))  # Attach trace to update data_list
+            entry_row.amount_entry.bind("<KeyRelease>", lambda event: self.mark_edit((kind, entry_row)))
+            return entry_row
+        finally:
+            self.showing_entry = showing_entry
+
     def create_ingredient_entry(self, selected_ingredient_id: int, selected_amount: int, row: int):
         """Create an ingredient entry with the given values.
 
@@ -140,21 +205,10 @@ class RecipesTab(Tab):
             selected_amount (int): Amount of the selected ingredient
             row (int): Row of the ingredient entry
         """
-        ingredient_names = [item.get('name') for item in self.ingredients_data if item.get('id') == selected_ingredient_id]
-        if ingredient_names:
-            selected_ingredient = ingredient_names[0]
-            ingredient_options = [name for name in self.get_ingredient_names() if name != selected_ingredient]  # Remove selected product from options
-            ingredient_row = EntryRow(self.ingredients_pane, selected_ingredient, ingredient_options, selected_amount, self.remove_ingredient_entry, row)
-            ingredient_row.dropdown_var.trace("w", self.update_data_list)  # Attach trace to update data_list
-            ingredient_row.amount_entry.bind("<KeyRelease>", self.update_data_list)
-            self.ingredient_rows.append(ingredient_row)
-        else:
-            selected_ingredient = None
-            ingredient_options = self.get_ingredient_names()
-            ingredient_row = EntryRow(self.ingredients_pane, selected_ingredient, ingredient_options, selected_amount, self.remove_ingredient_entry, row)
-            ingredient_row.dropdown_var.trace("w", self.update_data_list)  # Attach trace to update data_list
-            ingredient_row.amount_entry.bind("<KeyRelease>", self.update_data_list)
-            self.ingredient_rows.append(ingredient_row)
+        ingredient = self.get_ingredient(selected_ingredient_id)
+        selected_ingredient = ingredient.get('name') if ingredient is not None else None
+        ingredient_row = self.acquire_row('ingredients', self.ingredient_row_pool, self.ingredients_pane, selected_ingredient, selected_amount, self.remove_ingredient_entry, row)
+        self.ingredient_rows.append(ingredient_row)
 
     def create_product_entry(self, selected_product_id: int, selected_amount: int, row: int):
         """Create a product entry with the given values.
@@ -164,21 +218,10 @@ class RecipesTab(Tab):
             selected_amount (int): Amount of the selected product
             row (int): Row of the product entry
         """
-        product_names = [item.get('name') for item in self.ingredients_data if item.get('id') == selected_product_id]
-        if product_names:
-            selected_product = product_names[0]
-            product_options = [name for name in self.get_ingredient_names() if name != selected_product]  # Remove selected product from options
-            product_row = EntryRow(self.products_pane, selected_product, product_options, selected_amount, self.remove_product_entry, row)
-            product_row.dropdown_var.trace("w", self.update_data_list)  # Attach trace to update data_list
-            product_row.amount_entry.bind("<KeyRelease>", self.update_data_list)
-            self.product_rows.append(product_row)
-        else:
-            selected_product = None
-            product_options = self.get_ingredient_names()
-            product_row = EntryRow(self.products_pane, selected_product, product_options, selected_amount, self.remove_product_entry, row)
-            product_row.dropdown_var.trace("w", self.update_data_list)
-            product_row.amount_entry.bind("<KeyRelease>", self.update_data_list)
-            self.product_rows.append(product_row)
+        product = self.get_ingredient(selected_product_id)
+        selected_product = product.get('name') if product is not None else None
+        product_row = self.acquire_row('products', self.product_row_pool, self.products_pane, selected_product, selected_amount, self.remove_product_entry, row)
+        self.product_rows.append(product_row)
 
     def remove_ingredient_entry(self, row: int):
         """ Remove the ingredient widgets and references.
@@ -186,11 +229,15 @@ class RecipesTab(Tab):
         Args:
             row (int): Row of the ingredient entry
         """
-        self.ingredient_rows[row].destroy()
-        for ingredient_row in range(row, len(self.ingredient_rows)):
-            self.ingredient_rows[ingredient_row].row -= 1
-        del self.data_list[self.selected_index]['ingredients'][row]
-        del self.ingredient_rows[row]
+        self.edits.flush()
+        ingredient_row = self.ingredient_rows.pop(row)
+        ingredient_row.hide()
+        self.ingredient_row_pool.append(ingredient_row)
+        for following_row in self.ingredient_rows[row:]:
+            following_row.move(following_row.row - 1)
+        lines = list(self.data_list[self.selected_index].get('ingredients') or [])
+        del lines[row]
+        self.replace_lines('ingredients', lines)
 
     def remove_product_entry(self, row: int):
         """ Remove the product widgets and references.
@@ -198,11 +245,24 @@ class RecipesTab(Tab):
         Args:
             row (int): Row of the product entry
         """
-        self.product_rows[row].destroy()
-        for product_row in range(row, len(self.product_rows)):
-            self.product_rows[product_row].row -= 1
-        del self.data_list[self.selected_index]['products'][row]
-        del self.product_rows[row]
+        self.edits.flush()
+        product_row = self.product_rows.pop(row)
+        product_row.hide()
+        self.product_row_pool.append(product_row)
+        for following_row in self.product_rows[row:]:
+            following_row.move(following_row.row - 1)
+        lines = list(self.data_list[self.selected_index].get('products') or [])
+        del lines[row]
+        self.replace_lines('products', lines)
+
+    def replace_lines(self, kind: str, lines: list[dict[str, int]]):
+        """ Replace the ingredient or product lines of the selected recipe through an edit, which undo() reverts as one change.
+
+        Args:
+            kind (str): 'ingredients' or 'products'
+            lines (list[dict[str, int]]): The new lines
+        """
+        self.data_list.edit(self.selected_index, {kind: lines})
 
     def get_ingredient_names(self) -> list[str]:
         """Get the names of the ingredients.
@@ -210,7 +270,7 @@ class RecipesTab(Tab):
         Returns:
             list[str]: List of ingredient names
         """
-        return [item.get('name') for item in self.ingredients_data]
+        return self.ingredient_chooser.names()
     
     def get_selected_ingredient_ids(self) -> list[int]:
         """Get the IDs of the selected ingredients based on the dropdown selections.
@@ -220,8 +280,7 @@ class RecipesTab(Tab):
         """
         selected_ingredient_ids = []
         for ingredient_row in self.ingredient_rows:
-            ingredient_name = ingredient_row.dropdown_var.get()
-            ingredient_id = next((item.get('id') for item in self.ingredients_data if item.get('name') == ingredient_name), None)
+            ingredient_id = self.get_id_from_name(ingredient_row.dropdown_var.get())
             if ingredient_id is not None:
                 selected_ingredient_ids.append(ingredient_id)
         return selected_ingredient_ids
@@ -234,59 +293,73 @@ class RecipesTab(Tab):
         """
         selected_product_ids = []
         for product_row in self.product_rows:
-            product_name = product_row.dropdown_var.get()
-            product_id = next((item.get('id') for item in self.ingredients_data if item.get('name') == product_name), None)
+            product_id = self.get_id_from_name(product_row.dropdown_var.get())
             if product_id is not None:
                 selected_product_ids.append(product_id)
         return selected_product_ids
 
-    def update_data_list(self, *args):
-        """Update the data list with the new values.
+    def read_field(self, field: any, entry: dict[str, str or int], changes: dict[str, any]) -> bool:
+        """Read the widget of an edited field and record its value in changes when it differs from the recipe.
+        Ingredient and product rows are edited as (kind, row) fields and only replace their own line.
+
+        Args:
+            field (any): The edited field
+            entry (dict[str, str or int]): The selected recipe
+            changes (dict[str, any]): The changed values of the recipe
+
+        Returns:
+            bool: False if the widget holds an invalid value
         """
-        if self.selected_index is not None:
-            new_id = self.id_value_box.get()
-            new_name = self.name_value_box.get()
+        if field == 'duration':
             new_duration = self.duration_value_box.get()
             if new_duration is None:
                 new_duration = 0
-            if new_id is not None and new_name is not None:
-                # Update the selected entry's data in data_list
-                entry = {'id': new_id, 'name': new_name, 'duration': new_duration, 'ingredients': [], 'products': []}
-
-                for ingredient_row in self.ingredient_rows:
-                    ingredient_dropdown = ingredient_row.dropdown_var
-                    ingredient_id = self.get_id_from_name(ingredient_dropdown.get())
-                    amount = ingredient_row.amount_entry.get()
-                    amount = int(amount) if amount.isdigit() else -1
-                    entry['ingredients'].append({'id': ingredient_id, 'amount': amount})
-
-                for product_row in self.product_rows:
-                    product_dropdown: tk.StringVar = product_row.dropdown_var
-                    product_id = self.get_id_from_name(product_dropdown.get())
-                    amount = product_row.amount_entry.get()
-                    amount = int(amount) if amount.isdigit() else -1
-                    entry['products'].append({'id': product_id, 'amount': amount})
-                if not entry['ingredients'] and not entry['products']:
-                    return
-                self.data_list[self.selected_index] = entry
-            else:
-                self.parent_frame.event_generate("<<Error>>", state=406)
+            if entry.get('duration') != new_duration:
+                changes['duration'] = new_duration
+            return True
+        if not isinstance(field, tuple):
+            return super().read_field(field, entry, changes)
+
+        kind, entry_row = field
+        rows = self.ingredient_rows if kind == 'ingredients' else self.product_rows
+        lines = changes.get(kind, entry.get(kind, []))
+        if entry_row not in rows or rows.index(entry_row) >= len(lines):
+            return True  # The row was removed or hidden before the edit was applied
+        name = entry_row.dropdown_var.get()
+        item_id = self.get_id_from_name(name)
+        if item_id is None and name:
+            return True  # The name is still being typed
+        amount = entry_row.amount_entry.get()
+        amount = int(amount) if amount.isdigit() else -1
+        row = rows.index(entry_row)
+        line = {**lines[row], 'id': item_id, 'amount': amount}
+        if line != lines[row]:
+            lines = list(lines)
+            lines[row] = line
+            changes[kind] = lines
+        return True
 
     def add_ingredient_entry(self):
         """Add an ingredient entry with default values.
         """
         ingredient_id = 1
         ingredient_amount = 0
-        self.data_list[self.selected_index]['ingredients'].append({'id': ingredient_id, 'amount': ingredient_amount})
-        self.create_ingredient_entry(ingredient_id, ingredient_amount, len(self.data_list[self.selected_index]['ingredients'])-1)
+        self.edits.flush()
+        lines = list(self.data_list[self.selected_index].get('ingredients') or [])
+        lines.append({'id': ingredient_id, 'amount': ingredient_amount})
+        self.replace_lines('ingredients', lines)
+        self.create_ingredient_entry(ingredient_id, ingredient_amount, len(lines)-1)
 
     def add_product_entry(self):
         """Add a product entry with default values.
         """
         product_id = 1
         product_amount = 0
-        self.data_list[self.selected_index]['products'].append({'id': product_id, 'amount': product_amount})
-        self.create_product_entry(product_id, product_amount, len(self.data_list[self.selected_index]['products'])-1)
+        self.edits.flush()
+        lines = list(self.data_list[self.selected_index].get('products') or [])
+        lines.append({'id': product_id, 'amount': product_amount})
+        self.replace_lines('products', lines)
+        self.create_product_entry(product_id, product_amount, len(lines)-1)
 
     def get_id_from_name(self, name: str) -> int:
         """Get the ID of the given name.
@@ -297,7 +370,7 @@ class RecipesTab(Tab):
         Returns:
             int: ID of the ingredient or product
         """
-        for item in self.ingredients_data:
-            if item.get('name') == name:
-                return item.get('id')
-        return None
+        item = self.ingredients_data.key_index('name', complete=True).first(name)
+        if item is None:
+            return None
+        return item.get('id')
@@ -0,0 +1,389 @@
+import copy
+import sys
+from array import array
+from collections.abc import Mapping, MutableMapping, MutableSequence
+
+NO_INT = -1 << 63  # Stored for an id, duration or amount of None, in the lines of a recipe and in catalog files
+
+
+class Record(Mapping):
+    """ Record is a read only mapping of the fields of a slotted class, a field that was never set is a missing key.
+    Records can be used where the dictionaries of a file are expected: indexing, get(), iteration over the keys,
+    items(), ** unpacking and comparison with a dictionary all work."""
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> any:
+        if key in self.__slots__:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def get(self, key: str, default: any=None) -> any:
+        if key in self.__slots__:
+            return getattr(self, key, default)
+        return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and hasattr(self, key)
+
+    def __iter__(self):
+        return (field for field in self.__slots__ if hasattr(self, field))
+
+    def __len__(self) -> int:
+        return sum(1 for field in self.__slots__ if hasattr(self, field))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+    def __copy__(self) -> 'Record':
+        copied = object.__new__(type(self))
+        for field in self:
+            object.__setattr__(copied, field, getattr(self, field))
+        return copied
+
+    def __deepcopy__(self, memo: dict) -> 'Record':
+        copied = object.__new__(type(self))
+        for field in self.__slots__:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                object.__setattr__(copied, field, value if type(value) in _IMMUTABLE else copy.deepcopy(value, memo))
+        return copied
+
+    def as_dict(self) -> dict:
+        """ Returns the fields as a dictionary of plain values, e.g. to write the record to a file.
+
+        Returns:
+            dict: The fields that are set
+        """
+        return {field: plain(value) if isinstance(value, (Record, Lines)) else value for field, value in self.items()}
+
+
+class MutableRecord(Record, MutableMapping):
+    """ MutableRecord is a record whose fields can be set and deleted like the keys of a dictionary, other keys cannot be set."""
+    __slots__ = ()
+
+    def __setitem__(self, key: str, value: any):
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, _field(key, value))
+
+    def __delitem__(self, key: str):
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    @classmethod
+    def from_dict(cls, record: Mapping) -> 'MutableRecord' or Mapping:
+        """ Returns a record with the fields of a dictionary.
+        A dictionary with keys the record has no field for, or lines that cannot be packed, is returned as it is, so
+        files with extra data keep working.
+
+        Args:
+            record (Mapping): The dictionary
+
+        Returns:
+            MutableRecord or Mapping: The record, or the dictionary if it does not fit
+        """
+        if type(record) is not dict and (isinstance(record, cls) or not isinstance(record, Mapping)):
+            return record
+        result = object.__new__(cls)
+        fields = cls.__slots__
+        try:
+            for key, value in record.items():
+                if key not in fields:
+                    return record
+                setattr(result, key, _field(key, value))
+        except (TypeError, ValueError, OverflowError):
+            return record
+        return result
+
+
+class ItemAmount(Record):
+    """ ItemAmount is an ingredient or product line of a recipe, decoded from the packed lines of the recipe.
+    It is read only, as changing it would not change the recipe; a line is changed by replacing it in the lines. An id or
+    amount of None is a missing key, as it was in the line the recipe was given."""
+    __slots__ = ('id', 'amount')
+
+    def __init__(self, item_id: int or None, amount: int or None):
+        """ ItemAmount is an ingredient or product line of a recipe, decoded from the packed lines of the recipe.
+
+        Args:
+            item_id (int or None): The id of the item
+            amount (int or None): The amount of the item
+        """
+        if item_id is not None:
+            object.__setattr__(self, 'id', item_id)
+        if amount is not None:
+            object.__setattr__(self, 'amount', amount)
+
+    def __setattr__(self, name: str, value: any):
+        raise TypeError("ItemAmount is read only, replace the line in the lines of the recipe instead")
+
+    def __delattr__(self, name: str):
+        raise TypeError("ItemAmount is read only, replace the line in the lines of the recipe instead")
+
+    def __reduce__(self) -> tuple:
+        return ItemAmount, (self.get('id'), self.get('amount'))
+
+
+class Lines(MutableSequence, array):
+    """ Lines is a list of ingredient or product lines packed into an array of 64 bit integers, the id and amount of each
+    line one after the other. Lines are given as dictionaries of an 'id' and an 'amount', and read back as ItemAmount
+    records; a missing id or amount is read back as a missing key. The list methods work on lines, the array methods such as
+    tobytes() on the packed integers.
+
+    Raises:
+        TypeError: If a line is not a mapping of integers
+        ValueError: If a line holds other keys than 'id' and 'amount'
+        OverflowError: If an id or amount does not fit in 64 bits
+    """
+    __slots__ = ()
+
+    def __new__(cls, lines: iter=()):
+        """ Lines is a list of ingredient or product lines packed into an array of 64 bit integers.
+
+        Args:
+            lines (iter, optional): Dictionaries of an 'id' and an 'amount'. Defaults to ().
+        """
+        if type(lines) is Lines:
+            return cls.from_bytes(lines.tobytes())
+        return _packed(lines, cls)
+
+    def __init__(self, lines: iter=()):
+        pass  # The lines are packed by __new__()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Lines':
+        """ Returns lines holding the given packed integers in native byte order.
+
+        Args:
+            data (bytes): The ids and amounts one after the other, NO_INT for None, e.g. a slice of a catalog file
+
+        Returns:
+            Lines: The lines
+        """
+        lines = array.__new__(cls, 'q')
+        lines.frombytes(data)
+        return lines
+
+    def pairs(self) -> iter:
+        """ Returns the id and amount of every line without creating records.
+
+        Returns:
+            iter: Tuples of id and amount, None for a missing one
+        """
+        values = _iter(self)
+        return ((number_or_none(item_id), number_or_none(amount)) for item_id, amount in zip(values, values))
+
+    def __len__(self) -> int:
+        return _len(self) >> 1
+
+    def __getitem__(self, index: int or slice) -> ItemAmount or list[ItemAmount]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        position = 2 * self._position(index)
+        return ItemAmount(number_or_none(_get(self, position)), number_or_none(_get(self, position + 1)))
+
+    def __setitem__(self, index: int or slice, line: Mapping or iter):
+        if isinstance(index, slice):
+            lines = list(self)
+            lines[index] = line
+            _set(self, slice(None), Lines(lines))
+            return
+        position = 2 * self._position(index)
+        _set(self, slice(position, position + 2), array('q', _pack(line)))
+
+    def __delitem__(self, index: int or slice):
+        if isinstance(index, slice):
+            lines = list(self)
+            del lines[index]
+            _set(self, slice(None), Lines(lines))
+            return
+        position = 2 * self._position(index)
+        _delete(self, slice(position, position + 2))
+
+    def __iter__(self):
+        return (ItemAmount(item_id, amount) for item_id, amount in self.pairs())
+
+    def __contains__(self, line: any) -> bool:
+        return any(own == line for own in self)
+
+    def __eq__(self, other: any) -> bool:
+        if isinstance(other, Lines):
+            return _equal(self, other)
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(line == other_line for line, other_line in zip(self, other))
+
+    def __ne__(self, other: any) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Lines({plain(self)!r})"
+
+    def __reduce_ex__(self, protocol: int) -> tuple:
+        return Lines.from_bytes, (self.tobytes(),)
+
+    def __copy__(self) -> 'Lines':
+        return Lines.from_bytes(self.tobytes())
+
+    def __deepcopy__(self, memo: dict) -> 'Lines':
+        return Lines.from_bytes(self.tobytes())
+
+    def insert(self, index: int, line: Mapping):
+        length = len(self)
+        position = 2 * max(0, min(length, index + length if index < 0 else index))
+        _set(self, slice(position, position), array('q', _pack(line)))
+
+    def _position(self, index: int) -> int:
+        """ Returns the non negative index of a line, raising IndexError if there is no such line."""
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("line index out of range")
+        return index
+
+
+# The array methods of Lines, which work on the packed integers
+_len, _get, _set, _delete = array.__len__, array.__getitem__, array.__setitem__, array.__delitem__
+_iter, _equal = array.__iter__, array.__eq__
+
+
+class Ingredient(MutableRecord):
+    """ Ingredient is an ingredient of the catalog, with the fields 'id' and 'name'. Names are interned."""
+    __slots__ = ('id', 'name')
+
+    def __init__(self, item_id: int=None, name: str=None):
+        """ Ingredient is an ingredient of the catalog, with the fields 'id' and 'name'.
+
+        Args:
+            item_id (int, optional): The id of the ingredient. Defaults to None.
+            name (str, optional): The name of the ingredient. Defaults to None.
+        """
+        self.id = item_id
+        self.name = _field('name', name)
+
+
+class Recipe(MutableRecord):
+    """ Recipe is a recipe of the catalog, with the fields 'id', 'name', 'duration', 'ingredients', 'products' and
+    'substitutions'. Names are interned and the ingredient and product lines are packed into Lines. A missing duration
+    or a duration of None is 0."""
+    __slots__ = ('id', 'name', 'duration', 'ingredients', 'products', 'substitutions')
+
+    def __init__(self, item_id: int=None, name: str=None, duration: int=None, ingredients: iter=(), products: iter=()):
+        """ Recipe is a recipe of the catalog.
+
+        Args:
+            item_id (int, optional): The id of the recipe. Defaults to None.
+            name (str, optional): The name of the recipe. Defaults to None.
+            duration (int, optional): The duration of the recipe, 0 for None. Defaults to None.
+            ingredients (iter, optional): The ingredient lines. Defaults to ().
+            products (iter, optional): The product lines. Defaults to ().
+        """
+        self.id = item_id
+        self.name = _field('name', name)
+        self.duration = duration if duration is not None else 0
+        self.ingredients = _field('ingredients', ingredients)
+        self.products = _field('products', products)
+
+    @classmethod
+    def from_dict(cls, record: Mapping) -> 'Recipe' or Mapping:
+        """ Returns a recipe with the fields of a dictionary and a duration of 0 if it has none, see MutableRecord.from_dict().
+
+        Args:
+            record (Mapping): The dictionary
+
+        Returns:
+            Recipe or Mapping: The recipe, or the dictionary if it does not fit
+        """
+        result = super().from_dict(record)
+        if result is not record and result.get('duration') is None:
+            result.duration = 0
+        return result
+
+
+RECORD_TYPES = {'ingredients': Ingredient, 'recipes': Recipe}
+SECTIONS = tuple(RECORD_TYPES)  # The sections of a file, the ingredients first
+_IMMUTABLE = (int, str, float, bool, type(None))
+_MISSING = object()
+
+
+def as_record(section: str, record: any) -> any:
+    """ Returns the record of a section for a dictionary read from a file, see MutableRecord.from_dict().
+
+    Args:
+        section (str): 'ingredients' or 'recipes'
+        record (any): The dictionary
+
+    Returns:
+        any: The Ingredient or Recipe, or the dictionary if it does not fit
+    """
+    return RECORD_TYPES[section].from_dict(record)
+
+
+def plain(value: any) -> any:
+    """ Returns records and lines as dictionaries and lists, e.g. as the default of json.dump().
+
+    Args:
+        value (any): A record or lines
+
+    Raises:
+        TypeError: If the value is neither
+
+    Returns:
+        any: The dictionary or list
+    """
+    if isinstance(value, Record):
+        return value.as_dict()
+    if isinstance(value, Lines):
+        return [{key: number for key, number in (('id', item_id), ('amount', amount)) if number is not None}
+                for item_id, amount in value.pairs()]
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _field(key: str, value: any) -> any:
+    """ Returns the value stored for a field of a record: names are interned and lines are packed."""
+    if type(value) is str:
+        return sys.intern(value) if key == 'name' else value
+    if value is not None and type(value) is not Lines and key in ('ingredients', 'products'):
+        return _packed(value)
+    return value
+
+
+def _packed(lines: iter, cls: type=None) -> 'Lines':
+    """ Returns lines packed from dictionaries, without the overhead of calling the class."""
+    values = []
+    for line in lines:
+        values += _pack(line)
+    return array.__new__(cls or Lines, 'q', values)
+
+
+def _pack(line: Mapping) -> tuple[int, int]:
+    """ Returns the stored id and amount of a line."""
+    if type(line) is not dict and not isinstance(line, Mapping):
+        raise TypeError(f"A line must be a mapping, not {type(line).__name__}")
+    item_id = line.get('id')
+    amount = line.get('amount')
+    if len(line) > ('id' in line) + ('amount' in line):
+        raise ValueError(f"A line holds only an 'id' and an 'amount': {line!r}")
+    if item_id is None:
+        item_id = NO_INT
+    elif type(item_id) is not int:
+        raise TypeError(f"An id must be an integer, not {type(item_id).__name__}")
+    if amount is None:
+        amount = NO_INT
+    elif type(amount) is not int:
+        raise TypeError(f"An amount must be an integer, not {type(amount).__name__}")
+    return item_id, amount
+
+
+def number_or_none(value: int) -> int or None:
+    """ Returns the id, duration or amount of a stored number, None for NO_INT."""
+    return None if value == NO_INT else value
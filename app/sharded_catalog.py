@@ -0,0 +1,301 @@
+import bisect
+import json
+import os
+import re
+from collections.abc import Sequence
+from typing import Iterator, NamedTuple
+from app.binary_catalog import BinaryCatalog
+from app.lazy_list import LazyList
+from app.records import SECTIONS, as_record, plain
+
+# A manifest is a JSON file listing the shards of a catalog, their paths relative to the manifest:
+#   {"shards": [{"path": "ingredients.yaml", "section": "ingredients", "count": 29}, ...]}
+# A shard holds records of one section: a list of records, a YAML, JSON or JSON lines file of the editor, of which the
+# section is read, or a .ccat catalog file. The count lets the catalog know the length of a section without reading it.
+
+
+class Shard(NamedTuple):
+    """One file of a sharded catalog.
+
+    Args:
+        path (str): Path to the file, relative to the manifest.
+        section (str): 'ingredients' or 'recipes'.
+        count (int or None): Number of records of the section in the file, None if the manifest does not say.
+    """
+    path: str
+    section: str
+    count: int
+
+
+class ShardedCatalog:
+    """ ShardedCatalog is a catalog split into shard files listed by a manifest, a shard is only read when one of its
+    records is accessed.
+    Shards without a count in the manifest are read when the catalog is opened, to know where their records start."""
+    def __init__(self, file_path: str):
+        """ ShardedCatalog is a catalog split into shard files listed by a manifest, a shard is only read when one of its
+        records is accessed.
+
+        Args:
+            file_path (str): Path to the manifest
+
+        Raises:
+            ValueError: If the manifest lists a shard of an unknown section
+        """
+        self.file_path = file_path
+        self.directory = os.path.dirname(os.path.abspath(file_path))
+        with open(file_path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+        self.shards: list[Shard] = []
+        for entry in manifest.get('shards') or []:
+            if entry.get('section') not in SECTIONS:
+                raise ValueError(f"{file_path} lists a shard of unknown section {entry.get('section')}")
+            self.shards.append(Shard(entry['path'], entry['section'], entry.get('count')))
+        self._catalogs: list[BinaryCatalog] = []
+        self.ingredients = ShardedRecords([shard for shard in self.shards if shard.section == 'ingredients'], self.read_shard,
+                                          self.directory)
+        self.recipes = ShardedRecords([shard for shard in self.shards if shard.section == 'recipes'], self.read_shard,
+                                      self.directory)
+
+    def path(self, shard: Shard) -> str:
+        """ Returns the path of a shard file.
+
+        Args:
+            shard (Shard): The shard
+
+        Returns:
+            str: The path, relative paths of the manifest are relative to its directory
+        """
+        return os.path.join(self.directory, shard.path)
+
+    def read_shard(self, shard: Shard) -> Sequence:
+        """ Reads the records of a shard, a .ccat shard stays open and decodes its records on access.
+
+        Args:
+            shard (Shard): The shard
+
+        Returns:
+            Sequence: The records
+        """
+        path = self.path(shard)
+        if path.endswith(".ccat"):
+            catalog = BinaryCatalog(path)
+            self._catalogs.append(catalog)
+            return getattr(catalog, shard.section)
+        return list(iter_shard(path, shard.section))
+
+    def iter_records(self) -> Iterator[tuple[str, dict]]:
+        """ Reads the records of all shards one shard at a time, without keeping them.
+
+        Returns:
+            Iterator[tuple[str, dict]]: Pairs of section name and record, the ingredients first
+        """
+        for section in SECTIONS:
+            for shard in self.shards:
+                if shard.section == section:
+                    for record in iter_shard(self.path(shard), section):
+                        yield section, record
+
+    def close(self):
+        """ Closes the .ccat shards that were opened, their records can no longer be accessed afterwards."""
+        for catalog in self._catalogs:
+            catalog.close()
+        self._catalogs.clear()
+
+
+class ShardedRecords(Sequence):
+    """ Read only sequence of the records of one section of a sharded catalog, each shard is read on first access."""
+    def __init__(self, shards: list[Shard], read: callable, directory: str=""):
+        """ Read only sequence of the records of one section of a sharded catalog, each shard is read on first access.
+
+        Args:
+            shards (list[Shard]): The shards of the section, in order
+            read (callable): A function that returns the records of a shard
+            directory (str, optional): Directory of the manifest, the paths of the shards are relative to. Defaults to "".
+        """
+        self.shards = shards
+        self.read = read
+        self.directory = directory
+        self.loaded: dict[int, Sequence] = {}
+        self.starts: list[int] = []
+        start = 0
+        for number, shard in enumerate(shards):
+            self.starts.append(start)
+            start += shard.count if shard.count is not None else len(self.shard_records(number))
+        self.length = start
+
+    def shard_records(self, number: int) -> Sequence:
+        """ Returns the records of a shard, reading it on first access.
+
+        Args:
+            number (int): Position of the shard in the section
+
+        Raises:
+            ValueError: If the shard does not hold as many records as the manifest says
+
+        Returns:
+            Sequence: The records
+        """
+        records = self.loaded.get(number)
+        if records is None:
+            shard = self.shards[number]
+            records = self.read(shard)
+            if shard.count is not None and len(records) != shard.count:
+                raise ValueError(f"Shard {shard.path} holds {len(records)} {shard.section}, the manifest says {shard.count}")
+            records = self.loaded.setdefault(number, records)  # The first read by any thread is kept
+        return records
+
+    def shard_path(self, number: int) -> str:
+        """ Returns the path of the file of a shard.
+
+        Args:
+            number (int): Position of the shard in the section
+
+        Returns:
+            str: The path
+        """
+        return os.path.normpath(os.path.join(self.directory, self.shards[number].path))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int or slice) -> dict or list[dict]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("catalog index out of range")
+        number = bisect.bisect_right(self.starts, index) - 1  # The last shard starting at or before index is not empty
+        return self.shard_records(number)[index - self.starts[number]]
+
+    def __iter__(self) -> Iterator[dict]:
+        for number in range(len(self.shards)):
+            yield from self.shard_records(number)
+
+
+def iter_shard(file_path: str, section: str) -> Iterator[dict]:
+    """ Reads the records of a section from a shard file.
+
+    Args:
+        file_path (str): Path to the shard file
+        section (str): 'ingredients' or 'recipes'
+
+    Raises:
+        ValueError: If the file type is not supported
+
+    Returns:
+        Iterator[dict]: The records, as Ingredient or Recipe records
+    """
+    from app.data_model import iter_json_lines, read_document
+
+    if file_path.endswith(".ccat"):
+        catalog = BinaryCatalog(file_path)
+        try:
+            yield from getattr(catalog, section)
+        finally:
+            catalog.close()
+        return
+    if file_path.endswith(".jsonl"):
+        with open(file_path, "r", encoding="utf-8") as file:
+            yield from (as_record(section, record)
+                        for record_section, record in iter_json_lines(file) if record_section == section)
+        return
+    data = read_document(file_path)
+    if isinstance(data, dict):
+        data = data.get(section) or []
+    yield from (as_record(section, record) for record in data or [])
+
+
+def write_manifest(file_path: str, ingredients: Sequence[dict], recipes: Sequence[dict], shard_size: int=10000,
+                   previous: ShardedCatalog=None) -> ShardedCatalog:
+    """ Writes ingredients and recipes as JSON shards of at most shard_size records and a manifest listing them.
+    New shards get new names and the manifest is replaced last, so a failed save leaves the previous catalog intact.
+    A section that is still the records of the previous catalog keeps its shards, as does a shard whose records are the
+    very records the previous catalog read from the shard at the same position. A LazyList over the records of a sharded
+    catalog, as the editor holds, keeps a shard it still holds unchanged at the same position without reading it. Shards
+    this function wrote before and the manifest no longer lists are removed.
+
+    Args:
+        file_path (str): Path to the manifest
+        ingredients (Sequence[dict]): Ingredient dictionaries
+        recipes (Sequence[dict]): Recipe dictionaries
+        shard_size (int, optional): Maximum number of records of a shard. Defaults to 10000.
+        previous (ShardedCatalog, optional): The catalog the records were read from, at the same path. Its open .ccat
+            shards are handed over to the returned catalog. Defaults to None.
+
+    Returns:
+        ShardedCatalog: The written catalog, which holds the given records as the loaded records of its shards
+    """
+    from app.data_model import write_atomically
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    token = os.urandom(4).hex()
+    shards: list[Shard] = []
+    loaded: dict[str, dict[int, Sequence]] = {}
+    for section, records in (('ingredients', ingredients), ('recipes', recipes)):
+        old = getattr(previous, section) if previous is not None else None
+        if old is not None and records is old:
+            ends = old.starts[1:] + [old.length]
+            shards.extend(shard._replace(count=end - start) for shard, start, end in zip(old.shards, old.starts, ends))
+            loaded[section] = dict(old.loaded)
+            continue
+        loaded[section] = {}
+        for number, start in enumerate(range(0, len(records), shard_size)):
+            stop = min(start + shard_size, len(records))
+            held = _held_shard(records, start, stop, old, number)
+            if held is not None:
+                shards.append(old.shards[number])
+                if held in records.source.loaded:
+                    loaded[section][number] = records.source.loaded[held]
+                continue
+            chunk = list(records[start:stop])
+            loaded[section][number] = chunk
+            if old is not None and _same_records(old, number, chunk):
+                shards.append(old.shards[number])
+                continue
+            shard = Shard(f"{stem}-{section}-{number}-{token}.json", section, len(chunk))
+            write_atomically(os.path.join(directory, shard.path), lambda file: json.dump({section: chunk}, file, default=plain))
+            shards.append(shard)
+
+    manifest = {'shards': [{'path': shard.path, 'section': shard.section, 'count': shard.count} for shard in shards]}
+    write_atomically(file_path, lambda file: json.dump(manifest, file, indent=4))
+
+    listed = {os.path.normpath(os.path.join(directory, shard.path)) for shard in shards}
+    pattern = re.compile(rf"{re.escape(stem)}-(ingredients|recipes)-\d+-[0-9a-f]{{8}}\.json")
+    for name in os.listdir(directory):
+        path = os.path.normpath(os.path.join(directory, name))
+        if pattern.fullmatch(name) and path not in listed:
+            os.remove(path)
+
+    catalog = ShardedCatalog(file_path)
+    for section in SECTIONS:
+        getattr(catalog, section).loaded.update(loaded[section])
+    if previous is not None:
+        catalog._catalogs, previous._catalogs = previous._catalogs, []
+    return catalog
+
+
+def _held_shard(records: Sequence[dict], start: int, stop: int, old: ShardedRecords or None, number: int) -> int or None:
+    """ Returns the position of a shard in the source of records, if records is a LazyList that holds the records of the
+    shard file at the same position in the previous catalog unchanged from start to stop. No record is read."""
+    if old is None or number >= len(old.shards) or old.shards[number].count != stop - start:
+        return None
+    if not isinstance(records, LazyList) or not isinstance(records.source, ShardedRecords):
+        return None
+    source = records.source
+    first = records.source_run(start, stop)
+    if first is None:
+        return None
+    held = bisect.bisect_right(source.starts, first) - 1
+    if source.starts[held] != first or source.shards[held].count != stop - start \
+            or source.shard_path(held) != old.shard_path(number):
+        return None
+    return held
+
+
+def _same_records(old: ShardedRecords, number: int, chunk: list[dict]) -> bool:
+    """ Returns True if a chunk holds the very records the previous catalog read from its shard at the same position."""
+    if number >= len(old.shards) or number not in old.loaded or old.shards[number].count != len(chunk):
+        return False
+    return all(new is record for new, record in zip(chunk, old.loaded[number]))
@@ -0,0 +1,116 @@
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, Sequence
+from app.binary_catalog import BinaryCatalog
+from app.compiled_recipes import CompiledRecipes, write_compiled_recipes
+from app.crafting_simulator import CraftingSimulator, SimulationResult
+from app.data_model import DataModel
+
+# The compiled recipes of the worker process, opened once by _open_recipes
+_recipes: CompiledRecipes = None
+
+
+class SimulationSweep:
+    """ SimulationSweep runs many simulations of one catalog in a pool of worker processes.
+
+    The recipes are compiled once into a temporary file of flat integer arrays, see CompiledRecipes, which the workers open
+    with mmap instead of receiving the recipes or decoding a catalog: the operating system shares its pages between them,
+    and only the parameters and the results of the runs cross process boundaries. A run is a dictionary with the keys:
+        crafters (dict[int, int]): Number of crafters of each recipe, by index of the recipe in the catalog
+        until (int): Tick to stop at
+        inventory (dict[int, int], optional): Amount of each item in the inventory at the start
+        substitutions (dict[int, list[int]], optional): Indices of the substitutions each recipe uses, by index of the recipe"""
+    def __init__(self, recipes: Sequence[dict], processes: int=None):
+        """ SimulationSweep runs many simulations of one catalog in a pool of worker processes.
+
+        Args:
+            recipes (Sequence[dict]): Recipe dictionaries or records, a run refers to a recipe by its index
+            processes (int, optional): Number of worker processes. Defaults to None, the number of processors.
+        """
+        self.processes = processes or os.cpu_count() or 1
+        handle, self.recipes_path = tempfile.mkstemp(suffix=".crec")
+        os.close(handle)
+        try:
+            write_compiled_recipes(self.recipes_path, recipes)
+        except BaseException:
+            os.remove(self.recipes_path)
+            raise
+
+    @classmethod
+    def from_catalog(cls, catalog_path: str, processes: int=None) -> "SimulationSweep":
+        """ Returns a sweep of the recipes of a catalog file.
+
+        Args:
+            catalog_path (str): Path to a catalog file
+            processes (int, optional): Number of worker processes. Defaults to None, the number of processors.
+
+        Returns:
+            SimulationSweep: The sweep
+        """
+        catalog = BinaryCatalog(catalog_path)
+        try:
+            return cls(catalog.recipes, processes)
+        finally:
+            catalog.close()
+
+    @classmethod
+    def from_data_model(cls, data_model: DataModel, processes: int=None) -> "SimulationSweep":
+        """ Returns a sweep of the recipes of a data model, e.g. of a sharded catalog.
+
+        Args:
+            data_model (DataModel): The data model
+            processes (int, optional): Number of worker processes. Defaults to None, the number of processors.
+
+        Returns:
+            SimulationSweep: The sweep
+        """
+        return cls(data_model.recipes, processes)
+
+    def run(self, runs: Iterable[dict], max_pending: int=None) -> Iterator[tuple[int, SimulationResult]]:
+        """ Runs the simulations and yields each result as soon as it is done, in the order they finish.
+        Runs are taken from the iterable only as workers become free, so a long sweep holds a bounded number of runs.
+
+        Args:
+            runs (Iterable[dict]): The parameters of the runs
+            max_pending (int, optional): Maximum number of runs submitted and not yet yielded. Defaults to None, four per process.
+
+        Returns:
+            Iterator[tuple[int, SimulationResult]]: Pairs of the position of the run in runs and its result
+        """
+        max_pending = max_pending or 4 * self.processes
+        runs = enumerate(runs)
+        with ProcessPoolExecutor(self.processes, initializer=_open_recipes, initargs=(self.recipes_path,)) as pool:
+            pending = {}
+            for position, parameters in runs:
+                pending[pool.submit(_simulate, parameters)] = position
+                if len(pending) >= max_pending:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = pending.pop(future)
+                    for next_position, parameters in runs:
+                        pending[pool.submit(_simulate, parameters)] = next_position
+                        break
+                    yield position, future.result()
+
+    def close(self):
+        """ Removes the compiled recipes, the sweep can no longer run afterwards."""
+        if self.recipes_path is not None and os.path.exists(self.recipes_path):
+            os.remove(self.recipes_path)
+        self.recipes_path = None
+
+
+def _open_recipes(recipes_path: str):
+    """ Opens the compiled recipes in a worker process."""
+    global _recipes
+    _recipes = CompiledRecipes(recipes_path)
+
+
+def _simulate(parameters: dict) -> SimulationResult:
+    """ Runs one simulation in a worker process. The recipes are numbered by their index in the catalog."""
+    substitutions = {node: [_recipes.substitutions[node][index] for index in indices]
+                     for node, indices in (parameters.get('substitutions') or {}).items()}
+    simulator = CraftingSimulator(_recipes, parameters['crafters'], parameters.get('inventory'), substitutions)
+    return simulator.run(parameters['until'])
@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-from app.protected_list import PList
+from app.edit_batcher import EditBatcher
+from app.protected_list import Change, PList
+from app.records import Ingredient
 from app.value_box import ValueBox  # Import the PList class from your module
+from app.virtual_list import VirtualList
 
 class Tab:
     """ Tab is a class that represents a tab in the editor tool."""
+    index_keys: tuple[str] = ('id',)
+    record_type: type = Ingredient  # Entries are stored as records of this type, see app.records
+
     def __init__(self, parent_frame: tk.Frame, tab_name: str, data_list: list[dict[str, str or int]]):
         """ Tab is a class that represents a tab in the editor tool.
 
@@ -15,8 +21,10 @@ class Tab:
         """        
         self.parent_frame: tk.Frame = parent_frame
         self.tab_name = tab_name
-        self.data_list = PList(data_list)  # Use the PList class for data_list
+        self.data_list = PList(data_list, index_keys=self.index_keys)  # Use the PList class for data_list
         self.selected_index = None
+        self.showing_entry = False
+        self.edits = EditBatcher(self.parent_frame, self.apply_edits)
 
         self.init_left_frame()
         self.init_right_frame()
@@ -27,7 +35,7 @@ class Tab:
         self.list_frame = tk.Frame(self.parent_frame)
         self.list_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        self.listbox = tk.Listbox(self.list_frame)
+        self.listbox = VirtualList(self.list_frame, self.data_list, self.entry_label)
         self.listbox.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
         self.button_frame = tk.Frame(self.list_frame)
@@ -44,9 +52,10 @@ class Tab:
         self.attributes_frame = tk.Frame(self.parent_frame)
         self.attributes_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
-        self.id_value_box = ValueBox(self.attributes_frame, "ID", self.update_data_list, 0, 0, 'int')
+        self.id_value_box = ValueBox(self.attributes_frame, "ID", lambda *args: self.mark_edit('id'), 0, 0, 'int')
 
-        self.name_value_box = ValueBox(self.attributes_frame, "Name", self.update_data_list, 1, 0)
+        self.name_value_box = ValueBox(self.attributes_frame, "Name", lambda *args: self.mark_edit('name'), 1, 0)
+        self.value_boxes: dict[str, ValueBox] = {'id': self.id_value_box, 'name': self.name_value_box}
 
         self.confirm_button = tk.Button(self.attributes_frame, text="Confirm", command=self.update_selected_entry)
         self.confirm_button.grid(row=2, column=0, columnspan=2, pady=10)
@@ -57,42 +66,97 @@ class Tab:
         if name:
             new_id = len(self.data_list) + 1
             new_entry = {"id": new_id, "name": name}
-            self.data_list.append(new_entry)
-            self.listbox.insert(tk.END, name)
+            self.data_list.append(self.record_type.from_dict(new_entry))
             self.clear_attributes()
 
     def load_data(self, data: list[dict[str, str or int]]):
         """ Loads data into the tab.
 
         Args:
-            data (list[dict[str, str or int]]): List of data to load
+            data (list[dict[str, str or int]]): List of data to load, the records of a catalog are read as they are shown
         """
-        self.data_list.current = data  # Set the current attribute to the new data
-        self.data_list.update()  # Call the data_list's update method
-        self.listbox.delete(0, tk.END)
-        for entry in self.data_list:
-            self.listbox.insert(tk.END, entry['name'])
+        self.data_list.load(data)  # Replace the original and current attributes with the new data
+        self.listbox.select(None)
+
+    def load_more(self, data: list[dict[str, str or int]]):
+        """ Appends data to the tab while a file is being loaded, the entries can be browsed and edited meanwhile.
+
+        Args:
+            data (list[dict[str, str or int]]): List of data to append
+        """
+        self.data_list.load_more(data)
 
     def delete_entry(self):
         """ Deletes an entry from the tab."""
         if self.selected_index is not None:
             del self.data_list[self.selected_index]
-            self.listbox.delete(self.selected_index)
             self.clear_attributes()
 
     def show_selected_entry_details(self, event=None):
         """ Shows the details of the selected entry."""
+        self.edits.discard()
         self.data_list.reset()  # Reset the data_list to discard changes
         selected_index = self.listbox.curselection()
         if selected_index:
             self.selected_index = selected_index[0]
         elif not self.selected_index:
             return
+        self.show_entry()
+
+    def show_entry(self):
+        """ Fills the attribute widgets from the selected entry without recording the change as an edit."""
+        if self.selected_index is None or self.selected_index >= len(self.data_list):
+            return
+        self.showing_entry = True
+        try:
+            self.fill_attributes(self.data_list[self.selected_index])
+        finally:
+            self.showing_entry = False
+
+    def fill_attributes(self, selected_entry: dict[str, str or int]):
+        """ Fills the attribute widgets with the given entry.
 
-        selected_entry = self.data_list[self.selected_index]
+        Args:
+            selected_entry (dict[str, str or int]): The entry to show
+        """
         self.id_value_box.set(selected_entry['id'])  # Update ID entry
         self.name_value_box.set(selected_entry['name'])  # Update Name entry
 
+    def undo(self, event=None):
+        """ Undoes the last change to the data list."""
+        self.edits.flush()
+        change = self.data_list.undo()
+        if change is not None:
+            self.refresh_after(change)
+
+    def redo(self, event=None):
+        """ Redoes the last undone change to the data list."""
+        self.edits.flush()
+        change = self.data_list.redo()
+        if change is not None:
+            self.refresh_after(change)
+
+    def refresh_after(self, change: Change):
+        """ Follows the listbox selection and shows the selected entry after the given change was undone or redone.
+
+        Args:
+            change (Change): The change that was undone or redone
+        """
+        selection = self.listbox.curselection()
+        self.selected_index = selection[0] if selection else None
+        self.show_entry()
+
+    def entry_label(self, entry: dict[str, str or int]) -> str:
+        """ Returns the text shown in the listbox for an entry.
+
+        Args:
+            entry (dict[str, str or int]): The entry to label
+
+        Returns:
+            str: The label of the entry
+        """
+        return entry['name']
+
     def clear_attributes(self):
         """ Clears the attributes of the tab."""
         self.selected_index = None  # Set selected_index to None
@@ -102,15 +166,48 @@ class Tab:
 
     def update_selected_entry(self):
         """ Updates the selected entry."""
+        self.edits.flush()
         self.data_list.update()  # Only call the data_list's update method
 
-    def update_data_list(self, *args):
-        """ Updates the data list."""
-        if self.selected_index is not None:
-            new_id = self.id_value_box.get()
-            new_name = self.name_value_box.get()
-            if new_id is not None and new_name is not None:
-                entry = {'id': new_id, 'name': new_name}
-                self.data_list[self.selected_index] = entry
-            else:
+    def mark_edit(self, field: any):
+        """ Records that a field of the selected entry was edited through its widget.
+
+        Args:
+            field (any): The edited field
+        """
+        if self.selected_index is not None and not self.showing_entry:
+            self.edits.mark(field)
+
+    def apply_edits(self, fields: set):
+        """ Updates the selected entry in the data list with the edited fields only.
+
+        Args:
+            fields (set): The edited fields
+        """
+        if self.selected_index is None or self.selected_index >= len(self.data_list):
+            return
+        entry = self.data_list[self.selected_index]
+        changes = {}
+        for field in fields:
+            if not self.read_field(field, entry, changes):
                 self.parent_frame.event_generate("<<Error>>", state=406)
+        if changes:
+            self.data_list.edit(self.selected_index, changes)  # One undoable change for all the edited fields
+
+    def read_field(self, field: any, entry: dict[str, str or int], changes: dict[str, any]) -> bool:
+        """ Reads the widget of an edited field and records its value in changes when it differs from the entry.
+
+        Args:
+            field (any): The edited field
+            entry (dict[str, str or int]): The selected entry
+            changes (dict[str, any]): The changed values of the entry
+
+        Returns:
+            bool: False if the widget holds an invalid value
+        """
+        value = self.value_boxes[field].get()
+        if value is None:
+            return False
+        if entry.get(field) != value:
+            changes[field] = value
+        return True
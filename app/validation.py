@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, NamedTuple, Sequence
+from app.integrity import recipe_references
+
+
+class CatalogSummary(NamedTuple):
+    """What one file defines and refers to, all a report needs from it, small enough to send between processes.
+
+    Args:
+        file_path (str): Path to the file.
+        ingredients (dict[int, list[str]]): Names of the ingredients defined with each id.
+        recipes (dict[int, list[str]]): Names of the recipes defined with each id.
+        references (dict[int, list[str]]): The recipes, as "[id] name", that refer to each item id.
+        errors (list[str]): Messages of the errors that prevented reading the file.
+    """
+    file_path: str
+    ingredients: dict
+    recipes: dict
+    references: dict
+    errors: list
+
+
+def validate(ingredients: Sequence[dict], recipes: Sequence[dict]) -> list[str]:
+    """ Checks ingredients and recipes for duplicate ids and for references to ingredients that do not exist.
+    The records are read in one pass each, so a catalog opened with mmap is decoded only once.
+
+    Args:
+        ingredients (Sequence[dict]): Ingredient dictionaries
+        recipes (Sequence[dict]): Recipe dictionaries
+
+    Returns:
+        list[str]: A message for each problem found, empty if there is none
+    """
+    summary = summarize_records(None, ingredients, recipes)
+    return _file_messages(summary) + _unknown_messages(summary.references, summary.ingredients)
+
+
+def validate_files(file_paths: Iterable[str], processes: int=None) -> list[str]:
+    """ Checks files together: each file for duplicate ids, the files for ids defined in more than one of them, and every
+    reference to an ingredient against the ingredients of all the files.
+    The files are read and summarized in a pool of worker processes, the largest first, so the whole check takes about as
+    long as the largest file when there are enough processors.
+
+    Args:
+        file_paths (Iterable[str]): Paths to YAML, JSON or catalog files
+        processes (int, optional): Number of worker processes, 1 to read the files in this process. Defaults to None,
+            the number of processors.
+
+    Returns:
+        list[str]: A message for each problem found, prefixed with the path of the file, in the order of the files
+    """
+    file_paths = list(dict.fromkeys(file_paths))
+    processes = min(processes or os.cpu_count() or 1, len(file_paths))
+    if processes <= 1:
+        summaries = {file_path: summarize_file(file_path) for file_path in file_paths}
+    else:
+        by_size = sorted(file_paths, key=_size, reverse=True)
+        with ProcessPoolExecutor(processes) as pool:
+            summaries = dict(zip(by_size, pool.map(summarize_file, by_size)))
+
+    ingredient_files: dict[int, list[str]] = {}
+    recipe_files: dict[int, list[str]] = {}
+    for file_path in file_paths:
+        summary = summaries[file_path]
+        for item_id in summary.ingredients:
+            ingredient_files.setdefault(item_id, []).append(file_path)
+        for recipe_id in summary.recipes:
+            recipe_files.setdefault(recipe_id, []).append(file_path)
+
+    messages = []
+    for file_path in file_paths:
+        summary = summaries[file_path]
+        file_messages = _file_messages(summary) + _unknown_messages(summary.references, ingredient_files)
+        file_messages.extend(_collision_messages("ingredient", summary.ingredients, ingredient_files, file_path))
+        file_messages.extend(_collision_messages("recipe", summary.recipes, recipe_files, file_path))
+        messages.extend(f"{file_path}: {message}" for message in file_messages)
+    return messages
+
+
+def summarize_file(file_path: str) -> CatalogSummary:
+    """ Reads a file and summarizes its records.
+    Besides the files of DataModel, a YAML or JSON file may hold a plain list of records, as the files of one section do;
+    its records with ingredients or products are recipes and the others are ingredients.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        CatalogSummary: The summary, with the error as its only content if the file cannot be read
+    """
+    import yaml
+    from app.data_model import DataModel, read_document
+
+    try:
+        if file_path.endswith(".jsonl"):
+            ingredients, recipes = [], []
+            for section, record in DataModel().iter_records(file_path):
+                (ingredients if section == 'ingredients' else recipes).append(record)
+            return summarize_records(file_path, ingredients, recipes)
+        if file_path.endswith(".ccat") or file_path.endswith(".manifest"):
+            data_model = DataModel()
+            data_model.load_data(file_path)
+            try:
+                return summarize_records(file_path, data_model.ingredients, data_model.recipes)
+            finally:
+                data_model.close()
+        data = read_document(file_path)
+        if isinstance(data, list):
+            recipes = [record for record in data if 'ingredients' in record or 'products' in record]
+            ingredients = [record for record in data if not ('ingredients' in record or 'products' in record)]
+        elif isinstance(data, dict):
+            ingredients, recipes = data.get('ingredients') or [], data.get('recipes') or []
+        else:
+            ingredients, recipes = [], []
+        return summarize_records(file_path, ingredients, recipes)
+    except (OSError, ValueError, TypeError, AttributeError, yaml.YAMLError) as error:
+        return CatalogSummary(file_path, {}, {}, {}, [str(error) or type(error).__name__])
+
+
+def summarize_records(file_path: str or None, ingredients: Iterable[dict], recipes: Iterable[dict]) -> CatalogSummary:
+    """ Summarizes ingredients and recipes.
+
+    Args:
+        file_path (str or None): Path to the file of the records
+        ingredients (Iterable[dict]): Ingredient dictionaries
+        recipes (Iterable[dict]): Recipe dictionaries
+
+    Returns:
+        CatalogSummary: The summary
+    """
+    ingredient_names: dict[int, list[str]] = {}
+    for ingredient in ingredients:
+        ingredient_names.setdefault(ingredient.get('id'), []).append(ingredient.get('name'))
+    recipe_names: dict[int, list[str]] = {}
+    references: dict[int, list[str]] = {}
+    for recipe in recipes:
+        recipe_names.setdefault(recipe.get('id'), []).append(recipe.get('name'))
+        label = f"[{recipe.get('id')}] {recipe.get('name')}"
+        for item in recipe_references(recipe):
+            references.setdefault(item, []).append(label)
+    return CatalogSummary(file_path, ingredient_names, recipe_names, references, [])
+
+
+def _file_messages(summary: CatalogSummary) -> list[str]:
+    """ Returns the errors of reading a file and a message for each id held by more than one entry of it."""
+    return summary.errors + _duplicates("ingredient", summary.ingredients) + _duplicates("recipe", summary.recipes)
+
+
+def _duplicates(kind: str, names: dict[int, list[str]]) -> list[str]:
+    """ Returns a message for each id held by more than one entry."""
+    return [f"Duplicate {kind} ID: [{entry_id}] found in entries: {entry_names}"
+            for entry_id, entry_names in names.items() if len(entry_names) > 1]
+
+
+def _unknown_messages(references: dict[int, list[str]], known: dict[int, any]) -> list[str]:
+    """ Returns a message for each recipe that refers to an item that is not known."""
+    return [f"Unknown ingredient: [{item}] used by recipe {label}"
+            for item, labels in references.items() if item not in known for label in labels]
+
+
+def _collision_messages(kind: str, names: dict[int, list[str]], files: dict[int, list[str]], file_path: str) -> list[str]:
+    """ Returns a message for each id of a file that is also defined in other files."""
+    return [f"Duplicate {kind} ID: [{entry_id}] also defined in: {[other for other in files[entry_id] if other != file_path]}"
+            for entry_id in names if len(files[entry_id]) > 1]
+
+
+def _size(file_path: str) -> int:
+    """ Returns the size of a file, 0 if it cannot be read."""
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
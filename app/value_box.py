@@ -18,9 +18,16 @@ class ValueBox:
         self.var = tk.StringVar()
         self.entry = tk.Entry(parent_frame, textvariable=self.var)
         self.entry.grid(row=row, column=column + 1)
-        self.var.trace("w", update_data)
+        self.update_data = update_data
+        self.setting = False
+        self.var.trace("w", self.on_change)
         self.type = type
 
+    def on_change(self, *args):
+        """ Calls the update function when the value was edited, not when it was set through set()."""
+        if not self.setting:
+            self.update_data(*args)
+
     def get(self) -> None or int or float or str or bool or list or dict:
         """ Returns the value of the entry as the specified type. If the value cannot be converted to the specified type, None is returned.
         
@@ -55,7 +62,11 @@ class ValueBox:
         Args:
             value (int or float or str or bool or list or dict): The value to set the entry to.
         """
-        self.var.set(f'{value}')
+        self.setting = True
+        try:
+            self.var.set(f'{value}')
+        finally:
+            self.setting = False
 
     def destroy(self):
         """ Destroys the value box.
@@ -0,0 +1,197 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from app.protected_list import Change, PList
+
+
+class VirtualList:
+    """ VirtualList is a scrollable list of entry labels that only holds the rows that are visible as listbox items."""
+    def __init__(self, parent_frame: tk.Widget, items: PList, label: callable):
+        """ VirtualList is a scrollable list of entry labels that only holds the rows that are visible as listbox items.
+
+        Args:
+            parent_frame (tk.Widget): Parent widget for the list
+            items (PList): Protected list of the entries to show, the list follows its changes
+            label (callable): A function that returns the text to show for an entry
+        """
+        self.items = items
+        self.label = label
+        self.top = 0
+        self.rows = 1
+        self.selected = None
+        self.refresh_scheduled = False
+
+        self.frame = tk.Frame(parent_frame)
+        self.listbox = tk.Listbox(self.frame, exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(3))
+        self.listbox.bind("<Up>", lambda event: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda event: self.move_selection(1))
+        self.listbox.bind("<Prior>", lambda event: self.move_selection(-self.rows))
+        self.listbox.bind("<Next>", lambda event: self.move_selection(self.rows))
+        self.items.subscribe(self.on_change)
+
+    def pack(self, **kwargs):
+        """ Packs the list into its parent widget.
+
+        Args:
+            **kwargs: Options passed to tk.Frame.pack
+        """
+        self.frame.pack(**kwargs)
+
+    def bind(self, sequence: str, func: callable):
+        """ Binds a function to an event of the list, after the list's own handling of the event.
+
+        Args:
+            sequence (str): The event sequence, e.g. "<<ListboxSelect>>"
+            func (callable): The function to call
+        """
+        self.listbox.bind(sequence, func, add="+")
+
+    def curselection(self) -> tuple[int]:
+        """ Returns the index of the selected entry in the protected list.
+
+        Returns:
+            tuple[int]: The index of the selected entry, or an empty tuple when nothing is selected
+        """
+        if self.selected is None:
+            return ()
+        return (self.selected,)
+
+    def size(self) -> int:
+        """ Returns the number of entries in the list.
+
+        Returns:
+            int: Number of entries
+        """
+        return len(self.items)
+
+    def select(self, index: int or None):
+        """ Selects the entry at the given index and scrolls it into view.
+
+        Args:
+            index (int or None): Index of the entry in the protected list, None to clear the selection
+        """
+        self.selected = index
+        if index is not None:
+            self.see(index)
+        self.refresh()
+
+    def see(self, index: int):
+        """ Scrolls the list so that the entry at the given index is visible.
+
+        Args:
+            index (int): Index of the entry in the protected list
+        """
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.rows:
+            self.top = index - self.rows + 1
+
+    def yview(self, *args):
+        """ Scrolls the list, called by the scrollbar.
+
+        Args:
+            *args: 'moveto' and a fraction, or 'scroll', a number and 'units' or 'pages'
+        """
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.items))
+            self.refresh()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll(amount * self.rows if args[2] == "pages" else amount)
+
+    def scroll(self, rows: int):
+        """ Scrolls the list by the given number of rows.
+
+        Args:
+            rows (int): Number of rows to scroll, negative to scroll up
+        """
+        self.top += rows
+        self.refresh()
+
+    def move_selection(self, rows: int) -> str:
+        """ Moves the selection by the given number of rows and notifies the bound functions.
+
+        Args:
+            rows (int): Number of rows to move, negative to move up
+
+        Returns:
+            str: "break" to stop the listbox's own key handling
+        """
+        if len(self.items):
+            index = self.top if self.selected is None else self.selected + rows
+            self.select(max(0, min(len(self.items) - 1, index)))
+            self.listbox.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    def on_select(self, event: tk.Event):
+        """ Maps the selected listbox row to the index of its entry.
+
+        Args:
+            event (tk.Event): Event object
+        """
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def on_resize(self, event: tk.Event):
+        """ Updates the number of visible rows when the list is resized.
+
+        Args:
+            event (tk.Event): Event object
+        """
+        rows = max(1, event.height // self.line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.refresh()
+
+    def on_mouse_wheel(self, event: tk.Event):
+        """ Scrolls the list with the mouse wheel.
+
+        Args:
+            event (tk.Event): Event object
+        """
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_change(self, change: Change or None):
+        """ Keeps the selection on the same entry and schedules a refresh after the protected list changed.
+
+        Args:
+            change (Change or None): The change made to the protected list, None when it was replaced
+        """
+        if self.selected is not None:
+            if change is None or change.op in ('reverse', 'reorder'):
+                self.selected = None
+            elif change.op == 'insert' and change.index <= self.selected:
+                self.selected += 1
+            elif change.op == 'delete' and change.index < self.selected:
+                self.selected -= 1
+            elif change.op == 'delete' and change.index == self.selected:
+                self.selected = None
+        if not self.refresh_scheduled:
+            self.refresh_scheduled = True
+            self.listbox.after_idle(self.refresh)
+
+    def refresh(self):
+        """ Fills the listbox with the labels of the visible entries."""
+        self.refresh_scheduled = False
+        count = len(self.items)
+        self.top = max(0, min(self.top, count - self.rows))
+        bottom = min(count, self.top + self.rows)
+        self.listbox.delete(0, tk.END)
+        if bottom > self.top:
+            self.listbox.insert(tk.END, *[self.label(self.items[index]) for index in range(self.top, bottom)])
+        if self.selected is not None and self.top <= self.selected < bottom:
+            self.listbox.selection_set(self.selected - self.top)
+        if count:
+            self.scrollbar.set(self.top / count, bottom / count)
+        else:
+            self.scrollbar.set(0, 1)
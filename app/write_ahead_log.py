@@ -0,0 +1,226 @@
+import json
+import os
+from app.data_model import file_stat
+from app.protected_list import Change, PList
+from app.records import as_record, plain
+
+# A log is a header line, {"base": [inode, size, mtime_ns]} of the main file it applies to, or {"base": null} while the
+# main file is being saved after rotate() and the log applies after the old log, followed by one
+# ["ingredients" or "recipes", [[op, index, new], ...]] line per commit. finish_rotation() records the saved main file
+# as the base, a log with a null base is only replayed next to the old log of the unfinished save.
+
+
+class WriteAheadLog:
+    """ WriteAheadLog appends every commit of the ingredient and recipe lists to a log file next to the main file, so
+    edits that were committed but not saved survive a crash.
+
+    Compacting saves the main file while the log is rotated: the current log is set aside as the old log and a new one
+    takes the commits made meanwhile. Each log records the state of the main file it applies to, so after a crash the old
+    log is replayed only if the main file was not replaced yet, and a log left over from before a save is ignored."""
+    def __init__(self, file_path: str, threshold: int=1 << 20, on_threshold: callable=None):
+        """ WriteAheadLog appends every commit of the ingredient and recipe lists to a log file next to the main file.
+
+        Args:
+            file_path (str): Path to the main file
+            threshold (int, optional): Size in bytes of the log above which on_threshold is called. Defaults to 1 MiB.
+            on_threshold (callable, optional): Called without arguments after a commit made the log larger than the
+                threshold, e.g. to save the main file between rotate() and finish_rotation(). Defaults to None.
+        """
+        self.file_path = file_path
+        self.log_path = file_path + ".wal"
+        self.old_path = self.log_path + ".old"
+        self.threshold = threshold
+        self.on_threshold = on_threshold
+        self.size = 0
+        self._file = None
+        self._followed: tuple[PList, PList] = (None, None)
+
+    def replay(self) -> dict[str, list[Change]]:
+        """ Returns the commits logged since the main file was saved, logs that do not apply to it are removed.
+
+        Returns:
+            dict[str, list[Change]]: The changes of each section ('ingredients' and 'recipes'), in the order they were committed
+        """
+        changes = {'ingredients': [], 'recipes': []}
+        main = file_stat(self.file_path)
+        old_base, old_commits = _read_log(self.old_path)
+        base, commits = _read_log(self.log_path)
+        # The old log was set aside for a save that did not replace the main file yet. A log started by rotate() applies
+        # after the old log, which the main file holds unless the old log is replayed first; without an old log the save
+        # it was started for is over and the main file may have been replaced by anything since.
+        old_applies = old_base is not None and old_base == main
+        applies = base == main if base is not None else os.path.exists(self.old_path)
+        if base is None and applies and not old_applies and main is not None:
+            _rebase(self.log_path, main)  # The save happened, the log now applies to the main file as it is
+        for logged, used, path in ((old_commits, old_applies, self.old_path), (commits, applies, self.log_path)):
+            if used:
+                for section, section_changes in logged:
+                    changes[section].extend(section_changes)
+            elif os.path.exists(path):
+                os.remove(path)
+        return changes
+
+    def follow(self, ingredients: PList, recipes: PList):
+        """ Appends the commits of the given protected lists to the log from now on.
+        Call replay() first, a new log is started for the current state of the main file if there is none.
+
+        Args:
+            ingredients (PList): Protected list of ingredient dictionaries
+            recipes (PList): Protected list of recipe dictionaries
+        """
+        self.unfollow()
+        self._open(file_stat(self.file_path))
+        self._followed = (ingredients, recipes)
+        ingredients.subscribe_commits(self.on_ingredients_commit)
+        recipes.subscribe_commits(self.on_recipes_commit)
+
+    def unfollow(self):
+        """ Stops following the protected lists given to follow() and closes the log, the log files are kept."""
+        ingredients, recipes = self._followed
+        if ingredients is not None:
+            ingredients.unsubscribe_commits(self.on_ingredients_commit)
+        if recipes is not None:
+            recipes.unsubscribe_commits(self.on_recipes_commit)
+        self._followed = (None, None)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def on_ingredients_commit(self, changes: list[Change] or None):
+        """ Logs committed ingredients.
+
+        Args:
+            changes (list[Change] or None): The committed changes, None when all ingredients were replaced
+        """
+        self._append('ingredients', changes)
+
+    def on_recipes_commit(self, changes: list[Change] or None):
+        """ Logs committed recipes.
+
+        Args:
+            changes (list[Change] or None): The committed changes, None when all recipes were replaced
+        """
+        self._append('recipes', changes)
+
+    def rotate(self):
+        """ Sets the log aside as the old log before the main file is saved, later commits go to a new log.
+        If an old log is still there because a save failed, the log is appended to it. Call finish_rotation() once the
+        main file was saved."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # The followed log applies to the main file as it is now, which the old log must record as its base. The old log
+        # is written even without commits to move, it marks the save the new log waits for.
+        appending = os.path.exists(self.old_path)
+        with open(self.old_path, "a" if appending else "w", encoding="utf-8") as target:
+            if not appending:
+                target.write(json.dumps({'base': file_stat(self.file_path)}) + "\n")
+            if os.path.exists(self.log_path):
+                with open(self.log_path, "r", encoding="utf-8") as source:
+                    source.readline()
+                    target.writelines(source)
+            target.flush()
+            os.fsync(target.fileno())
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        if self._followed[0] is not None:
+            self._open(None)
+
+    def finish_rotation(self):
+        """ Records the saved main file as the base of the log started by rotate(), then removes the old log."""
+        base = file_stat(self.file_path)
+        if os.path.exists(self.log_path) and base is not None:
+            following = self._file is not None
+            if following:
+                self._file.close()
+                self._file = None
+            _rebase(self.log_path, base)
+            if following:
+                self._open(base)
+        if os.path.exists(self.old_path):
+            os.remove(self.old_path)
+
+    def discard(self):
+        """ Stops following and removes the log files, e.g. after the data was saved to another file."""
+        self.unfollow()
+        for path in (self.log_path, self.old_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _open(self, base: tuple[int, int, int] or None):
+        """ Opens the log for appending, writing the header if it is new."""
+        self._file = open(self.log_path, "a", encoding="utf-8")
+        self.size = self._file.tell()
+        if self.size == 0:
+            self._write(json.dumps({'base': base}) + "\n")
+
+    def _append(self, section: str, changes: list[Change] or None):
+        """ Appends a commit to the log and calls on_threshold if the log became too large."""
+        if self._file is None or not changes:
+            return  # Replacing a whole list is a load, which the log does not record
+        self._write(json.dumps([section, [[change.op, change.index, change.new] for change in changes]],
+                               separators=(',', ':'), default=plain) + "\n")
+        if self.size > self.threshold and self.on_threshold is not None:
+            self.on_threshold()
+
+    def _write(self, line: str):
+        """ Writes a line to the log and syncs it to the disk, so a commit survives a crash of the editor or of the system."""
+        self._file.write(line)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.size += len(line.encode("utf-8"))
+
+
+def _rebase(log_path: str, base: tuple[int, int, int]):
+    """ Replaces the header of a log with the given base, the commits are kept. The log is rewritten next to itself and
+    moved into place, so a crash leaves either the old or the new header.
+
+    Args:
+        log_path (str): Path to the log
+        base (tuple[int, int, int]): The file_stat() of the main file the log applies to
+    """
+    temporary = log_path + ".tmp"
+    with open(log_path, "r", encoding="utf-8") as source, open(temporary, "w", encoding="utf-8") as target:
+        source.readline()
+        target.write(json.dumps({'base': base}) + "\n")
+        target.writelines(source)
+        target.flush()
+        os.fsync(target.fileno())
+    os.replace(temporary, log_path)
+
+
+def _read_log(log_path: str) -> tuple[tuple[int, int, int] or None, list[tuple[str, list[Change]]]]:
+    """ Reads the header and the commits of a log. A last line cut short by a crash is removed from the file, so the
+    next commit starts on a line of its own.
+
+    Args:
+        log_path (str): Path to the log
+
+    Returns:
+        tuple[tuple[int, int, int] or None, list[tuple[str, list[Change]]]]: The base of the log and its commits, (None, [])
+            if there is no log
+    """
+    if not os.path.exists(log_path):
+        return None, []
+    commits = []
+    base = None
+    with open(log_path, "rb+") as file:
+        number = 0
+        while True:
+            start = file.tell()
+            line = file.readline()
+            if not line:
+                break
+            if not line.endswith(b"\n"):
+                file.truncate(start)
+                break
+            value = json.loads(line)
+            if number == 0:
+                base = tuple(value['base']) if value.get('base') is not None else None
+            else:
+                section, changes = value
+                commits.append((section, [Change(op, index, None, as_record(section, new) if op in ('set', 'insert') else new)
+                                          for op, index, new in changes]))
+            number += 1
+    return base, commits
+
@@ -0,0 +1,135 @@
+import argparse
+import sys
+
+# The modules of the app are imported by the commands that use them, so the tool starts without loading what a command
+# does not need, and never imports tkinter.
+
+
+def validate(args: argparse.Namespace) -> int:
+    """ Prints the problems found in the files, checked together in parallel.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments
+
+    Returns:
+        int: Exit status, 1 if a problem was found
+    """
+    from app.validation import validate_files
+
+    messages = validate_files(args.files, args.jobs)
+    for message in messages:
+        print(message)
+    return 1 if messages else 0
+
+
+def convert(args: argparse.Namespace) -> int:
+    """ Converts a file to the format of the target file's extension.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments
+
+    Returns:
+        int: Exit status
+    """
+    from app.data_model import DataModel
+
+    data_model = DataModel()
+    data_model.load_data(args.source, streaming=True)
+    try:
+        data_model.save_data(args.target)
+    finally:
+        data_model.close()
+    return 0
+
+
+def cost(args: argparse.Namespace) -> int:
+    """ Prints what is needed to craft an amount of an item.
+    Without an objective these are the base resources, otherwise the cheapest plan by that objective.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments
+
+    Returns:
+        int: Exit status, 1 if the item is unknown
+    """
+    from fractions import Fraction
+    from app.crafting_graph import CraftingGraph
+    from app.data_model import DataModel
+
+    data_model = DataModel()
+    data_model.load_data(args.file, streaming=True)
+    try:
+        graph = CraftingGraph(data_model.recipes, data_model.ingredients)
+        names = {ingredient.get('id'): ingredient.get('name') for ingredient in data_model.ingredients}
+        if args.item not in graph:
+            print(f"Unknown item: [{args.item}]", file=sys.stderr)
+            return 1
+        amount = Fraction(args.amount)
+        amount = amount.numerator if amount.denominator == 1 else amount
+        if args.objective is None:
+            from app.bill_of_materials import BillOfMaterials
+            for item, quantity in sorted(BillOfMaterials(graph).cost(args.item, amount).items()):
+                print(f"{quantity}\t[{item}] {names.get(item)}")
+            return 0
+
+        from app.production_planner import ProductionPlanner
+        plan = ProductionPlanner(graph, args.objective).plan(args.item, amount)
+        print(f"cost\t{plan.cost}")
+        print(f"duration\t{plan.duration}")
+        for node, crafts in sorted(plan.crafts.items()):
+            recipe = data_model.recipes[node]
+            print(f"craft\t{crafts}\t[{recipe.get('id')}] {recipe.get('name')}")
+        for item, quantity in sorted(plan.raw.items()):
+            print(f"raw\t{quantity}\t[{item}] {names.get(item)}")
+        return 0
+    finally:
+        data_model.close()
+
+
+def parse_args(argv: list[str]=None) -> argparse.Namespace:
+    """ Parses the command line.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the process.
+
+    Returns:
+        argparse.Namespace: The parsed arguments, command is the function that runs the chosen command
+    """
+    parser = argparse.ArgumentParser(description="Validate, convert and query crafting catalogs without the editor.")
+    commands = parser.add_subparsers(dest="name", required=True)
+
+    validate_parser = commands.add_parser("validate", help="check files for duplicate ids, ids defined in several files and unknown ingredients")
+    validate_parser.add_argument("files", nargs="+", help="YAML, JSON, JSON lines, catalog or manifest files")
+    validate_parser.add_argument("--jobs", type=int, help="number of worker processes. Defaults to the number of processors.")
+    validate_parser.set_defaults(command=validate)
+
+    convert_parser = commands.add_parser("convert", help="convert between YAML, JSON, JSON lines, catalog and manifest files")
+    convert_parser.add_argument("source", help="file to read")
+    convert_parser.add_argument("target", help="file to write, its extension selects the format")
+    convert_parser.set_defaults(command=convert)
+
+    cost_parser = commands.add_parser("cost", help="show what is needed to craft an item")
+    cost_parser.add_argument("file", help="YAML, JSON, JSON lines, catalog or manifest file")
+    cost_parser.add_argument("item", type=int, help="id of the item")
+    cost_parser.add_argument("--amount", default="1", help="amount of the item, e.g. 3 or 1/2. Defaults to 1.")
+    cost_parser.add_argument("--objective", choices=("raw", "duration"),
+                             help="show the cheapest plan by this objective instead of the base resources")
+    cost_parser.set_defaults(command=cost)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]=None) -> int:
+    """ Runs the command given on the command line.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the process.
+
+    Returns:
+        int: Exit status
+    """
+    args = parse_args(argv)
+    return args.command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
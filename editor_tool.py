@@ -4,8 +4,12 @@ import tkinter.filedialog as filedialog
 from os import path
 from tkinter.ttk import Notebook
 from app.data_model import DataModel
+from app.file_worker import FileWorker
 from app.ingredients_tab import IngredientsTab
+from app.integrity import IntegrityChecker
+from app.protected_list import Change, PList, apply_change
 from app.recipes_tab import RecipesTab
+from app.write_ahead_log import WriteAheadLog
 
 
 class MainApplication:
@@ -44,7 +48,18 @@ class MainApplication:
         self.recipes_tab = RecipesTab(self.recipes_frame, self.data_model.recipes, self.ingredients_tab.data_list)
         self.tabs.bind("<<NotebookTabChanged>>", self.recipes_tab.show_selected_entry_details)
 
+        self.integrity = IntegrityChecker()
+        self.integrity.follow(self.recipes_tab.data_list, self.ingredients_tab.data_list)
+
         self.file_path = None
+        self.file_worker = FileWorker(self.parent_widget)
+        self.log: WriteAheadLog = None
+        self.held_records: dict[str, list] = None  # Records of a file with logged changes, kept from the tabs until they are replayed
+        self.warnings_scheduled = False
+        self.ingredients_tab.data_list.subscribe(self.schedule_warnings)
+        self.recipes_tab.data_list.subscribe(self.schedule_warnings)
+        self.ingredients_tab.data_list.subscribe_reads(lambda entry: self.schedule_warnings())
+        self.recipes_tab.data_list.subscribe_reads(lambda entry: self.schedule_warnings())
 
         menubar = tk.Menu(parent_widget)
         parent_widget.config(menu=menubar)
@@ -58,8 +73,15 @@ class MainApplication:
         file_menu.add_separator()
         file_menu.add_command(label="Save", command=self.save_data)
         file_menu.add_command(label="Save As", command=self.save_data_as)
+        file_menu.add_separator()
+        file_menu.add_command(label="Cancel Loading", command=self.cancel_loading)
+
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+
+        edit_menu.add_command(label="Undo", command=self.undo)
+        edit_menu.add_command(label="Redo", command=self.redo)
 
-        self.parent_widget.after(5000, self.detect_warnings)
         self.parent_widget.bind("<<Error>>", self.display_error)
         if platform.system().lower() == "darwin":
             ctl = "Command"
@@ -69,34 +91,137 @@ class MainApplication:
         self.parent_widget.bind(f"<{ctl}-s>", self.save_data)
         self.parent_widget.bind(f"<{ctl}-n>", self.new)
         self.parent_widget.bind(f"<{ctl}-Shift-S>", self.save_data_as)
+        self.parent_widget.bind(f"<{ctl}-z>", self.undo)
+        self.parent_widget.bind(f"<{ctl}-y>", self.redo)
+        self.parent_widget.bind(f"<{ctl}-Shift-Z>", self.redo)
+        self.parent_widget.bind("<Escape>", self.cancel_loading)
 
     def load_data(self, event=None):
         """ Loads data from a file.
+        A .ccat catalog file or a .manifest of a sharded catalog is opened at once and its records are read as the tabs
+        access them, a shard when a record of it is first shown or looked up; see DataModel.load_data() and PList.
+        Other files are read in the background and the tabs fill up as the records are read. The logged changes of a file
+        that was not saved are replayed by index, so its records only reach the tabs once the file is loaded and the
+        changes are replayed, before they can be edited.
         """
+        if self.file_worker.busy:
+            self.show_info("Wait for the file to be loaded or saved")
+            return
         file_path = filedialog.askopenfilename(title="Select a file",
                                                filetypes=(("YAML files", "*.yaml"), ("JSON files", "*.json"),
+                                                          ("JSON lines files", "*.jsonl"), ("Catalog files", "*.ccat"),
+                                                          ("Sharded catalogs", "*.manifest"),
                                                           ("All files", "*.*")))
         if file_path:
-            try:
-                self.data_model.load_data(file_path)
-                self.ingredients_tab.load_data(self.data_model.ingredients)
-                self.recipes_tab.load_data(self.data_model.recipes, self.ingredients_tab.data_list)
-                self.file_path = file_path
-            except FileNotFoundError:
-                self.display_error("File not found")
+            self.new()
+            if file_path.endswith(".ccat") or file_path.endswith(".manifest"):
+                self.open_catalog(file_path)
+                return
+            if any(WriteAheadLog(file_path).replay().values()):
+                self.held_records = {'ingredients': [], 'recipes': []}
+                self.show_info("Recovering unsaved changes, the records are shown once the file is loaded")
+            self.file_worker.load(file_path, self.add_records,
+                                  lambda error, cancelled: self.finish_loading(file_path, error, cancelled), self.show_info)
+
+    def open_catalog(self, file_path: str):
+        """ Opens a catalog file or a sharded catalog, the tabs read its records lazily.
+
+        Args:
+            file_path (str): Path to the .ccat or .manifest file
+        """
+        try:
+            self.data_model.load_data(file_path)
+        except (OSError, ValueError) as error:
+            self.finish_loading(file_path, error, False)
+            return
+        self.ingredients_tab.load_data(self.data_model.ingredients)
+        self.recipes_tab.load_data(self.data_model.recipes, self.ingredients_tab.data_list)
+        self.show_info(f"Opened {path.basename(file_path)}: {len(self.data_model.ingredients)} ingredients, "
+                       f"{len(self.data_model.recipes)} recipes")
+        self.finish_loading(file_path, None, False)
+
+    def add_records(self, section: str, records: list[dict[str, str or int]]):
+        """ Adds records read from a file to their tab.
+
+        Args:
+            section (str): 'ingredients' or 'recipes'
+            records (list[dict[str, str or int]]): The records
+        """
+        if self.held_records is not None:
+            self.held_records[section].extend(records)
+            return
+        if section == 'ingredients':
+            self.ingredients_tab.load_more(records)
+        else:
+            self.recipes_tab.load_more(records)
+
+    def finish_loading(self, file_path: str, error: Exception or None, cancelled: bool):
+        """ Ends the loading of a file.
+
+        Args:
+            file_path (str): Path to the file
+            error (Exception or None): The error that stopped the loading, if any
+            cancelled (bool): True if the loading was cancelled
+        """
+        held_records, self.held_records = self.held_records, None
+        if error is not None or cancelled:
+            self.new()
+            if error is not None:
+                self.show_error("File not found" if isinstance(error, FileNotFoundError) else f"Could not load the file: {error}")
+            else:
+                self.show_info("Loading cancelled")
+            return
+        self.file_path = file_path
+        if held_records is not None:
+            self.ingredients_tab.load_data(held_records['ingredients'])
+            self.recipes_tab.load_data(held_records['recipes'], self.ingredients_tab.data_list)
+        self.start_log(file_path, replay=True)
+
+    def start_log(self, file_path: str, replay: bool):
+        """ Starts logging the commits of the tabs next to a file, so they survive a crash until the file is saved.
+
+        Args:
+            file_path (str): Path to the file
+            replay (bool): True to apply the commits logged by an earlier session first, False to drop them
+        """
+        self.stop_log()
+        self.log = WriteAheadLog(file_path, on_threshold=self.compact_log)
+        if not replay:
+            self.log.discard()
+        changes = self.log.replay()
+        count = sum(len(section_changes) for section_changes in changes.values())
+        if count:
+            ingredients = self.ingredients_tab.data_list.original.copy()
+            recipes = self.recipes_tab.data_list.original.copy()
+            for change in changes['ingredients']:
+                apply_change(ingredients, change)
+            for change in changes['recipes']:
+                apply_change(recipes, change)
+            self.ingredients_tab.load_data(ingredients)
+            self.recipes_tab.load_data(recipes, self.ingredients_tab.data_list)
+            self.show_info(f"Recovered {count} unsaved changes")
+        self.log.follow(self.ingredients_tab.data_list, self.recipes_tab.data_list)
+
+    def stop_log(self):
+        """ Stops logging the commits of the tabs, the log is kept for the next session. """
+        if self.log is not None:
+            self.log.unfollow()
+            self.log = None
+
+    def compact_log(self):
+        """ Saves the file in the background once its log grew too large. """
+        if self.file_path and not self.file_worker.busy:
+            self.save_to(self.file_path)
+
+    def cancel_loading(self, event=None):
+        """ Cancels the loading of a file, the tabs are emptied. """
+        self.file_worker.cancel()
 
     def save_data(self, event=None):
         """ Saves the data to a file.
         """
-        print(self.file_path)
         if self.file_path:
-            try:
-                self.data_model.ingredients = self.ingredients_tab.data_list.original
-                self.data_model.recipes = self.recipes_tab.data_list.original
-                self.data_model.save_data(self.file_path)
-                self.show_info("Data saved successfully")
-            except FileNotFoundError:
-                self.display_error("File not found")
+            self.save_to(self.file_path)
         else:
             self.save_data_as()
 
@@ -107,53 +232,108 @@ class MainApplication:
         file_path = filedialog.asksaveasfilename(title="Save As",
                                                  initialfile=file_name,
                                                  filetypes=(("YAML files", "*.yaml"), ("JSON files", "*.json"),
-                                                            ("All files", "*.*")))
+                                                            ("JSON lines files", "*.jsonl"), ("Catalog files", "*.ccat"),
+                                                            ("Sharded catalogs", "*.manifest"), ("All files", "*.*")))
         if file_path:
-            try:
-                self.data_model.ingredients = self.ingredients_tab.data_list.original
-                self.data_model.recipes = self.recipes_tab.data_list.original
-                self.data_model.save_data(file_path)
-                self.file_path = file_path
-                self.show_info("Data saved successfully")
-            except FileNotFoundError:
-                self.display_error("File not found")
+            self.save_to(file_path)
+
+    def save_to(self, file_path: str):
+        """ Saves the committed data of the tabs to a file in the background.
+
+        Args:
+            file_path (str): Path to the file
+        """
+        if self.file_worker.busy:
+            self.show_info("Wait for the file to be loaded or saved")
+            return
+        self.data_model.ingredients = self.ingredients_tab.data_list.original.copy()  # Commits made while saving stay out of the file
+        self.data_model.recipes = self.recipes_tab.data_list.original.copy()
+        if self.log is not None and self.log.file_path == file_path:
+            self.log.rotate()  # Commits made while saving go to a new log
+        self.file_worker.save(file_path, self.data_model,
+                              lambda error, cancelled: self.finish_saving(file_path, error), self.show_info)
+
+    def finish_saving(self, file_path: str, error: Exception or None):
+        """ Ends the saving of a file.
+
+        Args:
+            file_path (str): Path to the file
+            error (Exception or None): The error that stopped the saving, if any
+        """
+        if error is not None:
+            self.show_error("File not found" if isinstance(error, FileNotFoundError) else f"Could not save the file: {error}")
+            return
+        if self.log is not None and self.log.file_path == file_path:
+            self.log.finish_rotation()
+        else:
+            if self.log is not None:
+                self.log.discard()  # The commits it holds are in the new file
+            self.start_log(file_path, replay=False)
+        self.file_path = file_path
+        self.show_info("Data saved successfully")
 
     def new(self, event=None):
-        """ Creates a new data model. """
-        self.data_model = DataModel()
+        """ Creates a new data model, unless a file is being loaded or saved; a load can be cancelled first. """
+        if self.file_worker.busy:
+            self.show_info("Wait for the file to be loaded or saved")
+            return
+        self.stop_log()
+        data_model, self.data_model = self.data_model, DataModel()
         self.ingredients_tab.load_data(self.data_model.ingredients)
         self.recipes_tab.load_data(self.data_model.recipes, self.ingredients_tab.data_list)
+        data_model.close()  # The tabs no longer read the records of its catalog
         self.file_path = None
 
+    def selected_tab(self) -> IngredientsTab or RecipesTab:
+        """ Returns the tab that is currently shown.
+
+        Returns:
+            IngredientsTab or RecipesTab: The tab that is currently shown
+        """
+        if self.tabs.index(self.tabs.select()) == 0:
+            return self.ingredients_tab
+        return self.recipes_tab
+
+    def undo(self, event=None):
+        """ Undoes the last change in the current tab. """
+        self.selected_tab().undo()
+
+    def redo(self, event=None):
+        """ Redoes the last undone change in the current tab. """
+        self.selected_tab().redo()
+
+    def schedule_warnings(self, change: Change or None=None):
+        """ Schedules the warnings to be refreshed once the pending events are handled.
+
+        Args:
+            change (Change or None, optional): The change that was made to a tab's data list. Defaults to None.
+        """
+        if not self.warnings_scheduled:
+            self.warnings_scheduled = True
+            self.parent_widget.after_idle(self.detect_warnings)
+
     def detect_warnings(self):
+        """ Refreshes the warnings shown for both tabs. """
+        self.warnings_scheduled = False
         warnings = []
         warnings.extend(self.detect_overlapping_ids(self.ingredients_tab.data_list))
         warnings.extend(self.detect_overlapping_ids(self.recipes_tab.data_list))
+        warnings.extend(self.integrity.messages())
         self.warning_label.config(text='\n'.join([f'Warning! {message}' for message in warnings]))
-        self.parent_widget.after(5000, self.detect_warnings)
 
-    def detect_overlapping_ids(self, source: list[dict[str, str or int]]) -> list[str]:
-        """ Detects overlapping IDs in a list of dictionaries.
+    def detect_overlapping_ids(self, source: PList[dict[str, str or int]]) -> list[str]:
+        """ Detects overlapping IDs in a protected list of dictionaries using its ID index.
+        Of a catalog that is read lazily, only the entries read so far are compared.
 
         Args:
-            source (list[dict[str, str or int]]): List of dictionaries to check
+            source (PList[dict[str, str or int]]): Protected list of dictionaries to check
         """
-        warnings = []
-        ids = [
-            ingredient.get('id')
-            for ingredient
-            in source
+        return [
+            f"Duplicate ID: [{entry_id}] found in entries: {[entry['name'] for entry in entries]}"
+            for entry_id, entries
+            in source.key_index('id').duplicates().items()
         ]
 
-        for entry_id in ids:
-            if ids.count(entry_id) > 1:
-                entries = [entry['name'] for entry in source if entry['id'] == entry_id]
-                message = f"Duplicate ID: [{entry_id}] found in entries: {entries}"
-                if message not in warnings:
-                    warnings.append(message)
-
-        return warnings
-
     def display_error(self, event: tk.Event):
         """ Displays an error message.
 
@@ -164,6 +344,15 @@ class MainApplication:
             self.error_label.config(text="Invalid input")
         self.parent_widget.after(5000, self.clear_error)
     
+    def show_error(self, message: str):
+        """ Shows an error message for a few seconds.
+
+        Args:
+            message (str): The message to show.
+        """
+        self.error_label.config(text=message)
+        self.parent_widget.after(5000, self.clear_error)
+
     def clear_error(self):
         """ Clears the error message. """
         self.error_label.config(text="")
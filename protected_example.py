@@ -13,6 +13,11 @@ print("\nBefore update:")
 print("original_list", original_list)  # Output: [1, 2, 3]
 print("protected_list", protected_list)  # Output: [1, 5, 3, 4, 6, 7]
 
+# The pending changes can be inspected before they are applied
+print("\nPending changes:")
+for change in protected_list.changes():
+    print(change)  # Output: Change(op='set', index=1, old=2, new=5), Change(op='insert', index=3, old=None, new=4), ...
+
 # Applying the changes using the update method
 protected_list.update()
 
@@ -0,0 +1,9 @@
+def recipe(recipe_id, ingredients, products, duration=1, substitutions=()):
+    """ Returns a recipe dictionary from {item: amount} ingredients and products and (original, amount, substitute,
+    amount) substitutions."""
+    return {'id': recipe_id, 'name': f"recipe {recipe_id}", 'duration': duration,
+            'ingredients': [{'id': item, 'amount': amount} for item, amount in ingredients.items()],
+            'products': [{'id': item, 'amount': amount} for item, amount in products.items()],
+            'substitutions': [{'original': {'id': original, 'amount': original_amount},
+                               'substitute': {'id': substitute, 'amount': substitute_amount}}
+                              for original, original_amount, substitute, substitute_amount in substitutions]}
@@ -0,0 +1,40 @@
+from fractions import Fraction
+from app.bill_of_materials import BillOfMaterials
+from app.crafting_graph import CraftingGraph
+from app.protected_list import PList
+from tests.helpers import recipe
+
+
+def test_expansions_of_a_chain():
+    bill = BillOfMaterials(CraftingGraph([recipe(1, {1: 2}, {2: 1}), recipe(2, {2: 3, 1: 1}, {3: 2})]))
+    assert bill.expansion(3) == {1: Fraction(7, 2)}
+    assert bill.cost(3, 4) == {1: 14}
+    assert bill.is_raw(1) and not bill.is_raw(2)
+
+
+def test_expansions_are_computed_once():
+    chosen = []
+    bill = BillOfMaterials(CraftingGraph([recipe(1, {1: 2}, {2: 1}), recipe(2, {2: 1}, {3: 1})]),
+                           choose=lambda item, nodes: chosen.append(item) or nodes[0])
+    expansion = bill.expansion(3)
+    calls = len(chosen)
+    assert set(chosen) == {2, 3}
+    assert bill.expansion(3) is expansion and bill.expansion(2) == {1: 2}
+    assert bill.total_cost([(3, 1), (2, 2)]) == {1: 6}
+    assert len(chosen) == calls
+
+
+def test_expansions_are_dropped_when_the_graph_changes():
+    recipes = PList([recipe(1, {1: 2}, {2: 1})])
+    graph = CraftingGraph()
+    graph.follow(recipes)
+    bill = BillOfMaterials(graph)
+    assert bill.expansion(2) == {1: 2}
+    recipes[0] = recipe(1, {1: 5}, {2: 1})
+    recipes.update()
+    assert bill.expansion(2) == {1: 5}
+
+
+def test_cycle_is_cut_at_its_component():
+    bill = BillOfMaterials(CraftingGraph([recipe(1, {1: 1}, {2: 1}), recipe(2, {2: 1}, {1: 2}), recipe(3, {2: 1}, {3: 1})]))
+    assert bill.expansion(3) == {1: 1}
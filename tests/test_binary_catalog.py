@@ -0,0 +1,58 @@
+import os
+import pytest
+import yaml
+from app.binary_catalog import BinaryCatalog, write_catalog
+from app.data_model import DataModel
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+
+
+def test_sample_data_round_trip(tmp_path):
+    path = str(tmp_path / "crafting.ccat")
+    with open(os.path.join(DATA, "crafting.yaml"), "r", encoding="utf-8") as file:
+        data = yaml.safe_load(file)
+    write_catalog(path, data['ingredients'], data['recipes'])
+    catalog = BinaryCatalog(path)
+    try:
+        assert list(catalog.ingredients) == data['ingredients']
+        assert list(catalog.recipes) == data['recipes']
+        assert catalog.recipes[-1] == data['recipes'][-1]
+    finally:
+        catalog.close()
+
+
+def test_missing_values_and_substitutions_round_trip(tmp_path):
+    path = str(tmp_path / "crafting.ccat")
+    recipe = {'id': 7, 'name': None, 'duration': None, 'ingredients': [{'id': 1, 'amount': 2}], 'products': [{'id': 2}],
+              'substitutions': [{'original': {'amount': 2, 'id': 1}, 'substitute': {'amount': 1, 'id': 3}}]}
+    write_catalog(path, [{'id': 1, 'name': "ore"}], [recipe])
+    catalog = BinaryCatalog(path)
+    try:
+        decoded = catalog.recipes[0]
+        assert decoded['name'] is None and decoded['duration'] == 0
+        assert catalog.recipes[0] is decoded
+        assert decoded['products'][0] == {'id': 2}
+        assert decoded['substitutions'] == recipe['substitutions']
+    finally:
+        catalog.close()
+
+
+def test_non_integral_number_is_refused(tmp_path):
+    path = str(tmp_path / "crafting.ccat")
+    write_catalog(path, [], [{'id': 1, 'name': "smelt", 'duration': 2.0}])
+    catalog = BinaryCatalog(path)
+    try:
+        assert catalog.recipes[0]['duration'] == 2
+    finally:
+        catalog.close()
+
+    data_model = DataModel()
+    data_model.recipes = [{'id': 1, 'name': "smelt", 'duration': 0.5}]
+    with pytest.raises(ValueError):
+        data_model.save_catalog(path)
+    assert not os.path.exists(path + ".tmp")
+    catalog = BinaryCatalog(path)
+    try:
+        assert catalog.recipes[0]['duration'] == 2
+    finally:
+        catalog.close()
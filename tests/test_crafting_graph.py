@@ -0,0 +1,57 @@
+import random
+from app.crafting_graph import CraftingGraph
+from app.protected_list import PList
+from tests.helpers import recipe
+
+
+def _assert_matches_rebuild(graph: CraftingGraph, recipes: PList, ingredients: PList):
+    rebuilt = CraftingGraph(recipes.original, ingredients.original)
+    assert sorted(graph.items()) == sorted(rebuilt.items())
+    assert {frozenset(component) for component in graph.components()} == {
+        frozenset(component) for component in rebuilt.components()}
+    for item in rebuilt.items():
+        assert graph.is_cyclic(item) == rebuilt.is_cyclic(item)
+    position = {item: number for number, item in enumerate(graph.topological_order())}
+    for item in graph.items():
+        for product in graph.successors(item):
+            assert position[item] <= position[product] or graph.component(item) == graph.component(product)
+            assert graph.component(item) <= graph.component(product)
+
+
+def test_incremental_components_match_a_rebuild():
+    generator = random.Random(11)
+    recipes = PList([recipe(number, {number: 1}, {number + 1: 1}) for number in range(6)])
+    ingredients = PList([{'id': number, 'name': f"item {number}"} for number in range(4)])
+    graph = CraftingGraph()
+    graph.follow(recipes, ingredients)
+    for _ in range(200):
+        operation = generator.choice(['add', 'replace', 'remove', 'ingredient', 'undo'])
+        if operation == 'add' or not recipes:
+            recipes.append(recipe(generator.randrange(100), {generator.randrange(10): 1}, {generator.randrange(10): 1}))
+        elif operation == 'replace':
+            position = generator.randrange(len(recipes))
+            recipes[position] = recipe(position, {generator.randrange(10): 2}, {generator.randrange(10): 1})
+        elif operation == 'remove':
+            del recipes[generator.randrange(len(recipes))]
+        elif operation == 'ingredient':
+            ingredients.append({'id': generator.randrange(20), 'name': "extra"})
+            ingredients.update()
+        else:
+            recipes.undo()
+        recipes.update()
+        graph.topological_order()  # Analyze now, so the next commit is applied to the cached components
+        _assert_matches_rebuild(graph, recipes, ingredients)
+
+
+def test_forward_edge_keeps_the_cached_components():
+    recipes = PList([recipe(1, {1: 1}, {2: 1}), recipe(2, {2: 1}, {3: 1})])
+    graph = CraftingGraph()
+    graph.follow(recipes)
+    components = graph.components()
+    recipes.append(recipe(3, {1: 1}, {3: 1}))
+    recipes.update()
+    assert graph.components() is components
+    recipes.append(recipe(4, {3: 1}, {1: 1}))
+    recipes.update()
+    assert graph.components() is not components
+    assert graph.is_cyclic(1) and graph.component(1) == graph.component(3)
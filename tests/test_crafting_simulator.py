@@ -0,0 +1,46 @@
+import pytest
+from app.crafting_graph import CraftingGraph, Substitution
+from app.crafting_simulator import CraftingSimulator
+from tests.helpers import recipe
+
+
+def test_source_recipe_crafts_every_duration():
+    graph = CraftingGraph([recipe(1, {}, {1: 2}, duration=5)])
+    result = CraftingSimulator(graph, {0: 3}).run(20)
+    assert result.time == 20
+    assert result.crafts == {0: 12}
+    assert result.produced == {1: 24}
+    assert result.throughput == pytest.approx({1: 1.2})
+    assert result.utilization == pytest.approx({0: 1.0})
+
+
+def test_chain_is_limited_by_its_supply():
+    graph = CraftingGraph([recipe(1, {}, {1: 1}, duration=2), recipe(2, {1: 2}, {2: 1})])
+    result = CraftingSimulator(graph, {0: 1, 1: 1}).run(10)
+    assert result.crafts == {0: 5, 1: 2}
+    assert result.inventory == {1: 1, 2: 2}
+    assert result.consumed == {1: 4}
+    assert result.starved[1] > 0
+    assert result.utilization[1] == pytest.approx(0.2)
+
+
+def test_starting_inventory_runs_out():
+    graph = CraftingGraph([recipe(1, {1: 1}, {2: 1}, duration=3)])
+    result = CraftingSimulator(graph, {0: 2}, inventory={1: 3}).run(30)
+    assert result.crafts == {0: 3}
+    assert result.inventory == {1: 0, 2: 3}
+    assert result.starved == {1: 2 * 30 - 3 * 3}
+
+
+def test_substitution_replaces_an_ingredient():
+    graph = CraftingGraph([recipe(1, {1: 2}, {2: 1})])
+    result = CraftingSimulator(graph, {0: 1}, inventory={3: 2}, substitutions={0: [Substitution(1, 2, 3, 1)]}).run(10)
+    assert result.crafts == {0: 2}
+    assert result.consumed == {3: 2}
+
+
+def test_run_continues_from_the_current_time():
+    graph = CraftingGraph([recipe(1, {}, {1: 1}, duration=4)])
+    simulator = CraftingSimulator(graph, {0: 1})
+    assert simulator.run(6).crafts == {0: 1}
+    assert simulator.run(12).crafts == {0: 3}
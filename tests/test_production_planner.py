@@ -0,0 +1,57 @@
+from fractions import Fraction
+import pytest
+from app.crafting_graph import CraftingGraph, Substitution
+from app.production_planner import ProductionPlanner
+from app.protected_list import PList
+from tests.helpers import recipe
+
+
+def test_cheapest_recipe_is_chosen():
+    graph = CraftingGraph([recipe(1, {1: 2}, {3: 1}), recipe(2, {2: 1}, {3: 1})])
+    planner = ProductionPlanner(graph, prices={1: 1, 2: 5})
+    assert planner.unit_cost(3) == 2
+    assert planner.choice(3) == (0, [])
+    plan = planner.plan(3, 2)
+    assert plan.cost == 4
+    assert plan.crafts == {0: 2}
+    assert plan.raw == {1: 4}
+
+
+def test_substitution_is_used_when_cheaper():
+    graph = CraftingGraph([recipe(1, {1: 2, 2: 1}, {3: 1}, substitutions=[(1, 2, 4, 1)])])
+    planner = ProductionPlanner(graph, prices={1: 3, 4: 2})
+    assert planner.unit_cost(3) == 3
+    plan = planner.plan(3)
+    assert plan.substitutions == {0: [Substitution(1, 2, 4, 1)]}
+    assert plan.raw == {2: 1, 4: 1}
+
+
+def test_fractional_crafts_and_duration():
+    graph = CraftingGraph([recipe(1, {1: 1}, {2: 1}, duration=2), recipe(2, {2: 1}, {3: 2}, duration=3)])
+    plan = ProductionPlanner(graph, objective='duration').plan(3, 3)
+    assert plan.crafts == {1: Fraction(3, 2), 0: Fraction(3, 2)}
+    assert plan.duration == Fraction(3, 2) * 3 + Fraction(3, 2) * 2
+    assert plan.raw == {1: Fraction(3, 2)}
+
+
+def test_cycle_ingredient_is_not_crafted():
+    graph = CraftingGraph([recipe(1, {1: 1}, {2: 1}), recipe(2, {2: 1}, {1: 1})])
+    plan = ProductionPlanner(graph).plan(2)
+    assert plan.crafts == {0: 1}
+    assert plan.raw == {1: 1}
+
+
+def test_plan_follows_graph_changes():
+    recipes = PList([recipe(1, {1: 2}, {3: 1})])
+    graph = CraftingGraph(recipes.original)
+    graph.follow(recipes)
+    planner = ProductionPlanner(graph)
+    assert planner.unit_cost(3) == 2
+    recipes.append(recipe(2, {2: 1}, {3: 1}))
+    recipes.update()
+    assert planner.unit_cost(3) == 1
+
+
+def test_unknown_objective_raises():
+    with pytest.raises(ValueError):
+        ProductionPlanner(CraftingGraph([]), objective='speed')
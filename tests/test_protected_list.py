@@ -0,0 +1,221 @@
+import random
+from collections import Counter
+from collections.abc import Sequence
+import pytest
+from app.key_index import KeyIndex
+from app.lazy_list import LazyList
+from app.protected_list import Change, ListView, PList, change_size
+from app.records import Ingredient
+
+
+def test_changes_reach_the_original_list_on_update():
+    original = [1, 2, 3]
+    plist = PList(original)
+    plist[1] = 5
+    plist.append(4)
+    del plist[0]
+    assert plist == [5, 3, 4] and original == [1, 2, 3]
+    plist.update()
+    assert original == [5, 3, 4]
+
+
+def test_views_follow_the_list_without_copying():
+    plist = PList([1, 2, 3])
+    original, current = plist.original, plist.current
+    assert isinstance(original, ListView) and isinstance(current, ListView)
+    plist.append(4)
+    assert current == [1, 2, 3, 4] and original == [1, 2, 3]
+    snapshot = original.copy()
+    plist.update()
+    assert original == [1, 2, 3, 4] and snapshot == [1, 2, 3]
+    assert original[1:3] == [2, 3] and list(reversed(current)) == [4, 3, 2, 1] and 4 in original
+    with pytest.raises(TypeError):
+        original[0] = 5
+
+
+def test_edit_copies_the_item_with_its_changes():
+    item = Ingredient(1, "iron")
+    plist = PList([item], index_keys=('id',))
+    seen = []
+    plist.subscribe(lambda change: seen.append(change.new['id']))
+    edited = plist.edit(0, {'id': 2, 'name': "steel"})
+    assert edited is plist[0] and edited is not item
+    assert item == {'id': 1, 'name': "iron"} and edited == {'id': 2, 'name': "steel"}
+    assert seen == [2] and plist.key_index('id').first(2) is edited and plist.key_index('id').first(1) is None
+    assert plist.original == [item]
+    plist.edit(0, {'name': "bronze"})
+    plist.undo()
+    assert plist[0] is edited
+    plist.update()
+    assert plist.original[0] is edited
+
+
+def test_update_commits_only_the_pending_changes():
+    original = list(range(10))
+    plist = PList(original)
+    committed = []
+    plist.subscribe_commits(committed.append)
+    plist[2] = 20
+    plist[2] = 21
+    plist.insert(0, -1)
+    plist.update()
+    assert original == [-1, 0, 1, 21] + list(range(3, 10))
+    assert [change.op for change in committed[0]] == ['set', 'insert'] and committed[0][0].new == 21
+    assert plist.changes() == []
+    plist.update()
+    assert len(committed) == 1
+
+
+def test_update_of_more_changes_than_items_replaces_the_original():
+    original = [1, 2]
+    plist = PList(original)
+    plist.current = [3, 4, 5, 6]
+    plist.update()
+    assert original == [3, 4, 5, 6]
+
+
+@pytest.mark.parametrize('edits', [
+    lambda plist: plist.__setitem__(1, 9),
+    lambda plist: plist.insert(1, 9),
+    lambda plist: plist.__delitem__(slice(0, 2)),
+    lambda plist: plist.sort(reverse=True),
+    lambda plist: plist.extend(range(10)),
+])
+def test_reset_restores_the_original(edits):
+    plist = PList([3, 1, 2])
+    plist.append(7)
+    plist.update()
+    edits(plist)
+    plist.reset()
+    assert plist == [3, 1, 2, 7] and plist.changes() == []
+    assert plist.undo().new == 7 and plist == [3, 1, 2]
+
+
+def test_undo_and_redo_round_trip():
+    plist = PList([1, 2, 3])
+    plist[0] = 4
+    plist.insert(1, 5)
+    plist.reverse()
+    del plist[0]
+    edited = list(plist)
+    while plist.undo():
+        pass
+    assert plist == [1, 2, 3]
+    while plist.redo():
+        pass
+    assert plist == edited
+    plist.undo()
+    plist.append(6)
+    assert plist.redo() is None
+
+
+def test_undo_history_is_bounded_by_its_budget():
+    record = {'id': 1, 'name': "x" * 1000}
+    size = change_size(Change('set', 0, record, record))
+    plist = PList([record], undo_budget=3 * size)
+    for _ in range(10):
+        plist.edit(0, {'id': plist[0]['id'] + 1})
+    assert plist._undo_size <= 3 * size and len(plist._undo) == 3
+    while plist.undo():
+        pass
+    assert plist[0]['id'] == 8
+    plist.reset()
+    assert plist == [record]
+
+
+def test_largest_change_is_kept_over_budget():
+    plist = PList([], undo_budget=1)
+    plist.append(list(range(1000)))
+    assert plist.undo() is not None and plist == []
+
+
+def _assert_index_matches(plist: PList):
+    index = plist.key_index('id')
+    rebuilt = KeyIndex('id', plist)
+    assert len(index) == len(rebuilt)
+    for value in rebuilt._buckets:
+        assert sorted(map(id, index.get(value))) == sorted(map(id, rebuilt.get(value)))
+    assert index.duplicates().keys() == rebuilt.duplicates().keys()
+
+
+def test_key_index_stays_consistent():
+    generator = random.Random(4)
+    plist = PList([{'id': number} for number in range(5)], index_keys=('id',))
+    for _ in range(300):
+        position = generator.randrange(len(plist)) if plist else 0
+        operation = generator.choice(['set', 'insert', 'delete', 'edit', 'sort', 'undo', 'redo', 'reset', 'update'])
+        if operation == 'set' and plist:
+            plist[position] = {'id': generator.randrange(8)}
+        elif operation == 'insert':
+            plist.insert(position, {'id': generator.randrange(8)})
+        elif operation == 'delete' and plist:
+            del plist[position]
+        elif operation == 'edit' and plist:
+            plist.edit(position, {'id': generator.randrange(8)})
+        elif operation == 'sort':
+            plist.sort(key=lambda entry: entry['id'])
+        elif operation in ('undo', 'redo', 'reset', 'update'):
+            getattr(plist, operation)()
+        _assert_index_matches(plist)
+    assert plist.key_index('id').duplicates()
+
+
+class CountedRecords(Sequence):
+    """ Read only sequence of records that counts the reads of every index, the same record is returned every time."""
+    def __init__(self, count: int):
+        self.records = [{'id': number} for number in range(count)]
+        self.reads = Counter()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> dict:
+        self.reads[index] += 1
+        return self.records[index]
+
+
+def test_lazy_list_reads_entries_on_access():
+    records = CountedRecords(100)
+    plist = PList(records, index_keys=('id',))
+    read = []
+    plist.subscribe_reads(read.append)
+    assert len(plist) == 100 and not records.reads
+    assert plist[5] is records.records[5] and plist[5] is records.records[5]
+    assert read == [records.records[5]] and 5 in plist.key_index('id') and 6 not in plist.key_index('id')
+    plist[7] = {'id': 700}
+    del plist[0]
+    plist.reverse()
+    plist.update()
+    assert set(records.reads) == {0, 5, 7}
+    assert plist.read_entries() == [{'id': 700}, {'id': 5}]
+    snapshot = plist.original.copy()
+    assert isinstance(snapshot, LazyList) and set(records.reads) == {0, 5, 7}
+    assert len(plist.key_index('id', complete=True)) == 99
+    _assert_index_matches(plist)
+    assert len(read) == len({id(entry) for entry in read}) == 100
+    assert snapshot == list(plist) and snapshot[0] == {'id': 99}
+
+
+def test_lazy_key_index_stays_consistent():
+    generator = random.Random(7)
+    records = CountedRecords(50)
+    plist = PList(records, index_keys=('id',))
+    for step in range(300):
+        position = generator.randrange(len(plist)) if plist else 0
+        operation = generator.choice(['set', 'insert', 'delete', 'edit', 'reverse', 'undo', 'redo', 'reset', 'update'])
+        if operation == 'set' and plist:
+            plist[position] = {'id': generator.randrange(60)}
+        elif operation == 'insert':
+            plist.insert(position, {'id': generator.randrange(60)})
+        elif operation == 'delete' and plist:
+            del plist[position]
+        elif operation == 'edit' and plist:
+            plist.edit(position, {'id': generator.randrange(60)})
+        elif operation in ('reverse', 'undo', 'redo', 'reset', 'update'):
+            getattr(plist, operation)()
+        if step == 150:
+            assert len(records.reads) < len(records)
+            plist.key_index('id', complete=True)
+            _assert_index_matches(plist)
+    plist.key_index('id', complete=True)
+    _assert_index_matches(plist)
@@ -0,0 +1,44 @@
+import pytest
+from app.crafting_graph import CraftingGraph
+from app.rate_solver import RateSolver
+from tests.helpers import recipe
+
+
+def test_chain_rates_crafters_and_supply():
+    solver = RateSolver(CraftingGraph([recipe(1, {1: 2}, {2: 1}, duration=2), recipe(2, {2: 3}, {3: 1})]))
+    solution = solver.solve({3: 1})
+    assert solution.rates == pytest.approx({0: 3, 1: 1})
+    assert solution.crafters == pytest.approx({0: 6, 1: 1})
+    assert solution.supply == pytest.approx({1: 6})
+    assert solution.surplus == {}
+
+
+def test_multi_product_recipe_runs_for_its_neediest_item():
+    solver = RateSolver(CraftingGraph([recipe(1, {1: 1}, {2: 1, 3: 1})]))
+    for targets in ({2: 5, 3: 1}, {3: 1, 2: 5}):
+        solution = solver.solve(targets)
+        assert solution.rates == pytest.approx({0: 5})
+        assert solution.supply == pytest.approx({1: 5})
+        assert solution.surplus == pytest.approx({3: 4})
+
+
+def test_result_does_not_depend_on_target_order():
+    graph = CraftingGraph([recipe(1, {1: 1}, {2: 1, 3: 2}), recipe(2, {2: 1, 3: 1}, {4: 1})])
+    forward = RateSolver(graph).solve({4: 1, 3: 6})
+    backward = RateSolver(graph).solve({3: 6, 4: 1})
+    assert forward == backward
+    assert forward.rates == pytest.approx({0: 3.5, 1: 1})
+    assert forward.surplus == pytest.approx({2: 2.5})
+
+
+def test_byproduct_covering_an_item_stops_its_recipe():
+    graph = CraftingGraph([recipe(1, {1: 1}, {2: 1, 3: 2}), recipe(2, {1: 1}, {3: 1}), recipe(3, {3: 1}, {4: 1})])
+    solution = RateSolver(graph, choose=lambda item, candidates: candidates[-1]).solve({2: 2, 4: 1})
+    assert set(solution.rates) == {0, 2}
+    assert solution.surplus == pytest.approx({3: 3})
+
+
+def test_unbalanced_cycle_raises():
+    graph = CraftingGraph([recipe(1, {1: 1}, {2: 1}), recipe(2, {2: 1}, {1: 1})])
+    with pytest.raises(ValueError):
+        RateSolver(graph).solve({2: 1})
@@ -0,0 +1,68 @@
+import pytest
+from app.crafting_graph import CraftingGraph
+from tests.helpers import recipe
+
+np = pytest.importorskip("numpy")
+from app.recipe_matrix import RecipeMatrix  # noqa: E402
+
+
+def test_chain_rates_and_raw():
+    matrix = RecipeMatrix(CraftingGraph([recipe(1, {1: 2}, {2: 1}, duration=2), recipe(2, {2: 3}, {3: 1})]))
+    rates, raw = matrix.required_rates(matrix.item_vector({3: 1}))
+    assert rates.tolist() == pytest.approx([3, 1])
+    assert raw[matrix.item_index[1]] == pytest.approx(6)
+    assert matrix.machines(rates).sum() == pytest.approx(3 * 2 + 1)
+
+
+def test_multi_product_recipe_meets_every_demand():
+    matrix = RecipeMatrix(CraftingGraph([recipe(1, {1: 1}, {2: 1, 3: 1})]))
+    rates, raw = matrix.required_rates(matrix.item_vector({2: 5, 3: 1}))
+    assert rates.tolist() == pytest.approx([5])
+    assert raw.tolist() == pytest.approx([5, 0, 0])
+    delivered = matrix.item_rates(matrix.machines(rates))
+    assert delivered[matrix.item_index[2]] >= 5 and delivered[matrix.item_index[3]] >= 1
+
+
+def test_multi_product_recipe_in_a_batch():
+    matrix = RecipeMatrix(CraftingGraph([recipe(1, {1: 1}, {2: 1, 3: 2})]))
+    demand = np.stack([matrix.item_vector({2: 1, 3: 4}), matrix.item_vector({2: 3})])
+    rates, raw = matrix.required_rates(demand)
+    assert rates[:, 0].tolist() == pytest.approx([2, 3])
+    assert raw[:, matrix.item_index[1]].tolist() == pytest.approx([2, 3])
+
+
+def test_byproduct_feeding_another_recipe():
+    # Smelting ore gives metal and slag, slag is pressed into bricks
+    matrix = RecipeMatrix(CraftingGraph([recipe(1, {1: 2}, {2: 1, 3: 1}), recipe(2, {3: 1}, {4: 1})]))
+    rates, raw = matrix.required_rates(matrix.item_vector({2: 2, 4: 1}))
+    delivered = matrix.item_rates(matrix.machines(rates))
+    assert delivered[matrix.item_index[2]] == pytest.approx(2)
+    assert delivered[matrix.item_index[4]] == pytest.approx(1)
+    assert raw[matrix.item_index[1]] == pytest.approx(4)
+    assert raw.sum() == pytest.approx(4)
+
+
+def test_unsettled_cycle_raises():
+    matrix = RecipeMatrix(CraftingGraph([recipe(1, {1: 2}, {2: 1}), recipe(2, {2: 1}, {1: 1})]))
+    with pytest.raises(ValueError):
+        matrix.required_rates(matrix.item_vector({2: 1}))
+
+
+def test_converging_cycle_is_solved_exactly():
+    # Each pass around the cycle returns 1001 of item 1 for 1000: the loop gain is close to 1
+    matrix = RecipeMatrix(CraftingGraph([recipe(1, {1: 1000}, {2: 1000}), recipe(2, {2: 1000}, {1: 1001})]))
+    rates, raw = matrix.required_rates(matrix.item_vector({1: 1}))
+    assert rates.tolist() == pytest.approx([1, 1])
+    assert matrix.item_rates(matrix.machines(rates))[matrix.item_index[1]] == pytest.approx(1)
+    assert raw.sum() == pytest.approx(0)
+
+
+def test_cycle_follows_its_most_needed_item():
+    # Recipe 1 makes 2 and 3 from 1, recipe 2 makes 1 back from 2 and 4. Item 3 is needed most from outside, but once
+    # recipe 2 takes its share of item 2 that item governs recipe 1
+    matrix = RecipeMatrix(CraftingGraph([recipe(1, {1: 1}, {2: 1, 3: 1}), recipe(2, {2: 1, 4: 1}, {1: 2})]))
+    rates, raw = matrix.required_rates(matrix.item_vector({3: 2, 2: 1.5}))
+    assert rates.tolist() == pytest.approx([3, 1.5])
+    delivered = matrix.item_rates(matrix.machines(rates))
+    assert delivered[matrix.item_index[2]] == pytest.approx(1.5) and delivered[matrix.item_index[3]] == pytest.approx(3)
+    assert raw.tolist() == pytest.approx(matrix.item_vector({4: 1.5}).tolist())
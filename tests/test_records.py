@@ -0,0 +1,53 @@
+import copy
+import json
+import pickle
+import pytest
+import yaml
+from app.data_model import DataModel
+from app.records import ItemAmount, Lines, Recipe, as_record, plain
+
+RECIPE = {'id': 1, 'name': "smelt", 'duration': 2,
+          'ingredients': [{'id': 1, 'amount': 2}, {'id': 3}], 'products': [{'id': 2, 'amount': 1}]}
+
+
+def test_record_behaves_like_its_dictionary():
+    recipe = as_record('recipes', RECIPE)
+    assert isinstance(recipe, Recipe)
+    assert recipe == RECIPE and dict(recipe) == RECIPE
+    assert recipe['ingredients'][0] == {'id': 1, 'amount': 2}
+    assert 'substitutions' not in recipe and recipe.get('substitutions') is None
+    assert copy.deepcopy(recipe) == RECIPE
+    with pytest.raises(KeyError):
+        recipe['speed']
+
+
+def test_missing_line_fields_stay_missing():
+    lines = Lines([{'id': 3}, {'amount': 4}])
+    assert list(lines) == [{'id': 3}, {'amount': 4}]
+    assert lines[0].get('amount') is None and 'amount' not in lines[0]
+    assert plain(lines) == [{'id': 3}, {'amount': 4}]
+    assert pickle.loads(pickle.dumps(ItemAmount(3, None))) == {'id': 3}
+
+
+@pytest.mark.parametrize("extension", [".json", ".jsonl", ".yaml"])
+def test_file_round_trip(tmp_path, extension):
+    path = str(tmp_path / f"crafting{extension}")
+    data_model = DataModel()
+    data_model.recipes = [as_record('recipes', RECIPE)]
+    data_model.save_data(path)
+    with open(path, "r", encoding="utf-8") as file:
+        assert "null" not in file.read()
+    loaded = DataModel()
+    loaded.load_data(path)
+    assert list(loaded.recipes) == [RECIPE]
+    assert json.loads(json.dumps(list(loaded.recipes), default=plain)) == [RECIPE]
+    if extension == ".yaml":
+        with open(path, "r", encoding="utf-8") as file:
+            assert yaml.safe_load(file)['recipes'] == [RECIPE]
+
+
+def test_recipe_duration_defaults_to_zero():
+    assert as_record('recipes', {'id': 1, 'name': "smelt"})['duration'] == 0
+    assert Recipe.from_dict({'id': 1, 'duration': None})['duration'] == 0
+    assert Recipe(1, "smelt")['duration'] == 0
+    assert Recipe.from_dict({'id': 1, 'speed': 2}) == {'id': 1, 'speed': 2}
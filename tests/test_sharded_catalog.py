@@ -0,0 +1,84 @@
+import json
+import os
+from app.integrity import IntegrityChecker
+from app.protected_list import PList
+from app.sharded_catalog import ShardedCatalog, write_manifest
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+
+
+def shard_files(directory):
+    """ Returns the names of the JSON shard files in a directory."""
+    return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def test_shards_are_read_on_access():
+    catalog = ShardedCatalog(os.path.join(DATA, "crafting.manifest"))
+    assert (len(catalog.ingredients), len(catalog.recipes)) == (29, 25)
+    assert not catalog.ingredients.loaded and not catalog.recipes.loaded
+    assert catalog.recipes[-1] == list(catalog.recipes)[24]
+    assert list(catalog.recipes.loaded) == [0] and not catalog.ingredients.loaded
+
+
+def test_manifest_round_trip(tmp_path):
+    source = ShardedCatalog(os.path.join(DATA, "crafting.manifest"))
+    path = str(tmp_path / "catalog.manifest")
+    written = write_manifest(path, list(source.ingredients), list(source.recipes), shard_size=10)
+    with open(path, "r", encoding="utf-8") as file:
+        counts = [shard['count'] for shard in json.load(file)['shards']]
+    assert counts == [10, 10, 9, 10, 10, 5]
+
+    reopened = ShardedCatalog(path)
+    assert list(reopened.ingredients) == list(source.ingredients)
+    assert list(reopened.recipes) == list(source.recipes)
+    assert list(written.recipes) == list(source.recipes)
+
+
+def test_unchanged_shards_are_kept(tmp_path):
+    path = str(tmp_path / "catalog.manifest")
+    ingredients = [{'id': number, 'name': f"item {number}"} for number in range(5)]
+    catalog = write_manifest(path, ingredients, [], shard_size=2)
+    before = shard_files(tmp_path)
+    assert len(before) == 3
+
+    changed = list(catalog.ingredients)
+    changed[4] = {'id': 4, 'name': "renamed"}
+    catalog = write_manifest(path, changed, catalog.recipes, shard_size=2, previous=catalog)
+    after = shard_files(tmp_path)
+    assert len(after) == 3 and len(set(before) & set(after)) == 2
+    assert ShardedCatalog(path).ingredients[4]['name'] == "renamed"
+
+
+def test_protected_list_reads_a_shard_on_access(tmp_path):
+    path = str(tmp_path / "catalog.manifest")
+    write_manifest(path, [{'id': number, 'name': f"item {number}"} for number in range(6)], [], shard_size=2)
+    catalog = ShardedCatalog(path)
+    plist = PList(catalog.ingredients, index_keys=('id',))
+    assert plist[3]['name'] == "item 3" and list(catalog.ingredients.loaded) == [1]
+    plist.edit(0, {'name': "renamed"})
+    plist.update()
+    before = shard_files(tmp_path)
+    saved = write_manifest(path, plist.original.copy(), [], shard_size=2, previous=catalog)
+    assert sorted(catalog.ingredients.loaded) == [0, 1]
+    after = shard_files(tmp_path)
+    assert len(after) == 3 and len(set(before) & set(after)) == 2
+    assert ShardedCatalog(path).ingredients[0]['name'] == "renamed"
+
+    plist.edit(5, {'name': "last"})
+    plist.update()
+    write_manifest(path, plist.original.copy(), [], shard_size=2, previous=saved)
+    assert len(set(after) & set(shard_files(tmp_path))) == 2
+    assert [ingredient['name'] for ingredient in ShardedCatalog(path).ingredients] == \
+        ["renamed", "item 1", "item 2", "item 3", "item 4", "last"]
+
+
+def test_integrity_checks_recipes_as_they_are_read():
+    catalog = ShardedCatalog(os.path.join(DATA, "crafting.manifest"))
+    recipes, ingredients = PList(catalog.recipes), PList(catalog.ingredients)
+    checker = IntegrityChecker()
+    checker.follow(recipes, ingredients)
+    assert not checker.recipes and not catalog.recipes.loaded and not catalog.ingredients.loaded
+    recipe = recipes[3]
+    assert list(checker.recipes.values()) == [recipe] and list(catalog.ingredients.loaded) == [0]
+    assert len(list(recipes)) == 25 and len(checker.recipes) == 25
+    assert checker.messages() == IntegrityChecker(list(catalog.recipes), list(catalog.ingredients)).messages()
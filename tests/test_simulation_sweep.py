@@ -0,0 +1,45 @@
+import os
+from app.compiled_recipes import CompiledRecipes, write_compiled_recipes
+from app.crafting_graph import CraftingGraph, Substitution
+from app.crafting_simulator import CraftingSimulator
+from app.data_model import DataModel
+from app.simulation_sweep import SimulationSweep
+from tests.helpers import recipe
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+RECIPES = [recipe(1, {}, {1: 2}, duration=3), recipe(2, {1: 2, 2: 1}, {3: 1}, duration=None, substitutions=[(2, 1, 4, 2)]),
+           recipe(3, {1: 1}, {1: 1, 2: 1}, duration=2.5)]
+
+
+def test_compiled_recipes_match_the_graph(tmp_path):
+    path = str(tmp_path / "recipes.crec")
+    write_compiled_recipes(path, RECIPES)
+    graph = CraftingGraph(RECIPES)
+    compiled = CompiledRecipes(path)
+    try:
+        assert len(compiled) == 3
+        for node in range(3):
+            assert compiled.inputs[node] == graph.inputs[node]
+            assert compiled.outputs[node] == graph.outputs[node]
+            assert compiled.substitutions[node] == graph.substitutions[node]
+        assert [compiled.duration(node) for node in range(3)] == [3, None, 2]
+        assert compiled.substituted_inputs(1, [Substitution(2, 1, 4, 2)]) == {1: 2, 4: 2}
+        crafters, inventory = {0: 1, 1: 1, 2: 1}, {2: 1}
+        assert CraftingSimulator(compiled, crafters, inventory).run(30) == CraftingSimulator(graph, crafters, inventory).run(30)
+    finally:
+        compiled.close()
+
+
+def test_sweep_of_a_sharded_catalog():
+    data_model = DataModel()
+    data_model.load_data(os.path.join(DATA, "crafting.manifest"))
+    sweep = SimulationSweep.from_data_model(data_model, processes=1)
+    path = sweep.recipes_path
+    try:
+        assert path.endswith(".crec")
+        results = dict(sweep.run([{'crafters': {0: 1}, 'until': 10}]))
+        assert list(results) == [0]
+    finally:
+        sweep.close()
+        data_model.close()
+    assert not os.path.exists(path)
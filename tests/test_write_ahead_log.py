@@ -0,0 +1,147 @@
+import json
+import os
+from app.protected_list import PList
+from app.write_ahead_log import WriteAheadLog
+
+
+def save(file_path, text):
+    """ Replaces a main file the way the editor saves it."""
+    with open(file_path + ".tmp", "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def follow(file_path, **kwargs):
+    """ Returns a log of the main file following new ingredient and recipe lists."""
+    ingredients, recipes = PList([{'id': 1, 'name': "ore"}]), PList([])
+    log = WriteAheadLog(file_path, **kwargs)
+    log.replay()
+    log.follow(ingredients, recipes)
+    return log, ingredients, recipes
+
+
+def test_commits_are_replayed(tmp_path):
+    main = str(tmp_path / "crafting.json")
+    save(main, "{}")
+    log, ingredients, recipes = follow(main)
+    ingredients.append({'id': 2, 'name': "ingot"})
+    ingredients[0] = {'id': 1, 'name': "iron ore"}
+    ingredients.update()
+    recipes.append({'id': 1, 'name': "smelt", 'duration': 2})
+    recipes.update()
+    log.unfollow()
+
+    changes = WriteAheadLog(main).replay()
+    assert [(change.op, change.index, change.new) for change in changes['ingredients']] == [
+        ('insert', 1, {'id': 2, 'name': "ingot"}), ('set', 0, {'id': 1, 'name': "iron ore"})]
+    assert [(change.op, change.new) for change in changes['recipes']] == [('insert', {'id': 1, 'name': "smelt", 'duration': 2})]
+
+
+def test_log_of_a_replaced_main_file_is_removed(tmp_path):
+    main = str(tmp_path / "crafting.json")
+    save(main, "{}")
+    log, ingredients, _ = follow(main)
+    ingredients.append({'id': 2, 'name': "ingot"})
+    ingredients.update()
+    log.unfollow()
+    save(main, '{"ingredients": []}')
+
+    log = WriteAheadLog(main)
+    assert log.replay() == {'ingredients': [], 'recipes': []}
+    assert not os.path.exists(log.log_path)
+
+
+def test_rotation_keeps_commits_until_the_save(tmp_path):
+    main = str(tmp_path / "crafting.json")
+    save(main, "{}")
+    log, ingredients, _ = follow(main)
+    ingredients.append({'id': 2, 'name': "ingot"})
+    ingredients.update()
+    log.rotate()
+    ingredients.append({'id': 3, 'name': "plate"})
+    ingredients.update()
+    log.unfollow()
+
+    # The save did not happen: both logs apply, the old one first
+    changes = WriteAheadLog(main).replay()
+    assert [change.new['name'] for change in changes['ingredients']] == ["ingot", "plate"]
+
+    # The save happened: only the commits made meanwhile apply
+    save(main, '{"ingredients": [{"id": 1, "name": "ore"}, {"id": 2, "name": "ingot"}]}')
+    log = WriteAheadLog(main)
+    changes = log.replay()
+    assert [change.new['name'] for change in changes['ingredients']] == ["plate"]
+    assert not os.path.exists(log.old_path)
+    assert [change.new['name'] for change in WriteAheadLog(main).replay()['ingredients']] == ["plate"]
+
+
+def test_threshold_is_reported(tmp_path):
+    main = str(tmp_path / "crafting.json")
+    save(main, "{}")
+    reported = []
+    log, ingredients, _ = follow(main, threshold=0, on_threshold=lambda: reported.append(True))
+    ingredients.append({'id': 2, 'name': "ingot"})
+    ingredients.update()
+    log.discard()
+    assert reported == [True]
+    assert not os.path.exists(log.log_path)
+
+
+def test_line_cut_short_is_dropped(tmp_path):
+    main = str(tmp_path / "crafting.json")
+    save(main, "{}")
+    log, ingredients, _ = follow(main)
+    ingredients.append({'id': 2, 'name': "ingot"})
+    ingredients.update()
+    log.unfollow()
+    with open(log.log_path, "a", encoding="utf-8") as file:
+        file.write('["ingredients",[["insert",2,{"id":3')
+
+    log, ingredients, _ = follow(main)
+    ingredients.append({'id': 3, 'name': "plate"})
+    ingredients.update()
+    log.unfollow()
+    changes = WriteAheadLog(main).replay()
+    assert [change.new['name'] for change in changes['ingredients']] == ["ingot", "plate"]
+
+
+def test_finished_rotation_records_the_saved_file(tmp_path):
+    main = str(tmp_path / "crafting.json")
+    save(main, "{}")
+    log, ingredients, _ = follow(main)
+    log.rotate()
+    ingredients.append({'id': 2, 'name': "ingot"})
+    ingredients.update()
+    save(main, '{"ingredients": [{"id": 1, "name": "ore"}]}')
+    log.finish_rotation()
+    ingredients.append({'id': 3, 'name': "plate"})
+    ingredients.update()
+    log.unfollow()
+    assert not os.path.exists(log.old_path)
+    with open(log.log_path, encoding="utf-8") as file:
+        assert json.loads(file.readline())['base'] is not None
+
+    changes = WriteAheadLog(main).replay()
+    assert [change.new['name'] for change in changes['ingredients']] == ["ingot", "plate"]
+
+    # The log applies to the saved file only, not to a file that replaced it later
+    save(main, '{"ingredients": []}')
+    log = WriteAheadLog(main)
+    assert log.replay() == {'ingredients': [], 'recipes': []}
+    assert not os.path.exists(log.log_path)
+
+
+def test_log_waiting_for_a_save_without_old_log_is_removed(tmp_path):
+    main = str(tmp_path / "crafting.json")
+    save(main, "{}")
+    log, ingredients, _ = follow(main)
+    log.rotate()
+    ingredients.append({'id': 2, 'name': "ingot"})
+    ingredients.update()
+    log.unfollow()
+    os.remove(log.old_path)
+    save(main, '{"ingredients": []}')
+
+    log = WriteAheadLog(main)
+    assert log.replay() == {'ingredients': [], 'recipes': []}
+    assert not os.path.exists(log.log_path)